@@ -1,6 +1,8 @@
 import importlib
 from unittest import TestCase
 
+import numpy as np
+
 PATH = 'architecture.2018_03_maintainability_by_removing_if.by_language.python.three_hand_python'
 py_examples = importlib.import_module(PATH)
 
@@ -80,6 +82,58 @@ class RPDirectedGraphTestCase(RPSTestMixin, TestCase):
         self.fn = py_examples.rps_directed_graph
 
 
+class PlayGamesTestCase(TestCase):
+
+    def test_matches_payoff_matrix(self):
+        moves = list(py_examples.Move)
+        p1_moves = np.array([m.value for m in moves for _ in moves], dtype=np.int8)
+        p2_moves = np.array([m.value for _ in moves for m in moves], dtype=np.int8)
+
+        outcomes = py_examples.decode_outcomes(py_examples.play_games(p1_moves, p2_moves))
+        expected = [py_examples.rps_payoff_matrix(p1, p2) for p1 in moves for p2 in moves]
+        assert outcomes.tolist() == expected
+
+    def test_matches_one_liner(self):
+        rng = np.random.RandomState(0)
+        p1_moves, p2_moves = rng.randint(0, 3, size=(2, 1000))
+
+        outcomes = py_examples.play_games(p1_moves, p2_moves)
+        np.testing.assert_array_equal(outcomes, (3 + p1_moves - p2_moves) % 3)
+
+    def test_cyclic_payoff_table(self):
+        # rock, paper, scissors, paperclip: each move beats the one before
+        table = py_examples.cyclic_payoff_table(4)
+        np.testing.assert_array_equal(table, [[0, 2, 0, 1],
+                                              [1, 0, 2, 0],
+                                              [0, 1, 0, 2],
+                                              [2, 0, 1, 0]])
+
+        outcomes = py_examples.play_games(np.array([[3, 0]]), np.array([[2, 2]]), table=table)
+        assert outcomes.shape == (1, 2)
+        assert py_examples.decode_outcomes(outcomes).tolist() == [['Player 1 wins!', 'Draw!']]
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            py_examples.play_games(np.zeros(3, dtype=int), np.zeros(4, dtype=int))
+
+    def test_moves_out_of_range(self):
+        for p1_moves in ([0, 3], [-1, 0]):
+            with self.assertRaises(ValueError):
+                py_examples.play_games(np.array(p1_moves), np.zeros(2, dtype=int))
+
+    def test_out(self):
+        p1_moves, p2_moves = np.array([[0, 1], [2, 0]]), np.array([[1, 1], [1, 2]])
+        out = np.full((2, 2), -1, dtype=np.int8)
+        assert py_examples.play_games(p1_moves, p2_moves, out=out) is out
+        np.testing.assert_array_equal(out, [[2, 0], [1, 1]])
+
+        # writing through a non-contiguous array's flat view would write to a copy
+        with self.assertRaises(ValueError):
+            py_examples.play_games(p1_moves, p2_moves, out=np.empty((2, 4), dtype=np.int8)[:, ::2])
+        with self.assertRaises(ValueError):
+            py_examples.play_games(p1_moves, p2_moves, out=np.empty(4, dtype=np.int8))
+
+
 if __name__ == '__main__':
     import pytest
     pytest.main([__file__])
@@ -0,0 +1,76 @@
+import importlib
+from unittest import TestCase
+
+import numpy as np
+
+PATH = 'architecture.2018_03_maintainability_by_removing_if.by_language.python'
+tournament = importlib.import_module(f'{PATH}.tournament')
+py_examples = importlib.import_module(f'{PATH}.three_hand_python')
+
+
+class PayoffTableTestCase(TestCase):
+
+    def test_hands(self):
+        # rock, paper, paperclip, scissors each beat the hand before
+        np.testing.assert_array_equal(tournament.payoff_table(tournament.RPS),
+                                      py_examples.cyclic_payoff_table(4))
+
+    def test_moves(self):
+        np.testing.assert_array_equal(tournament.payoff_table(py_examples.Move),
+                                      py_examples.cyclic_payoff_table(3))
+
+
+class PlayMatchTestCase(TestCase):
+
+    def setUp(self):
+        self.payoff = py_examples.cyclic_payoff_table(3)
+        self.rock = tournament.MixedStrategy([1, 0, 0])
+        self.paper = tournament.MixedStrategy([0, 1, 0])
+
+    def test_fixed_strategies(self):
+        wins_a, wins_b, draws = tournament.play_match(self.paper, self.rock, self.payoff, 10, 20, seed=0)
+        assert (wins_a, wins_b, draws) == (200, 0, 0)
+
+    def test_frequency_counter(self):
+        counter = tournament.FrequencyCounter()
+        wins_a, wins_b, draws = tournament.play_match(counter, self.rock, self.payoff, 10, 20, seed=0)
+
+        # random first round, then always paper
+        assert wins_a + wins_b + draws == 200
+        assert wins_a >= 180
+
+    def test_seed(self):
+        uniform = tournament.MixedStrategy(np.ones(3) / 3)
+        counter = tournament.FrequencyCounter()
+        first = tournament.play_match(uniform, counter, self.payoff, 10, 20, seed=1)
+        assert first == tournament.play_match(uniform, counter, self.payoff, 10, 20, seed=1)
+
+
+class RoundRobinTestCase(TestCase):
+
+    def test_round_robin(self):
+        strategies = [
+            tournament.MixedStrategy(np.ones(3) / 3, name='uniform'),
+            tournament.MixedStrategy([1, 0, 0], name='rock'),
+            tournament.FrequencyCounter(),
+        ]
+        result = tournament.round_robin(strategies, game=py_examples.Move, n_rounds=20, n_matches=500,
+                                        batch_size=200, max_workers=2)
+
+        assert result.names == ['uniform', 'rock', 'frequency counter']
+        np.testing.assert_array_equal(result.games, 20 * 500 * (1 - np.eye(3)))
+
+        rates = tournament.win_rates(result)
+        assert np.isnan(np.diag(rates)).all()
+        assert abs(rates[0, 1] - 1 / 3) < 0.02
+        assert rates[2, 1] > 0.9
+
+        # batches have their own random streams, whatever the workers
+        again = tournament.round_robin(strategies, game=py_examples.Move, n_rounds=20, n_matches=500,
+                                       batch_size=200, max_workers=1)
+        np.testing.assert_array_equal(result.wins, again.wins)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,180 @@
+
+import importlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from .three_hand_python import Move, cyclic_payoff_table, play_games
+
+hand_objects = importlib.import_module('architecture.2018_03_maintainability_by_removing_if.three_hand_objects')
+RPS = hand_objects.RPS
+
+
+TournamentResult = namedtuple('TournamentResult', ['names', 'wins', 'games'])
+
+
+def payoff_table(game=RPS):
+    """
+    Payoff matrix (see `cyclic_payoff_table`) for an enum of moves.
+
+    For an enum of `Hand`s, like `RPS`, the table is the `Dominance`
+    of their 'beats' graph (for `RPS`, as set up by `initialise`);
+    otherwise, like `Move`, the graph is inferred from the ordering of
+    the members.
+    """
+    members = list(game)
+    if not isinstance(members[0].value, hand_objects.Hand):
+        return cyclic_payoff_table(len(members))
+
+    if game is RPS:
+        hand_objects.initialise()
+    return hand_objects.Dominance(game).table
+
+
+class MixedStrategy:
+    """
+    Plays each move with a fixed probability, ignoring the opponent, so
+    every round of a match can be played at once.
+    """
+    adaptive = False
+
+    def __init__(self, probabilities, name=None):
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.name = name or f'mixed{np.round(self.probabilities, 2).tolist()}'
+
+    def play(self, opponent_counts, payoff, rng):
+        return self.play_all(1, len(opponent_counts), payoff, rng)[0]
+
+    def play_all(self, n_rounds, n_matches, payoff, rng):
+        return rng.choice(len(self.probabilities), size=(n_rounds, n_matches), p=self.probabilities).astype(np.int8)
+
+
+class FrequencyCounter:
+    """
+    Plays the move which beats the opponent's most frequent move so far
+    (ties broken at random), so each round depends on the ones before.
+    """
+    adaptive = True
+
+    def __init__(self, name='frequency counter'):
+        self.name = name
+
+    def play(self, opponent_counts, payoff, rng):
+        # the move which beats each move; itself if nothing does
+        beats = payoff == 1
+        counter = np.where(beats.any(axis=0), beats.argmax(axis=0), np.arange(len(payoff)))
+
+        noise = rng.random_sample(opponent_counts.shape)
+        return counter[np.argmax(opponent_counts + noise, axis=1)].astype(np.int8)
+
+
+def play_match(strategy_a, strategy_b, payoff, n_rounds, n_matches, seed):
+    """
+    Plays `n_matches` independent matches of `n_rounds` rounds between
+    two strategies, with the matches batched into arrays: each round is
+    played in every match at once.
+
+    Returns the number of rounds won by `strategy_a`, by `strategy_b`,
+    and drawn. `seed` is an int or a `np.random.SeedSequence`.
+    """
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    rng = np.random.RandomState(seed.generate_state(1))
+    n_moves = len(payoff)
+
+    if not (strategy_a.adaptive or strategy_b.adaptive):
+        outcomes = play_games(strategy_a.play_all(n_rounds, n_matches, payoff, rng),
+                              strategy_b.play_all(n_rounds, n_matches, payoff, rng), payoff)
+    else:
+        # the moves each strategy has seen its opponent play
+        seen_by_a = np.zeros((n_matches, n_moves), dtype=np.int64)
+        seen_by_b = np.zeros((n_matches, n_moves), dtype=np.int64)
+        matches = np.arange(n_matches)
+
+        outcomes = np.empty((n_rounds, n_matches), dtype=np.int8)
+        for idx in range(n_rounds):
+            moves_a = strategy_a.play(seen_by_a, payoff, rng)
+            moves_b = strategy_b.play(seen_by_b, payoff, rng)
+            play_games(moves_a, moves_b, payoff, out=outcomes[idx])
+            seen_by_a[matches, moves_b] += 1
+            seen_by_b[matches, moves_a] += 1
+
+    draws, wins_a, wins_b = np.bincount(outcomes.ravel(), minlength=3)
+    return wins_a, wins_b, draws
+
+
+def round_robin(strategies, game=RPS, n_rounds=100, n_matches=10_000, batch_size=None,
+                max_workers=None, seed=0):
+    """
+    Plays every pair of `strategies` against each other in `n_matches`
+    matches of `n_rounds` rounds, on the moves of the enum `game`.
+
+    Each pairing's matches are split into batches of `batch_size`, and
+    the batches run on a process pool, each with its own random stream
+    spawned from `seed`, so the results don't depend on the number of
+    workers.
+
+    Returns a `TournamentResult`, in which `wins[i, j]` is the number
+    of rounds strategy i won against strategy j and `games[i, j]` the
+    number they played; see `win_rates`.
+    """
+    payoff = payoff_table(game)
+    batch_size = batch_size or n_matches
+    n = len(strategies)
+
+    tasks = [(a, b, start, min(batch_size, n_matches - start))
+             for a, b in combinations(range(n), 2) for start in range(0, n_matches, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    wins = np.zeros((n, n), dtype=np.int64)
+    games = np.zeros((n, n), dtype=np.int64)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(play_match, strategies[a], strategies[b], payoff, n_rounds, size, s)
+                   for (a, b, _, size), s in zip(tasks, seeds)]
+
+        for (a, b, _, size), future in zip(tasks, futures):
+            wins_a, wins_b, _ = future.result()
+            wins[a, b] += wins_a
+            wins[b, a] += wins_b
+            games[a, b] += n_rounds * size
+            games[b, a] += n_rounds * size
+
+    return TournamentResult([s.name for s in strategies], wins, games)
+
+
+def win_rates(result):
+    """
+    The fraction of rounds each strategy (row) won against each other
+    strategy (column); NaN on the diagonal.
+    """
+    with np.errstate(invalid='ignore'):
+        return result.wins / result.games
+
+
+if __name__ == '__main__':
+    import time
+
+    import pandas as pd
+
+    def strategies(n_moves):
+        return [
+            MixedStrategy(np.ones(n_moves) / n_moves, name='uniform'),
+            MixedStrategy([0.5] + [0.5 / (n_moves - 1)] * (n_moves - 1), name='mostly rock'),
+            MixedStrategy(np.eye(n_moves)[0], name='always rock'),
+            FrequencyCounter(),
+        ]
+
+    for workers in [1, None]:
+        start = time.perf_counter()
+        result = round_robin(strategies(len(RPS)), n_rounds=100, n_matches=100_000, batch_size=10_000,
+                             max_workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f'{result.games.sum() // 2 / elapsed / 1e6:.0f} million rounds per second '
+              f'with {workers or "all"} workers')
+
+    for game in [RPS, Move]:
+        result = round_robin(strategies(len(game)), game=game)
+        print(f'\n{game.__name__}:')
+        print(pd.DataFrame(win_rates(result), index=result.names, columns=result.names).round(3))
@@ -0,0 +1,95 @@
+import importlib
+from enum import Enum
+from unittest import TestCase
+
+import numpy as np
+
+objects = importlib.import_module('architecture.2018_03_maintainability_by_removing_if.three_hand_objects')
+RPS = objects.RPS
+
+
+class Lizard(objects.Hand):
+    __slots__ = ()
+
+
+class Spock(objects.Hand):
+    __slots__ = ()
+
+
+class RPSLS(Enum):
+    rock = objects.Rock()
+    paper = objects.Paper()
+    scissors = objects.Scissors()
+    lizard = Lizard()
+    spock = Spock()
+
+
+def initialise_rpsls():
+    RPSLS.rock.value.set_beats(RPSLS.scissors, RPSLS.lizard)
+    RPSLS.paper.value.set_beats(RPSLS.rock, RPSLS.spock)
+    RPSLS.scissors.value.set_beats(RPSLS.paper, RPSLS.lizard)
+    RPSLS.lizard.value.set_beats(RPSLS.paper, RPSLS.spock)
+    RPSLS.spock.value.set_beats(RPSLS.rock, RPSLS.scissors)
+
+
+class DominanceTestCase(TestCase):
+
+    def setUp(self):
+        objects.initialise()
+        self.dominance = objects.Dominance(RPS)
+
+    def test_table(self):
+        # rock, paper, paperclip, scissors
+        np.testing.assert_array_equal(self.dominance.table, [[0, 2, 0, 1],
+                                                             [1, 0, 2, 0],
+                                                             [0, 1, 0, 2],
+                                                             [2, 0, 1, 0]])
+
+    def test_resolve(self):
+        assert self.dominance.resolve(RPS.rock, RPS.scissors) == objects.FIRST_WINS
+        assert self.dominance.resolve(RPS.scissors, RPS.rock) == objects.SECOND_WINS
+        assert self.dominance.resolve(RPS.paper, RPS.paper) == objects.DRAW
+        # not directly connected
+        assert self.dominance.resolve(RPS.rock, RPS.paperclip) == objects.DRAW
+
+    def test_resolve_all(self):
+        p1 = [RPS.rock, RPS.paper, RPS.scissors, RPS.paperclip]
+        p2 = [RPS.scissors, RPS.scissors, RPS.scissors, RPS.rock]
+
+        outcomes = objects.resolve_all(self.dominance.table, self.dominance.positions(p1),
+                                       self.dominance.positions(p2))
+        expected = [self.dominance.resolve(a, b) for a, b in zip(p1, p2)]
+        np.testing.assert_array_equal(outcomes, expected)
+
+    def test_resolve_all_checks_positions(self):
+        table = self.dominance.table
+        with self.assertRaises(ValueError):
+            objects.resolve_all(table, np.zeros(3, dtype=np.int8), np.zeros(2, dtype=np.int8))
+        for p1 in ([0, 4], [-1, 0]):
+            with self.assertRaises(ValueError):
+                objects.resolve_all(table, np.array(p1, dtype=np.int8), np.zeros(2, dtype=np.int8))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            RPS.rock.value.colour = 'grey'
+
+    def test_partial_order(self):
+        initialise_rpsls()
+        dominance = objects.Dominance(RPSLS)
+
+        # every hand beats two others and loses to two
+        assert ((dominance.table == objects.FIRST_WINS).sum(axis=1) == 2).all()
+        assert ((dominance.table == objects.SECOND_WINS).sum(axis=1) == 2).all()
+        assert dominance.resolve(RPSLS.spock, RPSLS.scissors) == objects.FIRST_WINS
+        assert dominance.resolve(RPSLS.spock, RPSLS.lizard) == objects.SECOND_WINS
+
+    def test_inconsistent(self):
+        initialise_rpsls()
+        RPSLS.scissors.value.set_beats(RPSLS.paper, RPSLS.lizard, RPSLS.rock)
+        with self.assertRaises(ValueError):
+            objects.Dominance(RPSLS)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
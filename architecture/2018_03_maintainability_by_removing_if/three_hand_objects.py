@@ -1,29 +1,34 @@
 
 from enum import Enum
 
+import numpy as np
+from numba import njit
+
 
 class Hand:
+    __slots__ = ('_beats_hands',)
+
     def __init__(self):
-        self._beats_hand = None
+        self._beats_hands = ()
 
-    def set_beats(self, other):
-        self._beats_hand = other
+    def set_beats(self, *others):
+        self._beats_hands = others
 
 
 class Rock(Hand):
-    pass
+    __slots__ = ()
 
 
 class Paper(Hand):
-    pass
+    __slots__ = ()
 
 
 class Paperclip(Hand):
-    pass
+    __slots__ = ()
 
 
 class Scissors(Hand):
-    pass
+    __slots__ = ()
 
 
 class RPS(Enum):
@@ -34,7 +39,89 @@ class RPS(Enum):
 
 
 def initialise():
-    RPS.rock.set_beats(RPS.scissors)
-    RPS.paper.set_beats(RPS.rock)
-    RPS.paperclip.set_beats(RPS.paper)
-    RPS.scissors.set_beats(RPS.paperclip)
+    RPS.rock.value.set_beats(RPS.scissors)
+    RPS.paper.value.set_beats(RPS.rock)
+    RPS.paperclip.value.set_beats(RPS.paper)
+    RPS.scissors.value.set_beats(RPS.paperclip)
+
+
+# Outcomes in the dominance table
+DRAW, FIRST_WINS, SECOND_WINS = 0, 1, 2
+
+
+class Dominance:
+    """
+    The 'beats' graph of an enum of hands, compiled once into an N x N
+    int8 table: `table[i, j]` is FIRST_WINS if member i beats member j,
+    SECOND_WINS if j beats i, and DRAW if neither does (so any partial
+    order, eg. rock-paper-scissors-lizard-Spock, works too).
+
+    `resolve` is then one dict lookup per hand and an array index, and
+    the table can be passed to numba kernels such as `resolve_all`,
+    which work on member positions (`positions`) rather than members.
+    """
+    __slots__ = ('members', 'table', '_position')
+
+    def __init__(self, hands=RPS):
+        self.members = list(hands)
+        self._position = {member: idx for idx, member in enumerate(self.members)}
+
+        self.table = np.zeros((len(self.members), len(self.members)), dtype=np.int8)
+        for idx, member in enumerate(self.members):
+            for beaten in member.value._beats_hands:
+                other = self._position[beaten]
+                if self.table[idx, other] == SECOND_WINS:
+                    raise ValueError(f'{member} and {beaten} beat each other')
+                self.table[idx, other] = FIRST_WINS
+                self.table[other, idx] = SECOND_WINS
+
+    def resolve(self, p1_hand, p2_hand):
+        return self.table[self._position[p1_hand], self._position[p2_hand]]
+
+    def positions(self, hands):
+        return np.array([self._position[hand] for hand in hands], dtype=np.int8)
+
+
+@njit(nogil=True, cache=True)
+def resolve_all(table, p1_positions, p2_positions):
+    """
+    The outcome of each game between `p1_positions[i]` and
+    `p2_positions[i]`. Arrays of different lengths, or a position out
+    of range for the table, raise a ValueError.
+    """
+    if len(p1_positions) != len(p2_positions):
+        raise ValueError('p1_positions and p2_positions must have the same length')
+
+    n_hands = table.shape[0]
+    out = np.empty(len(p1_positions), dtype=np.int8)
+    for i in range(len(p1_positions)):
+        p1, p2 = p1_positions[i], p2_positions[i]
+        # numba doesn't check indices (and wraps negative ones)
+        if p1 < 0 or p1 >= n_hands or p2 < 0 or p2 >= n_hands:
+            raise ValueError('positions must be in range for the table')
+        out[i] = table[p1, p2]
+    return out
+
+
+if __name__ == '__main__':
+    import time
+
+    initialise()
+    dominance = Dominance(RPS)
+
+    n_games = 10 ** 6
+    rng = np.random.RandomState(0)
+    p1 = [dominance.members[idx] for idx in rng.randint(0, len(RPS), n_games)]
+    p2 = [dominance.members[idx] for idx in rng.randint(0, len(RPS), n_games)]
+
+    start = time.perf_counter()
+    outcomes = [dominance.resolve(a, b) for a, b in zip(p1, p2)]
+    print(f'resolve: {n_games / (time.perf_counter() - start) / 1e6:.1f} million games per second')
+
+    p1_positions, p2_positions = dominance.positions(p1), dominance.positions(p2)
+    resolve_all(dominance.table, p1_positions[:10], p2_positions[:10])  # force compile
+
+    start = time.perf_counter()
+    bulk_outcomes = resolve_all(dominance.table, p1_positions, p2_positions)
+    print(f'resolve_all: {n_games / (time.perf_counter() - start) / 1e6:.0f} million games per second')
+    assert (bulk_outcomes == outcomes).all()
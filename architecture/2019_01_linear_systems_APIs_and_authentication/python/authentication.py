@@ -0,0 +1,170 @@
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+
+from .service import json_response
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(secret, payload):
+    return hmac.new(secret, payload.encode('ascii'), hashlib.sha256).digest()
+
+
+def issue_token(secret, subject, ttl=3600, now=None):
+    """ A signed token for `subject`, valid for `ttl` seconds: the
+        base64 JSON claims, a dot, and the base64 HMAC-SHA256 of the
+        claims with `secret` (bytes).
+
+        Tokens are stateless, so the service only needs the secret to
+        check them, never a user database.
+    """
+    now = time.time() if now is None else now
+    claims = {'sub': subject, 'exp': int(now + ttl)}
+    payload = _encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f'{payload}.{_encode(_sign(secret, payload))}'
+
+
+def verify_token(secret, token, now=None):
+    """ The claims of a token from `issue_token`, or raises
+        `AuthenticationError` if it is malformed, its signature is wrong
+        or it has expired. Signatures are compared in constant time.
+    """
+    payload, _, signature = token.partition('.')
+    try:
+        valid = hmac.compare_digest(_sign(secret, payload), _decode(signature))
+    except ValueError:
+        valid = False
+    if not valid:
+        raise AuthenticationError('Invalid token')
+
+    claims = json.loads(_decode(payload))
+    if claims['exp'] <= (time.time() if now is None else now):
+        raise AuthenticationError('Token has expired')
+    return claims
+
+
+class TokenCache:
+    """ The claims of recently verified tokens, so each token's signature
+        is checked once rather than on every request.
+
+        Holds at most `max_entries`, dropping the least recently used,
+        and an entry is only trusted for `ttl` seconds, or until its
+        token expires if that's sooner.
+    """
+
+    def __init__(self, max_entries=4096, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token, now):
+        entry = self._entries.get(token)
+        if entry is None or entry[1] <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(token)
+        return entry[0]
+
+    def put(self, token, claims, now):
+        self._entries[token] = claims, min(now + self.ttl, claims['exp'])
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class TokenAuthentication:
+    """ Middleware for `LinearAlgebraService` which requires an
+        `Authorization: Bearer <token>` header with a token from
+        `issue_token`, and answers 401 otherwise.
+
+        Verified tokens are cached in a `TokenCache`, so a request with a
+        known token costs one dictionary lookup; nothing is ever read
+        from disk or the network.
+    """
+
+    def __init__(self, secret, cache_size=4096, cache_ttl=60.0, clock=time.time):
+        self.secret = secret
+        self.cache = TokenCache(cache_size, cache_ttl)
+        self.clock = clock
+
+    @staticmethod
+    def _unauthorised(message):
+        return json_response({'error': message}, 401, {'WWW-Authenticate': 'Bearer'})
+
+    def authenticate(self, headers):
+        """ The claims of the request's token, or raises
+            `AuthenticationError`.
+        """
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            raise AuthenticationError('Missing bearer token')
+
+        now = self.clock()
+        claims = self.cache.get(token, now)
+        if claims is None:
+            claims = verify_token(self.secret, token, now)
+            self.cache.put(token, claims, now)
+        return claims
+
+    async def __call__(self, request):
+        try:
+            self.authenticate(request.headers)
+        except AuthenticationError as e:
+            return self._unauthorised(str(e))
+        except (ValueError, KeyError, TypeError):
+            return self._unauthorised('Invalid token')
+        return None
+
+
+if __name__ == '__main__':
+    import asyncio
+    import timeit
+
+    from .service import Request
+
+    secret = b'benchmark secret'
+    token = issue_token(secret, 'user')
+    headers = {'authorization': f'Bearer {token}'}
+    request = Request('POST', '/solve', headers, b'')
+    n = 100_000
+
+    def per_call(statement):
+        return min(timeit.repeat(statement, number=n, repeat=5)) / n * 1e6
+
+    print(f'verify_token: {per_call(lambda: verify_token(secret, token)):.2f} us')
+
+    auth = TokenAuthentication(secret)
+    auth.authenticate(headers)
+    print(f'cached authenticate: {per_call(lambda: auth.authenticate(headers)):.2f} us')
+
+    # the whole middleware call, as the service awaits it
+    async def no_middleware(request):
+        return None
+
+    async def calls(middleware):
+        for _ in range(n):
+            await middleware(request)
+
+    for name, middleware in [('no-op middleware', no_middleware), ('TokenAuthentication', auth)]:
+        elapsed = min(timeit.repeat(lambda: asyncio.run(calls(middleware)), number=1, repeat=5))
+        print(f'{name}: {elapsed / n * 1e6:.2f} us per request')
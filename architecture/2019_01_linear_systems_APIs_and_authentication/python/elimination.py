@@ -0,0 +1,300 @@
+
+import numpy as np
+from numba import njit
+
+from .row_operations import interchange_rows, scale_row, add_multiple
+
+
+@njit(nogil=True, cache=True)
+def _pivot_row(a, k, n_rows):
+    """ The row at or below `k` with the largest magnitude in column `k`. """
+    p = k
+    for i in range(k + 1, n_rows):
+        if abs(a[i, k]) > abs(a[p, k]):
+            p = i
+    return p
+
+
+@njit(nogil=True, cache=True)
+def lu_factor_in_place(a, pivots):
+    """ In-place LU factorisation with partial pivoting of one matrix,
+        in LAPACK's `getrf` layout: the multipliers of the unit lower
+        triangle below the diagonal, U on and above it, and row k
+        interchanged with row `pivots[k]`.
+
+        Each step is a rank-1 update of the trailing block, applied as
+        one fused multiply-add row operation per row. Returns 0, or
+        k + 1 if the k'th pivot is zero.
+
+        The kernel of `lu_factor`, for other numba code to call.
+    """
+    n = a.shape[0]
+    for k in range(n):
+        p = _pivot_row(a, k, n)
+        pivots[k] = p
+        if a[p, k] == 0.0:
+            return k + 1
+        if p != k:
+            interchange_rows(a, k, p)
+
+        pivot = a[k, k]
+        for i in range(k + 1, n):
+            multiplier = a[i, k] / pivot
+            a[i, k] = multiplier
+            add_multiple(a, i, k, -multiplier, k + 1)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def lu_solve_in_place(lu, pivots, b):
+    """ Solves LU x = P b in place in `b`, a (n, m) array, from
+        `lu_factor_in_place`. The kernel of `lu_solve`, for other numba
+        code to call.
+    """
+    n = lu.shape[0]
+    for k in range(n):
+        if pivots[k] != k:
+            interchange_rows(b, k, pivots[k])
+
+    # forward substitution with the unit lower triangle
+    for k in range(n):
+        for i in range(k + 1, n):
+            add_multiple(b, i, k, -lu[i, k])
+
+    # back substitution with the upper triangle
+    for k in range(n - 1, -1, -1):
+        scale_row(b, k, 1.0 / lu[k, k])
+        for i in range(k):
+            add_multiple(b, i, k, -lu[i, k])
+
+
+@njit(nogil=True, cache=True)
+def _forward_eliminate(a, n):
+    """ Reduces the first `n` columns of the augmented matrix `a` to
+        upper triangular form with partial pivoting, applying every row
+        operation to the whole row. Returns 0, or k + 1 if the k'th
+        pivot is zero.
+    """
+    for k in range(n):
+        p = _pivot_row(a, k, n)
+        if a[p, k] == 0.0:
+            return k + 1
+        if p != k:
+            interchange_rows(a, k, p, k)
+
+        pivot = a[k, k]
+        for i in range(k + 1, n):
+            add_multiple(a, i, k, -a[i, k] / pivot, k)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _gaussian_elimination(a, n):
+    info = _forward_eliminate(a, n)
+    if info:
+        return info
+
+    for k in range(n - 1, -1, -1):
+        scale_row(a, k, 1.0 / a[k, k], n)
+        for i in range(k):
+            add_multiple(a, i, k, -a[i, k], n)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _gauss_jordan(a, n):
+    """ Reduces the augmented matrix `a` to reduced row echelon form,
+        eliminating each column above and below its pivot in one pass.
+    """
+    for k in range(n):
+        p = _pivot_row(a, k, n)
+        if a[p, k] == 0.0:
+            return k + 1
+        if p != k:
+            interchange_rows(a, k, p, k)
+
+        scale_row(a, k, 1.0 / a[k, k], k)
+        for i in range(n):
+            if i != k:
+                add_multiple(a, i, k, -a[i, k], k)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _lu_factor_batch(a, pivots, info):
+    for idx in range(a.shape[0]):
+        info[idx] = lu_factor_in_place(a[idx], pivots[idx])
+
+
+@njit(nogil=True, cache=True)
+def _lu_solve_batch(lu, pivots, b):
+    """ Solves each of `b` with its own factorisation, or all of them
+        with the one factorisation if there's only one.
+    """
+    for idx in range(b.shape[0]):
+        k = 0 if lu.shape[0] == 1 else idx
+        lu_solve_in_place(lu[k], pivots[k], b[idx])
+
+
+@njit(nogil=True, cache=True)
+def _gaussian_elimination_batch(a, n, info):
+    for idx in range(a.shape[0]):
+        info[idx] = _gaussian_elimination(a[idx], n)
+
+
+@njit(nogil=True, cache=True)
+def _gauss_jordan_batch(a, n, info):
+    for idx in range(a.shape[0]):
+        info[idx] = _gauss_jordan(a[idx], n)
+
+
+def _check_square(a):
+    a = np.asarray(a)
+    if a.ndim < 2 or a.shape[-1] != a.shape[-2]:
+        raise ValueError(f'Expected a square matrix or a stack of them, got shape {a.shape}')
+    return a
+
+
+def _check_info(info):
+    singular = np.flatnonzero(info)
+    if len(singular):
+        raise np.linalg.LinAlgError(f'Singular matrix (at index {singular[0]} of the batch)')
+
+
+def _right_hand_side(a, b):
+    """ `b` as a (batch, n, m) float64 copy, and whether it was a stack
+        of vectors rather than of matrices.
+    """
+    b = np.asarray(b)
+    vectors = b.shape == a.shape[:-1] or (a.ndim == 2 and b.ndim == 1)
+    b_matrices = b[..., None] if vectors else b
+    if b_matrices.shape[-2] != a.shape[-1]:
+        raise ValueError(f'Shapes {a.shape} and {b.shape} are not aligned')
+    return np.array(b_matrices.reshape((-1,) + b_matrices.shape[-2:]), dtype=np.float64), vectors, b_matrices.shape
+
+
+def lu_factor(a):
+    """ LU factorisation with partial pivoting of a square matrix, or
+        of every matrix in a (..., n, n) stack, as in
+        `scipy.linalg.lu_factor`: returns `(lu, pivots)` for
+        `lu_solve`, with pivots of shape (..., n).
+
+        Raises `np.linalg.LinAlgError` if any matrix is singular.
+    """
+    a = _check_square(a)
+    lu = np.array(a, dtype=np.float64).reshape((-1,) + a.shape[-2:])
+    pivots = np.empty(lu.shape[:-1], dtype=np.int64)
+    info = np.empty(len(lu), dtype=np.int64)
+
+    _lu_factor_batch(lu, pivots, info)
+    _check_info(info)
+    return lu.reshape(a.shape), pivots.reshape(a.shape[:-1])
+
+
+def lu_solve(lu_and_pivots, b):
+    """ Solves `A x = b` from the `lu_factor` of `A`.
+
+        With a stack of factorisations, `b` holds one vector (..., n)
+        or matrix (..., n, m) for each; a single factorisation can also
+        solve a stack of right-hand sides. Any other number of
+        right-hand sides raises a ValueError.
+    """
+    lu, pivots = lu_and_pivots
+    x, vectors, shape = _right_hand_side(lu, b)
+
+    lu_batch = lu.reshape((-1,) + lu.shape[-2:])
+    if len(lu_batch) not in (1, len(x)):
+        raise ValueError(f'Expected one right-hand side per factorisation, got {len(x)} for {len(lu_batch)}')
+
+    _lu_solve_batch(lu_batch, pivots.reshape(lu_batch.shape[:-1]), x)
+    x = x.reshape(shape)
+    return x[..., 0] if vectors else x
+
+
+def _solve_augmented(kernel, a, b):
+    a = _check_square(a)
+    b, vectors, shape = _right_hand_side(a, b)
+    n = a.shape[-1]
+
+    a = np.array(a, dtype=np.float64).reshape((-1, n, n))
+    if len(a) != len(b):
+        raise ValueError(f'Expected one right-hand side per matrix, got {len(b)} for {len(a)}')
+
+    augmented = np.concatenate([a, b], axis=-1)
+    info = np.empty(len(augmented), dtype=np.int64)
+    kernel(augmented, n, info)
+    _check_info(info)
+
+    x = augmented[..., n:].reshape(shape)
+    return x[..., 0] if vectors else x
+
+
+def gaussian_elimination(a, b):
+    """ Solves `A x = b` by Gaussian elimination with partial pivoting
+        of the augmented matrix [A | b], then back substitution.
+
+        `a` may be a (..., n, n) stack of matrices, solved with one
+        compiled loop over the stack, with `b` as in `lu_solve`.
+    """
+    return _solve_augmented(_gaussian_elimination_batch, a, b)
+
+
+def gauss_jordan(a, b):
+    """ Solves `A x = b` by Gauss-Jordan elimination with partial
+        pivoting: [A | b] is reduced to [I | x]. Passing the identity
+        as `b` gives the inverse.
+    """
+    return _solve_augmented(_gauss_jordan_batch, a, b)
+
+
+if __name__ == '__main__':
+    import time
+    import importlib
+
+    import scipy.linalg
+    from numba import njit as jit
+
+    lu_family = importlib.import_module('performance.2017_12_LU_decomposition.python.lu_smorgasbord')
+    doolittle = importlib.import_module('performance.2017_12_LU_decomposition.python.doolittle')
+
+    def best_of(fn, repeats=3):
+        fn()  # force compile
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def lu_family_solve(lu_fn):
+        """ Solve with an unpivoted `lu_*` function and triangular solves. """
+        def solve(a, b):
+            lower, upper = lu_fn(a)
+            y = scipy.linalg.solve_triangular(lower, b, lower=True, unit_diagonal=True)
+            return scipy.linalg.solve_triangular(upper, y)
+        return solve
+
+    rng = np.random.RandomState(0)
+
+    # diagonally dominant, so the unpivoted `lu_*` functions are stable
+    for n, batch in [(4, 100_000), (16, 20_000), (100, 200), (500, 1)]:
+        a = rng.random_sample((batch, n, n)) + n * np.eye(n)
+        b = rng.random_sample((batch, n))
+
+        # name: (function, number of systems it solves)
+        candidates = {
+            'gaussian_elimination': (lambda: gaussian_elimination(a, b), batch),
+            'gauss_jordan': (lambda: gauss_jordan(a, b), batch),
+            'lu_factor + lu_solve': (lambda: lu_solve(lu_factor(a), b), batch),
+            'numpy.linalg.solve': (lambda: np.linalg.solve(a, b[..., None]), batch),
+        }
+        # the `lu_*` family factorise one matrix per call
+        n_calls = min(batch, 1000)
+        for lu_fn in [jit(lu_family.lu_5), lu_family.lu_parallel, jit(doolittle.lu_decomp)]:
+            solve = lu_family_solve(lu_fn)
+            candidates[lu_fn.__name__] = (lambda solve=solve: [solve(a[idx], b[idx]) for idx in range(n_calls)],
+                                          n_calls)
+
+        print(f'\n{batch} systems of size {n}:')
+        for name, (fn, n_solved) in candidates.items():
+            print(f'{name:>24}: {n_solved / best_of(fn):12,.0f} systems per second')
@@ -0,0 +1,184 @@
+
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from .service import BINARY, parse_arrays
+
+
+class Client:
+    """ A minimal HTTP/1.1 client keeping one connection open, for
+        talking to a `LinearAlgebraService`.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, headers=None):
+        self.host = host
+        self.port = port
+        self.headers = headers or {}
+        self._reader = self._writer = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        return self
+
+    async def request(self, method, path, data=None, headers=None, binary=False):
+        """ Sends a request with `data` as JSON, and returns the status,
+            lower-cased headers and body; the body is decoded from JSON,
+            or with `binary=True` from an `array_response`.
+        """
+        if self._writer is None:
+            await self.connect()
+
+        body = b'' if data is None else json.dumps(data).encode()
+        headers = {'Host': f'{self.host}:{self.port}', 'Content-Length': len(body), **self.headers,
+                   **(headers or {})}
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        if binary:
+            headers['Accept'] = BINARY
+
+        head = f'{method} {path} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items())
+        self._writer.write(head.encode('latin-1') + b'\r\n' + body)
+        await self._writer.drain()
+
+        status_line, *lines = (await self._reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        response_headers = {}
+        for line in lines:
+            if line:
+                name, _, value = line.partition(':')
+                response_headers[name.strip().lower()] = value.strip()
+        body = await self._reader.readexactly(int(response_headers.get('content-length', 0)))
+
+        if response_headers.get('connection') == 'close':
+            await self.close()
+
+        status = int(status_line.split(' ')[1])
+        if response_headers.get('content-type') == BINARY:
+            return status, response_headers, parse_arrays(response_headers, body)
+        return status, response_headers, json.loads(body) if body else None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def run_load(make_request, port, n_clients=64, n_requests=10_000, host='127.0.0.1', headers=None):
+    """ Sends `n_requests` requests from `n_clients` concurrent
+        connections, each sending its next request as soon as the last
+        one is answered. `make_request(client, idx)` sends request `idx`.
+
+        Returns the latency of every request, in seconds, and the total
+        time taken.
+    """
+    latencies = np.empty(n_requests)
+    counter = iter(range(n_requests))
+
+    async def worker():
+        async with Client(host, port, headers) as client:
+            for idx in counter:
+                start = time.perf_counter()
+                status, _, body = await make_request(client, idx)
+                latencies[idx] = time.perf_counter() - start
+                if status != 200:
+                    raise RuntimeError(f'Request failed with {status}: {body}')
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(n_clients)])
+    return latencies, time.perf_counter() - start
+
+
+def summarise(latencies, elapsed):
+    return {
+        'requests/s': len(latencies) / elapsed,
+        'p50 (ms)': np.percentile(latencies, 50) * 1e3,
+        'p99 (ms)': np.percentile(latencies, 99) * 1e3,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Load test a local linear algebra service')
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    MODULE = 'architecture.2019_01_linear_systems_APIs_and_authentication.python.service'
+
+    from .authentication import issue_token
+
+    secret = 'load test secret'
+    auth_headers = {'Authorization': f'Bearer {issue_token(secret.encode(), "load-test")}'}
+
+    async def start_service(*options, headers=None):
+        """ Runs the service in its own process, so it doesn't share an
+            event loop with the load generator, returning the process and
+            its port.
+        """
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', MODULE, '--port', '0', *options, stdout=asyncio.subprocess.PIPE)
+        port = int((await process.stdout.readline()).decode().rsplit(':', 1)[1])
+
+        # the first requests compile the numba kernels
+        async with Client(port=port, headers=headers) as client:
+            await client.request('POST', '/solve', {'matrix': np.eye(4).tolist(), 'b': [1, 2, 3, 4]})
+        return process, port
+
+    matrices = rng.random_sample((args.requests, 4, 4)) + 4 * np.eye(4)
+    vectors = rng.random_sample((args.requests, 4))
+    large = rng.random_sample((500, 500)) + 500 * np.eye(500)
+
+    async def main():
+        runs = [
+            ('unbatched', ['--max-batch', '1'], None),
+            ('batched', [], None),
+            ('batched, authenticated', ['--secret', secret], auth_headers),
+        ]
+        for name, options, headers in runs:
+            process, port = await start_service(*options, headers=headers)
+            try:
+                def new_matrix(client, idx):
+                    return client.request('POST', '/solve', {'matrix': matrices[idx].tolist(),
+                                                             'b': vectors[idx].tolist()})
+
+                print(f'{name} solve, new 4x4 matrices:', summarise(*await run_load(
+                    new_matrix, port, args.clients, args.requests, headers=headers)))
+
+                async with Client(port=port, headers=headers) as client:
+                    _, response_headers, _ = await client.request('POST', '/lu', {'matrix': matrices[0].tolist()})
+                key = response_headers['x-key']
+
+                def cached(client, idx):
+                    return client.request('POST', '/solve', {'key': key, 'b': vectors[idx].tolist()})
+
+                print(f'{name} solve, cached factorisation:', summarise(*await run_load(
+                    cached, port, args.clients, args.requests, headers=headers)))
+            finally:
+                process.terminate()
+                await process.wait()
+
+        process, port = await start_service()
+        try:
+            for binary in [False, True]:
+                def large_lu(client, idx):
+                    return client.request('POST', '/lu', {'matrix': large.tolist()}, binary=binary)
+
+                print(f'500x500 lu, {"binary" if binary else "JSON"} response:', summarise(*await run_load(
+                    large_lu, port, 4, 40)))
+        finally:
+            process.terminate()
+            await process.wait()
+
+    asyncio.run(main())
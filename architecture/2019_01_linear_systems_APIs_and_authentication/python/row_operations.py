@@ -0,0 +1,92 @@
+
+import numpy as np
+from numba import njit
+
+# Elementary row operation codes
+INTERCHANGE = 0
+SCALE = 1
+ADD_MULTIPLE = 2
+
+# A row operation: `interchange` swaps rows `target` and `source`,
+# `scale` multiplies row `target` by `scalar`, and `add_multiple` adds
+# `scalar` times row `source` to row `target`
+ROW_OP = np.dtype([
+    ('op', np.int8),
+    ('target', np.int64),
+    ('source', np.int64),
+    ('scalar', np.float64),
+])
+
+
+@njit(nogil=True, cache=True)
+def interchange_rows(data, i, j, start=0):
+    """ Swaps rows `i` and `j` of `data` in place, from column `start`. """
+    for k in range(start, data.shape[1]):
+        data[i, k], data[j, k] = data[j, k], data[i, k]
+
+
+@njit(nogil=True, cache=True)
+def scale_row(data, i, scalar, start=0):
+    """ Multiplies row `i` of `data` by `scalar` in place, from column
+        `start`.
+    """
+    for k in range(start, data.shape[1]):
+        data[i, k] = data[i, k] * scalar
+
+
+@njit(nogil=True, cache=True)
+def add_multiple(data, target, source, scalar, start=0):
+    """ Adds `scalar` times row `source` to row `target` of `data` in
+        place, from column `start`: a fused multiply-add along the row.
+    """
+    for k in range(start, data.shape[1]):
+        data[target, k] = data[target, k] + scalar * data[source, k]
+
+
+@njit(nogil=True, cache=True)
+def _apply_row_ops(matrices, ops):
+    for data in matrices:
+        for op in ops:
+            if op.op == INTERCHANGE:
+                interchange_rows(data, op.target, op.source)
+            elif op.op == SCALE:
+                scale_row(data, op.target, op.scalar)
+            elif op.op == ADD_MULTIPLE:
+                add_multiple(data, op.target, op.source, op.scalar)
+            else:
+                raise ValueError('Unknown row operation')
+
+
+def apply_row_ops(data, ops):
+    """ Applies a sequence of `ROW_OP` records to `data` in place, in
+        one compiled loop, and returns it.
+
+        `data` is a (rows, columns) array, or a stack of them with shape
+        (..., rows, columns), each of which has all the `ops` applied.
+        Results are cast back to the dtype of `data`, so scaling an
+        integer row by 0.5 truncates.
+    """
+    ops = np.asarray(ops, dtype=ROW_OP)
+    if data.ndim < 2:
+        raise ValueError('data must have at least 2 dimensions')
+
+    matrices = data.reshape((-1,) + data.shape[-2:])
+    if not np.may_share_memory(matrices, data):
+        raise ValueError('data must be a view which can be reshaped without copying')
+
+    n_rows = data.shape[-2]
+    targets_and_sources = np.concatenate([ops['target'], ops['source'][ops['op'] != SCALE]])
+    if len(ops) and not ((0 <= targets_and_sources) & (targets_and_sources < n_rows)).all():
+        raise IndexError('row operation out of range')
+
+    _apply_row_ops(matrices, ops)
+    return data
+
+
+def row_ops(*ops):
+    """ A `ROW_OP` array from (op, target, source, scalar) tuples:
+
+        >>> apply_row_ops(data, row_ops((INTERCHANGE, 0, 1, 0),
+        ...                             (ADD_MULTIPLE, 0, 2, 5)))
+    """
+    return np.array([tuple(op) for op in ops], dtype=ROW_OP)
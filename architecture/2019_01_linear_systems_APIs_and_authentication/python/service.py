@@ -0,0 +1,444 @@
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict, defaultdict, namedtuple
+
+import numpy as np
+
+from .elimination import lu_factor, lu_solve
+from .row_operations import apply_row_ops, row_ops
+
+Request = namedtuple('Request', ['method', 'path', 'headers', 'body'])
+Response = namedtuple('Response', ['status', 'headers', 'body'])
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    422: 'Unprocessable Entity',
+    500: 'Internal Server Error',
+}
+
+BINARY = 'application/octet-stream'
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(data, status=200, headers=None):
+    return Response(status, {'Content-Type': 'application/json', **(headers or {})},
+                    json.dumps(data).encode())
+
+
+def error_response(status, message):
+    return json_response({'error': message}, status)
+
+
+def array_response(request, arrays, headers=None):
+    """ A response holding `arrays`, a dict of names to numpy arrays:
+        as JSON, or if the request accepts `application/octet-stream`,
+        as the raw bytes of the arrays one after the other, with their
+        names, dtypes and shapes in the `X-Arrays` header. Binary
+        bodies are memoryviews of the arrays, so aren't copied before
+        they are written to the socket.
+    """
+    headers = dict(headers or {})
+    if BINARY not in request.headers.get('accept', ''):
+        return json_response({name: array.tolist() for name, array in arrays.items()}, headers=headers)
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    headers['Content-Type'] = BINARY
+    headers['X-Arrays'] = ';'.join(f'{name}:{array.dtype.str}:{",".join(map(str, array.shape))}'
+                                   for name, array in arrays.items())
+    return Response(200, headers, [memoryview(array).cast('B') for array in arrays.values()])
+
+
+def parse_arrays(headers, body):
+    """ The arrays of a binary `array_response`, as a dict. """
+    arrays, offset = {}, 0
+    for spec in headers['x-arrays'].split(';'):
+        name, dtype, shape = spec.split(':')
+        shape = tuple(int(s) for s in shape.split(',') if s)
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(body, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += count * np.dtype(dtype).itemsize
+    return arrays
+
+
+def matrix_key(matrix):
+    """ A hash of a matrix's shape and values, identifying its cached
+        factorisation.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+    digest = hashlib.blake2b(str(matrix.shape).encode(), digest_size=16)
+    digest.update(memoryview(matrix).cast('B'))
+    return digest.hexdigest()
+
+
+class FactorisationCache:
+    """ A least-recently-used cache of `lu_factor` results by
+        `matrix_key`, holding at most `max_entries`.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        factorisation = self._entries.get(key)
+        if factorisation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return factorisation
+
+    def put(self, key, factorisation):
+        self._entries[key] = factorisation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class Batcher:
+    """ Coalesces concurrent requests into batches.
+
+        Items submitted to the same `group` (eg. matrices of the same
+        size) are collected until the event loop has no more work ready,
+        or for `max_delay` seconds if given, or until there are
+        `max_batch` of them. `process(items)` is then called once for
+        the whole batch on `executor` (the numba kernels release the
+        GIL) and must return one result per item, or an exception
+        instance for an item which failed.
+    """
+
+    def __init__(self, process, max_batch=256, max_delay=0.0, executor=None):
+        self.process = process
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.executor = executor
+        self.batch_sizes = []
+        self._pending = defaultdict(list)
+
+    def submit(self, group, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        pending = self._pending[group]
+        pending.append((item, future))
+        if len(pending) >= self.max_batch:
+            self._flush(group)
+        elif len(pending) == 1:
+            if self.max_delay:
+                loop.call_later(self.max_delay, self._flush, group)
+            else:
+                loop.call_soon(self._flush, group)
+        return future
+
+    def _flush(self, group):
+        batch = self._pending.pop(group, None)
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        self.batch_sizes.append(len(batch))
+        items = [item for item, _ in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, self.process, items)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def factorise_batch(matrices):
+    """ `lu_factor` of a list of same-sized matrices in one call, falling
+        back to one at a time to find which are singular.
+    """
+    try:
+        lu, pivots = lu_factor(np.stack(matrices))
+        # copies, so each cached factorisation doesn't keep the whole batch alive
+        return [(lu[i].copy(), pivots[i].copy()) for i in range(len(matrices))]
+    except np.linalg.LinAlgError:
+        results = []
+        for matrix in matrices:
+            try:
+                results.append(lu_factor(matrix))
+            except np.linalg.LinAlgError as e:
+                results.append(e)
+        return results
+
+
+def solve_batch(items):
+    """ `lu_solve` of a list of ((lu, pivots), b) with the same shapes. """
+    lu = np.stack([lu for (lu, _), _ in items])
+    pivots = np.stack([pivots for (_, pivots), _ in items])
+    x = lu_solve((lu, pivots), np.stack([b for _, b in items]))
+    return list(x)
+
+
+class LinearAlgebraService:
+    """ A local HTTP service for the elimination and row operation
+        functions, written directly on asyncio streams:
+
+        - `POST /lu` with `{"matrix": [[...]]}` returns the `lu` and
+          `pivots` of its factorisation, and its key in the `X-Key`
+          header
+        - `POST /solve` with `{"matrix": [[...]], "b": [...]}`, or with
+          the `key` of an earlier factorisation instead of the matrix,
+          returns `x` (and the `X-Key`)
+        - `POST /row-operations` with `{"matrix": [[...]], "operations":
+          [[op, target, source, scalar], ...]}` returns the `matrix`
+        - `GET /stats` returns the cache and batching statistics
+
+        Concurrent requests for matrices of the same size are factorised
+        and solved in batches, and factorisations are cached by a hash
+        of the matrix, so repeated solves with the same matrix only need
+        the triangular solves. Results are JSON, or raw bytes (see
+        `array_response`) when the request sends
+        `Accept: application/octet-stream`.
+
+        Each of `middleware` is an async function of a `Request` which
+        returns a `Response` to send instead of handling the request, or
+        None to carry on.
+    """
+
+    def __init__(self, cache_size=1024, max_batch=256, max_delay=0.0, middleware=(),
+                 max_body=1 << 26, chunk_size=1 << 16):
+        self.cache = FactorisationCache(cache_size)
+        self.factorise = Batcher(factorise_batch, max_batch, max_delay)
+        self.solver = Batcher(solve_batch, max_batch, max_delay)
+        self.middleware = list(middleware)
+        self._factorising = {}
+        self.max_body = max_body
+        self.chunk_size = chunk_size
+        self.routes = {
+            ('POST', '/lu'): self.lu,
+            ('POST', '/solve'): self.solve,
+            ('POST', '/row-operations'): self.row_operations,
+            ('GET', '/stats'): self.stats,
+        }
+        self.server = None
+
+    @staticmethod
+    def _json(request):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            raise HTTPError(400, 'Body must be JSON')
+        if not isinstance(data, dict):
+            raise HTTPError(400, 'Body must be a JSON object')
+        return data
+
+    @staticmethod
+    def _array(data, name, ndim):
+        if name not in data:
+            raise HTTPError(400, f'Missing {name!r}')
+        try:
+            array = np.array(data[name], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise HTTPError(400, f'{name!r} must be an array of numbers')
+        if array.ndim not in ndim:
+            raise HTTPError(400, f'{name!r} must have {" or ".join(map(str, ndim))} dimensions')
+        return array
+
+    async def _factorisation(self, data):
+        """ The cached or batched factorisation of the request's matrix
+            (or `key`), and its key.
+        """
+        if 'key' in data and 'matrix' not in data:
+            if not isinstance(data['key'], str):
+                raise HTTPError(400, "'key' must be a string")
+            factorisation = self.cache.get(data['key'])
+            if factorisation is None:
+                raise HTTPError(404, 'Unknown factorisation key')
+            return factorisation, data['key']
+
+        matrix = self._array(data, 'matrix', (2,))
+        if matrix.shape[0] != matrix.shape[1]:
+            raise HTTPError(400, "'matrix' must be square")
+
+        key = matrix_key(matrix)
+        factorisation = self.cache.get(key)
+        if factorisation is not None:
+            return factorisation, key
+
+        # concurrent requests for the same matrix share one factorisation
+        future = self._factorising.get(key)
+        if future is None:
+            future = self._factorising[key] = self.factorise.submit(matrix.shape, matrix)
+            future.add_done_callback(lambda _: self._factorising.pop(key, None))
+        factorisation = await asyncio.shield(future)
+        self.cache.put(key, factorisation)
+        return factorisation, key
+
+    async def lu(self, request):
+        (lu, pivots), key = await self._factorisation(self._json(request))
+        return array_response(request, {'lu': lu, 'pivots': pivots}, {'X-Key': key})
+
+    async def solve(self, request):
+        data = self._json(request)
+        factorisation, key = await self._factorisation(data)
+
+        b = self._array(data, 'b', (1, 2))
+        if b.shape[0] != factorisation[0].shape[0]:
+            raise HTTPError(400, "'b' must have a row for each row of the matrix")
+
+        x = await self.solver.submit((factorisation[0].shape, b.shape), (factorisation, b))
+        return array_response(request, {'x': x}, {'X-Key': key})
+
+    async def row_operations(self, request):
+        data = self._json(request)
+        matrix = self._array(data, 'matrix', (2,))
+        try:
+            ops = row_ops(*data.get('operations', []))
+            apply_row_ops(matrix, ops)
+        except (TypeError, ValueError, IndexError) as e:
+            raise HTTPError(400, f'Invalid operations: {e}')
+        return array_response(request, {'matrix': matrix})
+
+    async def stats(self, request):
+        sizes = self.factorise.batch_sizes + self.solver.batch_sizes
+        return json_response({
+            'cache': {'entries': len(self.cache), 'hits': self.cache.hits, 'misses': self.cache.misses},
+            'batches': len(sizes),
+            'mean_batch_size': float(np.mean(sizes)) if sizes else 0.0,
+        })
+
+    async def handle(self, request):
+        try:
+            for middleware in self.middleware:
+                response = await middleware(request)
+                if response is not None:
+                    return response
+
+            handler = self.routes.get((request.method, request.path))
+            if handler is None:
+                if any(path == request.path for _, path in self.routes):
+                    return error_response(405, f'{request.method} not allowed')
+                return error_response(404, f'No such resource {request.path}')
+            return await handler(request)
+
+        except HTTPError as e:
+            return error_response(e.status, str(e))
+        except np.linalg.LinAlgError as e:
+            return error_response(422, str(e))
+        except Exception as e:
+            return error_response(500, f'{type(e).__name__}: {e}')
+
+    async def _read_request(self, reader):
+        head = await reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = lines[0].split(' ', 2)
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > self.max_body:
+            raise HTTPError(413, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return Request(method, target.split('?', 1)[0], headers, body)
+
+    async def _write_response(self, writer, response, keep_alive):
+        body = response.body if isinstance(response.body, list) else [response.body]
+        length = sum(len(part) for part in body)
+        headers = {**response.headers, 'Content-Length': length,
+                   'Connection': 'keep-alive' if keep_alive else 'close'}
+
+        head = f'HTTP/1.1 {response.status} {REASONS[response.status]}\r\n'
+        head += ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+        writer.write(head.encode('latin-1') + b'\r\n')
+
+        # stream large bodies in chunks, so they're never copied whole
+        for part in body:
+            if len(part) <= self.chunk_size:
+                writer.write(part)
+                continue
+            for start in range(0, len(part), self.chunk_size):
+                writer.write(part[start:start + self.chunk_size])
+                await writer.drain()
+        await writer.drain()
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except HTTPError as e:
+                    await self._write_response(writer, error_response(e.status, str(e)), False)
+                    return
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self._write_response(writer, error_response(400, 'Malformed request'), False)
+                    return
+
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, await self.handle(request), keep_alive)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=0):
+        """ Starts listening, on a free port by default, returning the
+            port.
+        """
+        self.server = await asyncio.start_server(self._connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local linear algebra HTTP service')
+    parser.add_argument('--port', type=int, default=8000, help='0 to use any free port')
+    parser.add_argument('--max-batch', type=int, default=256, help='largest batch (1 disables batching)')
+    parser.add_argument('--max-delay', type=float, default=0.0, help='seconds to wait to fill a batch')
+    parser.add_argument('--secret', help='require bearer tokens signed with this secret')
+    args = parser.parse_args()
+
+    middleware = []
+    if args.secret:
+        from .authentication import TokenAuthentication
+        middleware.append(TokenAuthentication(args.secret.encode()))
+
+    async def main():
+        service = LinearAlgebraService(max_batch=args.max_batch, max_delay=args.max_delay, middleware=middleware)
+        port = await service.start(port=args.port)
+        print(f'Serving on http://127.0.0.1:{port}', flush=True)
+        await service.server.serve_forever()
+
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+
+import asyncio
+
+import pytest
+
+from .authentication import AuthenticationError, TokenAuthentication, TokenCache, issue_token, verify_token
+from .load_test import Client
+from .service import LinearAlgebraService, Request
+
+SECRET = b'secret'
+NOW = 1_000_000
+
+
+def headers(token):
+    return {'authorization': f'Bearer {token}'}
+
+
+def test_round_trip():
+    token = issue_token(SECRET, 'alice', ttl=60, now=NOW)
+    assert verify_token(SECRET, token, now=NOW) == {'sub': 'alice', 'exp': NOW + 60}
+
+
+@pytest.mark.parametrize('token', [
+    issue_token(b'other secret', 'alice', now=NOW),
+    issue_token(SECRET, 'alice', now=NOW)[:-2],
+    issue_token(SECRET, 'alice', now=NOW).replace('.', ''),
+    'not a token',
+    '',
+])
+def test_invalid(token):
+    with pytest.raises(AuthenticationError):
+        verify_token(SECRET, token, now=NOW)
+
+
+def test_tampered_claims():
+    token = issue_token(SECRET, 'alice', now=NOW)
+    other = issue_token(SECRET, 'mallory', now=NOW)
+    forged = other.split('.')[0] + '.' + token.split('.')[1]
+    with pytest.raises(AuthenticationError):
+        verify_token(SECRET, forged, now=NOW)
+
+
+def test_expired():
+    token = issue_token(SECRET, 'alice', ttl=60, now=NOW)
+    with pytest.raises(AuthenticationError, match='expired'):
+        verify_token(SECRET, token, now=NOW + 60)
+
+
+def test_cache_lru():
+    cache = TokenCache(max_entries=2, ttl=10)
+    for token in 'abc':
+        cache.put(token, {'exp': NOW + 100}, NOW)
+    assert len(cache) == 2
+    assert cache.get('a', NOW) is None
+    assert cache.get('c', NOW) == {'exp': NOW + 100}
+
+
+def test_cache_expiry():
+    cache = TokenCache(ttl=10)
+    cache.put('long', {'exp': NOW + 100}, NOW)
+    cache.put('short', {'exp': NOW + 5}, NOW)
+    assert cache.get('long', NOW + 9) is not None
+    assert cache.get('long', NOW + 10) is None
+    assert cache.get('short', NOW + 5) is None
+
+
+def test_verified_once():
+    clock = [NOW]
+    auth = TokenAuthentication(SECRET, cache_ttl=10, clock=lambda: clock[0])
+    token = issue_token(SECRET, 'alice', ttl=60, now=NOW)
+
+    for _ in range(3):
+        assert auth.authenticate(headers(token))['sub'] == 'alice'
+    assert (auth.cache.misses, auth.cache.hits) == (1, 2)
+
+    # the token expires while cached
+    clock[0] = NOW + 60
+    with pytest.raises(AuthenticationError):
+        auth.authenticate(headers(token))
+
+
+@pytest.mark.parametrize('request_headers', [
+    {},
+    {'authorization': 'Basic dXNlcjpwYXNz'},
+    {'authorization': 'Bearer'},
+    headers('bad.token'),
+    headers(issue_token(SECRET, 'alice', ttl=-1)),
+])
+def test_middleware_rejects(request_headers):
+    auth = TokenAuthentication(SECRET)
+    response = asyncio.run(auth(Request('GET', '/stats', request_headers, b'')))
+    assert response.status == 401
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+
+
+def test_service():
+    async def run():
+        service = LinearAlgebraService(middleware=[TokenAuthentication(SECRET)])
+        port = await service.start()
+        try:
+            async with Client(port=port) as client:
+                status, response_headers, _ = await client.request('GET', '/stats')
+                assert status == 401
+                assert response_headers['www-authenticate'] == 'Bearer'
+
+            async with Client(port=port, headers=headers(issue_token(SECRET, 'alice'))) as client:
+                status, _, body = await client.request('POST', '/solve', {'matrix': [[2, 0], [0, 4]], 'b': [2, 2]})
+                assert status == 200
+                assert body['x'] == [1.0, 0.5]
+        finally:
+            await service.close()
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
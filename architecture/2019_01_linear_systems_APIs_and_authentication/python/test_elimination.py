@@ -0,0 +1,106 @@
+
+import numpy as np
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+import pytest
+
+from .elimination import lu_factor, lu_solve, gaussian_elimination, gauss_jordan
+
+
+def lu_factor_solve(a, b):
+    return lu_solve(lu_factor(a), b)
+
+
+SOLVERS = [gaussian_elimination, gauss_jordan, lu_factor_solve]
+
+
+@pytest.fixture
+def systems():
+    rng = np.random.RandomState(0)
+    return rng.random_sample((20, 6, 6)), rng.random_sample((20, 6))
+
+
+@pytest.mark.parametrize('solve', SOLVERS, ids=lambda f: f.__name__)
+def test_solve_one(solve):
+    a = np.array([[2, -1, -2],
+                  [-4, 6, 3],
+                  [-4, -2, 8]])
+    b = np.array([1, 2, 3])
+    assert_array_almost_equal(solve(a, b), np.linalg.solve(a, b))
+
+
+@pytest.mark.parametrize('solve', SOLVERS, ids=lambda f: f.__name__)
+def test_solve_batch(solve, systems):
+    a, b = systems
+    x = solve(a, b)
+    assert x.shape == b.shape
+    assert_array_almost_equal(np.einsum('bij,bj->bi', a, x), b)
+
+    # several right-hand sides for each matrix
+    b = np.stack([b, 2 * b], axis=-1)
+    x = solve(a, b)
+    assert x.shape == b.shape
+    assert_array_almost_equal(a @ x, b)
+
+
+@pytest.mark.parametrize('solve', SOLVERS, ids=lambda f: f.__name__)
+def test_needs_pivoting(solve):
+    # a zero on the diagonal fails without row interchanges
+    a = np.array([[0., 1.],
+                  [1., 1.]])
+    assert_array_almost_equal(solve(a, [1., 2.]), [1., 1.])
+
+
+@pytest.mark.parametrize('solve', SOLVERS, ids=lambda f: f.__name__)
+def test_singular(solve, systems):
+    a, b = systems
+    a = a.copy()
+    # rank one, with rows that eliminate exactly to zero
+    a[3] = np.outer(2.0 ** np.arange(6), a[3, 0])
+    with pytest.raises(np.linalg.LinAlgError, match='index 3'):
+        solve(a, b)
+
+
+def test_lu_factor_matches_scipy():
+    scipy_linalg = pytest.importorskip('scipy.linalg')
+    a = np.random.RandomState(1).random_sample((8, 8))
+
+    lu, pivots = lu_factor(a)
+    expected_lu, expected_pivots = scipy_linalg.lu_factor(a)
+    assert_array_almost_equal(lu, expected_lu)
+    assert_array_equal(pivots, expected_pivots)
+
+
+def test_lu_solve_reuses_factorisation(systems):
+    a, b = systems
+    factorisation = lu_factor(a[0])
+    x = lu_solve(factorisation, b[:6].T)
+    assert_array_almost_equal(a[0] @ x, b[:6].T)
+
+    # one factorisation for a stack of right-hand sides
+    x = lu_solve(factorisation, b[..., None])
+    assert_array_almost_equal(a[0] @ x, b[..., None])
+
+
+def test_lu_solve_counts_must_match(systems):
+    a, b = systems
+    factorisation = lu_factor(a[:2])
+    with pytest.raises(ValueError, match='one right-hand side per factorisation'):
+        lu_solve(factorisation, b[:4, :, None])
+    with pytest.raises(ValueError, match='one right-hand side per factorisation'):
+        lu_solve(factorisation, b[:1, :, None])
+
+
+def test_gauss_jordan_inverse(systems):
+    a, _ = systems
+    assert_array_almost_equal(gauss_jordan(a, np.broadcast_to(np.eye(6), a.shape)), np.linalg.inv(a))
+
+
+def test_shapes():
+    with pytest.raises(ValueError):
+        lu_factor(np.ones((3, 4)))
+    with pytest.raises(ValueError):
+        gaussian_elimination(np.eye(3), np.ones(4))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,84 @@
+
+import numpy as np
+from numpy.testing import assert_array_equal
+import pytest
+
+from .row_operations import (
+    INTERCHANGE, SCALE, ADD_MULTIPLE,
+    interchange_rows, scale_row, add_multiple, apply_row_ops, row_ops,
+)
+
+
+@pytest.fixture
+def data():
+    return np.array([[1, 2, 3],
+                     [4, 5, 6],
+                     [7, 8, 9]], dtype=np.int16)
+
+
+def test_interchange_rows(data):
+    interchange_rows(data, 0, 1)
+    assert_array_equal(data, [[4, 5, 6],
+                              [1, 2, 3],
+                              [7, 8, 9]])
+
+
+def test_scale_row(data):
+    scale_row(data, 0, 5)
+    assert_array_equal(data, [[5, 10, 15],
+                              [4, 5, 6],
+                              [7, 8, 9]])
+
+
+def test_add_multiple(data):
+    add_multiple(data, 0, 2, 5)
+    assert_array_equal(data, [[36, 42, 48],
+                              [4, 5, 6],
+                              [7, 8, 9]])
+
+
+def test_start_column(data):
+    add_multiple(data, 1, 0, -4, 1)
+    assert_array_equal(data[1], [4, -3, -6])
+
+
+def test_apply_row_ops(data):
+    result = apply_row_ops(data, row_ops((INTERCHANGE, 0, 1, 0),
+                                         (SCALE, 0, 0, 5),
+                                         (ADD_MULTIPLE, 2, 1, -7)))
+    assert result is data
+    assert_array_equal(data, [[20, 25, 30],
+                              [1, 2, 3],
+                              [0, -6, -12]])
+
+
+def test_apply_row_ops_batch(data):
+    stack = np.stack([data, 2 * data, 3 * data])
+    apply_row_ops(stack, row_ops((ADD_MULTIPLE, 0, 2, 5)))
+
+    for idx, scale in enumerate([1, 2, 3]):
+        assert_array_equal(stack[idx, 0], scale * np.array([36, 42, 48]))
+
+
+def test_apply_row_ops_view(data):
+    # columns of a larger array, updated through the view
+    wide = np.zeros((3, 5))
+    wide[:, 1:4] = data
+    apply_row_ops(wide[:, 1:4], row_ops((INTERCHANGE, 0, 2, 0)))
+    assert_array_equal(wide[:, 1:4], data[::-1])
+    assert_array_equal(wide[:, [0, 4]], 0)
+
+
+def test_apply_row_ops_errors(data):
+    with pytest.raises(IndexError):
+        apply_row_ops(data, row_ops((INTERCHANGE, 0, 3, 0)))
+
+    with pytest.raises(ValueError):
+        apply_row_ops(data, row_ops((7, 0, 1, 0)))
+
+    with pytest.raises(ValueError):
+        apply_row_ops(data[0], row_ops((SCALE, 0, 0, 2)))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
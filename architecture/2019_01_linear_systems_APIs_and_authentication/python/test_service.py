@@ -0,0 +1,182 @@
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from .load_test import Client
+from .service import LinearAlgebraService, error_response, factorise_batch, matrix_key
+from .row_operations import INTERCHANGE, SCALE
+
+A = [[4.0, 1.0, 0.0], [1.0, 4.0, 1.0], [0.0, 1.0, 4.0]]
+B = [1.0, 2.0, 3.0]
+
+
+def with_service(test, **kwargs):
+    """ Runs `test(service, client)` against a service on a free port. """
+    async def run():
+        service = LinearAlgebraService(**kwargs)
+        port = await service.start()
+        try:
+            async with Client(port=port) as client:
+                return await test(service, client)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_lu():
+    async def test(service, client):
+        status, headers, body = await client.request('POST', '/lu', {'matrix': A})
+        assert status == 200
+        assert headers['x-key'] == matrix_key(np.array(A))
+
+        lu, pivots = np.array(body['lu']), body['pivots']
+        lower, upper = np.tril(lu, -1) + np.eye(3), np.triu(lu)
+        assert pivots == [0, 1, 2]
+        np.testing.assert_allclose(lower @ upper, A)
+    with_service(test)
+
+
+def test_solve():
+    async def test(service, client):
+        status, headers, body = await client.request('POST', '/solve', {'matrix': A, 'b': B})
+        assert status == 200
+        np.testing.assert_allclose(body['x'], np.linalg.solve(A, B))
+
+        # the factorisation is cached, so it can be solved by key
+        status, _, body = await client.request('POST', '/solve', {'key': headers['x-key'], 'b': [1, 0, 0]})
+        assert status == 200
+        np.testing.assert_allclose(body['x'], np.linalg.solve(A, [1, 0, 0]))
+        assert service.cache.hits == 1
+    with_service(test)
+
+
+def test_solve_unknown_key():
+    async def test(service, client):
+        status, _, body = await client.request('POST', '/solve', {'key': 'abc', 'b': B})
+        assert status == 404
+        assert 'key' in body['error']
+    with_service(test)
+
+
+def test_binary_response():
+    async def test(service, client):
+        status, headers, arrays = await client.request('POST', '/lu', {'matrix': A}, binary=True)
+        assert status == 200
+        assert headers['content-type'] == 'application/octet-stream'
+        assert arrays['lu'].shape == (3, 3)
+        assert arrays['pivots'].dtype == np.int64
+
+        _, _, body = await client.request('POST', '/lu', {'matrix': A})
+        np.testing.assert_array_equal(arrays['lu'], body['lu'])
+    with_service(test)
+
+
+def test_singular_matrix():
+    async def test(service, client):
+        status, _, body = await client.request('POST', '/solve', {'matrix': [[1, 2], [2, 4]], 'b': [1, 2]})
+        assert status == 422
+        assert 'Singular' in body['error']
+    with_service(test)
+
+
+@pytest.mark.parametrize('data', [
+    {'b': B},
+    {'matrix': [[1, 2, 3]], 'b': B},
+    {'matrix': [['a', 'b'], ['c', 'd']], 'b': [1, 2]},
+    {'matrix': A, 'b': [1, 2]},
+    {'key': [1], 'b': B},
+    123,
+])
+def test_bad_request(data):
+    async def test(service, client):
+        status, _, _ = await client.request('POST', '/solve', data)
+        assert status == 400
+    with_service(test)
+
+
+def test_not_found_and_not_allowed():
+    async def test(service, client):
+        status, _, _ = await client.request('GET', '/qr')
+        assert status == 404
+        status, _, body = await client.request('GET', '/solve')
+        assert status == 405
+        assert 'GET' in body['error']
+    with_service(test)
+
+
+def test_row_operations():
+    async def test(service, client):
+        data = {'matrix': [[1, 2, 3], [4, 5, 6], [7, 8, 9]],
+                'operations': [[INTERCHANGE, 0, 1, 0], [SCALE, 0, 0, 5]]}
+        status, _, body = await client.request('POST', '/row-operations', data)
+        assert status == 200
+        assert body['matrix'] == [[20, 25, 30], [1, 2, 3], [7, 8, 9]]
+
+        data['operations'] = [[INTERCHANGE, 0, 3, 0]]
+        status, _, _ = await client.request('POST', '/row-operations', data)
+        assert status == 400
+    with_service(test)
+
+
+def test_batching():
+    rng = np.random.RandomState(0)
+    matrices = rng.random_sample((20, 4, 4)) + 4 * np.eye(4)
+    vectors = rng.random_sample((20, 4))
+
+    async def test(service, client):
+        async def solve(idx):
+            async with Client(port=client.port) as other:
+                return await other.request('POST', '/solve', {'matrix': matrices[idx].tolist(),
+                                                              'b': vectors[idx].tolist()})
+
+        results = await asyncio.gather(*[solve(idx) for idx in range(20)])
+        for (status, _, body), a, b in zip(results, matrices, vectors):
+            assert status == 200
+            np.testing.assert_allclose(body['x'], np.linalg.solve(a, b))
+
+        assert sum(service.factorise.batch_sizes) == 20
+        assert max(service.factorise.batch_sizes) > 1
+
+        _, _, stats = await client.request('GET', '/stats')
+        assert stats['cache']['entries'] == 20
+        assert stats['mean_batch_size'] > 1
+    with_service(test)
+
+
+def test_middleware():
+    async def require_header(request):
+        if request.headers.get('x-token') != 'secret':
+            return error_response(401, 'Missing token')
+
+    async def test(service, client):
+        status, _, _ = await client.request('GET', '/stats')
+        assert status == 401
+        status, _, _ = await client.request('GET', '/stats', headers={'X-Token': 'secret'})
+        assert status == 200
+    with_service(test, middleware=[require_header])
+
+
+def test_internal_error():
+    async def fail(request):
+        raise RuntimeError('broken')
+
+    async def test(service, client):
+        status, _, body = await client.request('GET', '/stats')
+        assert status == 500
+        assert 'broken' in body['error']
+        # the connection is still usable
+        status, _, _ = await client.request('GET', '/qr')
+        assert status == 500
+    with_service(test, middleware=[fail])
+
+
+def test_factorise_batch_copies():
+    matrices = [np.eye(3) * (i + 1) for i in range(4)]
+    for lu, pivots in factorise_batch(matrices):
+        assert lu.base is None and pivots.base is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
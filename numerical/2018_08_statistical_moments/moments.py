@@ -1,8 +1,6 @@
 
 import numpy as np
 from numpy import sum as nsum, power, std
-from scipy import stats
-from pytest import approx
 
 
 def moment(data, order=1):
@@ -12,6 +10,9 @@ def moment(data, order=1):
 
 
 def test_moment():
+    from scipy import stats
+    from pytest import approx
+
     x = np.random.random(1000)
 
     moments = ['zeroth', 'mean', 'var', 'skew', 'kurt']
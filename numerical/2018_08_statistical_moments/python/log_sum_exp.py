@@ -2,7 +2,7 @@ import numpy as np
 from numba import njit
 
 
-@njit
+@njit(cache=True)
 def streaming_stable_log_sum_exp(data):
 
     # forgo checking dims / size etc etc
@@ -25,7 +25,7 @@ def streaming_stable_log_sum_exp(data):
     return np.log(sum_exp) + max_data
 
 
-@njit
+@njit(cache=True)
 def stable_log_sum_exp(data):
     max_data = np.max(data)
     return np.log(np.sum(np.exp(data - max_data))) + max_data
@@ -1,10 +1,10 @@
 
 import numpy as np
-import scipy.stats
 from numba import njit
 
 
 def naive_all_stats(data):
+    import scipy.stats
 
     # initialise output data structures
     covariances, variances, std, mean, correlations, skewness, kurtosis = initialise_outputs(data.values)
@@ -45,17 +45,17 @@ def streaming_all_stats(data):
     }
 
 
-@njit
+@njit(cache=True)
 def empty_vector(n_periods, n_assets):
     return np.empty((n_periods, n_assets))
 
 
-@njit
+@njit(cache=True)
 def empty_array(n_periods, n_assets):
     return np.empty((n_periods, n_assets, n_assets))
 
 
-@njit
+@njit(cache=True)
 def update_S(S, M2, delta, delta_n):
 
     # update diagonal terms
@@ -73,7 +73,7 @@ def update_S(S, M2, delta, delta_n):
             S[col_idx, row_idx] = S[row_idx, col_idx]
 
 
-@njit
+@njit(cache=True)
 def initialise_outputs(data):
     n_periods, n_assets = data.shape
 
@@ -91,7 +91,7 @@ def initialise_outputs(data):
     return covariances, variances, std, mean, correlations, skewness, kurtosis
 
 
-@njit
+@njit(cache=True)
 def streaming_all_stats_inner(data):
 
     # initialise output data structures
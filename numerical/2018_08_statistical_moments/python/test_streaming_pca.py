@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from .streaming import streaming_all_stats
+from .streaming_pca import streaming_pca
+
+
+def factor_returns(n_periods, n_assets, seed=0):
+    rng = np.random.RandomState(seed)
+    factors = rng.standard_normal((n_periods, 3)) * [5, 3, 2]
+    noise = rng.standard_normal((n_periods, n_assets))
+    return (factors @ rng.standard_normal((3, n_assets)) + noise) / 100
+
+
+def expanding_eigenvalues(data, k):
+    values = [np.linalg.eigvalsh(np.cov(data[:i + 1], rowvar=False))[::-1][:k] for i in range(1, len(data))]
+    return np.array(values)
+
+
+def test_full_rank_is_exact():
+    data = factor_returns(100, 6)
+    got = streaming_pca(data, 3, rank=6)
+
+    assert np.isnan(got['explained_variance'][0]).all()
+    expected = expanding_eigenvalues(data, 3)
+    np.testing.assert_allclose(got['explained_variance'][1:], expected, rtol=1e-9, atol=1e-14 * expected.max())
+
+    covariance = np.cov(data, rowvar=False)
+    np.testing.assert_allclose(got['explained_variance_ratio'][-1], expected[-1] / np.trace(covariance))
+
+
+def test_truncated():
+    data = factor_returns(400, 40)
+    got = streaming_pca(data, 3)
+    expected = expanding_eigenvalues(data, 3)
+
+    # once there are more periods than assets, the dropped variance is small
+    error = np.abs(got['explained_variance'][41:] - expected[40:]) / expected[40:, :1]
+    assert error.max() < 1e-3
+
+
+def test_components():
+    data = factor_returns(500, 20)
+    components = streaming_pca(data, 3)['components']
+    _, vectors = np.linalg.eigh(np.cov(data, rowvar=False))
+
+    np.testing.assert_allclose(components.T @ components, np.eye(3), atol=1e-10)
+    np.testing.assert_allclose(np.abs(components.T @ vectors[:, ::-1][:, :3]), np.eye(3), atol=1e-3)
+
+
+def test_dataframe():
+    data = factor_returns(50, 5)
+    got = streaming_pca(pd.DataFrame(data), 2)
+    np.testing.assert_allclose(got['explained_variance'], streaming_pca(data, 2)['explained_variance'])
+
+
+def test_constant():
+    got = streaming_pca(np.ones((10, 4)), 2)
+    assert (got['explained_variance'][1:] == 0).all()
+    assert np.isnan(got['explained_variance_ratio']).all()
+
+
+def test_nan():
+    data = factor_returns(30, 5)
+    data[20, 2] = np.nan
+    got = streaming_pca(data, 2)
+    before = streaming_pca(data[:20], 2)
+
+    np.testing.assert_array_equal(got['explained_variance'][:20], before['explained_variance'])
+    assert np.isnan(got['explained_variance'][20:]).all()
+    assert np.isnan(got['explained_variance_ratio'][20:]).all()
+    assert np.isnan(got['components']).all()
+
+    # as in streaming_all_stats, whose covariances with that asset are
+    # NaN from then on, so have no eigenvalues
+    covariances = streaming_all_stats(pd.DataFrame(data))['covariances']
+    assert np.isnan(covariances[20:, 2]).all() and not np.isnan(covariances[1:20]).any()
+
+
+def test_n_components():
+    with pytest.raises(ValueError):
+        streaming_pca(np.ones((10, 4)), 5)
+    with pytest.raises(ValueError):
+        streaming_pca(np.ones((10, 4)), 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
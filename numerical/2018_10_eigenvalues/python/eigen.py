@@ -0,0 +1,536 @@
+
+import numpy as np
+from numba import njit
+
+EPS = np.finfo(np.float64).eps
+
+# QR steps allowed per eigenvalue before giving up, as in LAPACK
+MAX_SWEEPS = 30
+
+
+@njit(nogil=True, cache=True)
+def _householder(x, v):
+    """ Writes the Householder vector reflecting `x` onto a multiple of
+        the first unit vector into `v`, and returns `(beta, alpha)` such
+        that (I - beta v v^T) x = alpha e_1. `beta` is 0 if `x` is
+        already a multiple of e_1. `v` may be `x`.
+    """
+    scale = 0.0
+    for i in range(len(x)):
+        v[i] = x[i]
+        scale = max(scale, abs(x[i]))
+    if scale == 0.0:
+        return 0.0, 0.0
+
+    # scaled, so the sum of squares can't overflow
+    sigma = 0.0
+    for i in range(1, len(x)):
+        sigma += (x[i] / scale) ** 2
+    if sigma == 0.0:
+        return 0.0, x[0]
+
+    x0 = x[0]
+    norm = scale * np.sqrt((x0 / scale) ** 2 + sigma)
+    alpha = -norm if x0 >= 0.0 else norm
+    v[0] = x0 - alpha
+    return 1.0 / (norm * (norm + abs(x0))), alpha
+
+
+@njit(nogil=True, cache=True)
+def _reflect_columns(q, v, beta, start):
+    """ q[:, start:] = q[:, start:] (I - beta v v^T) """
+    m = q.shape[1] - start
+    for i in range(q.shape[0]):
+        s = 0.0
+        for j in range(m):
+            s += q[i, start + j] * v[j]
+        s *= beta
+        for j in range(m):
+            q[i, start + j] -= s * v[j]
+
+
+@njit(nogil=True, cache=True)
+def _tridiagonalise(a, d, e, betas):
+    """ Reduces the symmetric matrix with lower triangle `a` to
+        tridiagonal form T = Q^T A Q with Householder reflections,
+        writing its diagonal to `d` and off-diagonal to `e`.
+
+        Each reflection is applied to the lower triangle of the trailing
+        block as one symmetric rank-2 update, and its vector is kept
+        below the subdiagonal of `a`, with its scale in `betas`, for
+        `_form_qt`.
+    """
+    n = a.shape[0]
+    w = np.empty(n)
+    for k in range(n - 2):
+        m = n - k - 1
+        v = a[k + 1:, k]
+        beta, alpha = _householder(v, v)
+        e[k] = alpha
+        betas[k] = beta
+        if beta == 0.0:
+            continue
+
+        # B - v w^T - w v^T, with w = p - (beta / 2) (p . v) v and p = beta B v
+        b = a[k + 1:, k + 1:]
+        w[:m] = 0.0
+        for i in range(m):
+            s = 0.0
+            for j in range(i):
+                s += b[i, j] * v[j]
+                w[j] += b[i, j] * v[i]
+            w[i] += s + b[i, i] * v[i]
+        pv = 0.0
+        for i in range(m):
+            w[i] *= beta
+            pv += w[i] * v[i]
+        for i in range(m):
+            w[i] -= 0.5 * beta * pv * v[i]
+        for i in range(m):
+            for j in range(i + 1):
+                b[i, j] -= v[i] * w[j] + w[i] * v[j]
+
+    for k in range(n):
+        d[k] = a[k, k]
+    if n > 1:
+        e[n - 2] = a[n - 1, n - 2]
+        betas[n - 2] = 0.0
+
+
+@njit(nogil=True, cache=True)
+def _form_qt(a, betas, qt):
+    """ Q^T from the reflections stored by `_tridiagonalise`, into `qt`.
+
+        Q^T = H_{n-3} ... H_0 is accumulated from the right starting
+        with the last reflection, so each only touches the trailing
+        block, one contiguous row at a time.
+    """
+    n = a.shape[0]
+    qt[:] = 0.0
+    for i in range(n):
+        qt[i, i] = 1.0
+    for k in range(n - 3, -1, -1):
+        if betas[k] != 0.0:
+            _reflect_columns(qt[k + 1:], a[k + 1:, k].copy(), betas[k], k + 1)
+
+
+@njit(nogil=True, cache=True)
+def _tridiagonal_qr_step(d, e, lo, hi, zt):
+    """ One implicit QR step with a Wilkinson shift on the unreduced
+        block `lo`..`hi` of the tridiagonal matrix (`d`, `e`): a Givens
+        rotation introduces a bulge, which is chased down the diagonal.
+        The rotations are accumulated into the rows of `zt`.
+    """
+    # the eigenvalue of the trailing 2x2 block nearest to d[hi]
+    delta = 0.5 * (d[hi - 1] - d[hi])
+    off = e[hi - 1]
+    mu = d[hi] - off * off / (delta + np.copysign(np.hypot(delta, off), delta))
+
+    x = d[lo] - mu
+    y = e[lo]
+    for k in range(lo, hi):
+        r = np.hypot(x, y)
+        if r == 0.0:
+            c, s = 1.0, 0.0
+        else:
+            c, s = x / r, y / r
+        if k > lo:
+            e[k - 1] = r
+
+        a, b, f = d[k], e[k], d[k + 1]
+        d[k] = c * c * a + 2.0 * c * s * b + s * s * f
+        d[k + 1] = s * s * a - 2.0 * c * s * b + c * c * f
+        e[k] = c * s * (f - a) + (c * c - s * s) * b
+
+        if k + 1 < hi:
+            x = e[k]
+            y = s * e[k + 1]  # the bulge
+            e[k + 1] *= c
+
+        for i in range(zt.shape[1]):
+            zk, zk1 = zt[k, i], zt[k + 1, i]
+            zt[k, i] = c * zk + s * zk1
+            zt[k + 1, i] = c * zk1 - s * zk
+
+
+@njit(nogil=True, cache=True)
+def _tridiagonal_qr(d, e, zt):
+    """ Diagonalises the symmetric tridiagonal matrix (`d`, `e`) in
+        place with shifted QR steps, deflating whenever an off-diagonal
+        becomes negligible. Returns 0, or 1 if it didn't converge.
+    """
+    n = len(d)
+    hi = n - 1
+    steps = 0
+    while hi > 0:
+        for i in range(hi):
+            if abs(e[i]) <= EPS * (abs(d[i]) + abs(d[i + 1])):
+                e[i] = 0.0
+        while hi > 0 and e[hi - 1] == 0.0:
+            hi -= 1
+        if hi == 0:
+            break
+
+        lo = hi - 1
+        while lo > 0 and e[lo - 1] != 0.0:
+            lo -= 1
+
+        if steps == MAX_SWEEPS * n:
+            return 1
+        steps += 1
+        _tridiagonal_qr_step(d, e, lo, hi, zt)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _eigh(a, w, vt, e, betas):
+    """ Eigenvalues of the symmetric matrix with lower triangle `a`, in
+        ascending order in `w`, and eigenvectors in the rows of `vt`
+        unless it has no rows. Returns 0, or 1 if QR didn't converge.
+    """
+    n = a.shape[0]
+    _tridiagonalise(a, w, e, betas)
+    if vt.shape[0]:
+        _form_qt(a, betas, vt)
+    if _tridiagonal_qr(w, e, vt):
+        return 1
+
+    # selection sort, so each eigenvector is moved at most once
+    for i in range(n - 1):
+        k = i
+        for j in range(i + 1, n):
+            if w[j] < w[k]:
+                k = j
+        if k != i:
+            w[i], w[k] = w[k], w[i]
+            for j in range(vt.shape[1]):
+                vt[i, j], vt[k, j] = vt[k, j], vt[i, j]
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _eigh_batch(a, w, vt, info):
+    n = a.shape[-1]
+    e = np.empty(max(n - 1, 0))
+    betas = np.empty(max(n - 1, 0))
+    for idx in range(a.shape[0]):
+        info[idx] = _eigh(a[idx], w[idx], vt[idx], e, betas)
+
+
+@njit(nogil=True, cache=True)
+def _hessenberg(a, q):
+    """ Reduces `a` in place to upper Hessenberg form H = Q^T A Q with
+        Householder reflections, accumulating Q into `q` (which may have
+        no rows, to skip it).
+    """
+    n = a.shape[0]
+    v = np.empty(n)
+    for k in range(n - 2):
+        m = n - k - 1
+        beta, alpha = _householder(a[k + 1:, k], v)
+        if beta == 0.0:
+            continue
+
+        # (I - beta v v^T) A[k + 1:, k:], then A[:, k + 1:] (I - beta v v^T)
+        for j in range(k, n):
+            s = 0.0
+            for i in range(m):
+                s += v[i] * a[k + 1 + i, j]
+            s *= beta
+            for i in range(m):
+                a[k + 1 + i, j] -= s * v[i]
+        _reflect_columns(a, v[:m], beta, k + 1)
+        _reflect_columns(q, v[:m], beta, k + 1)
+
+        a[k + 1, k] = alpha
+        a[k + 2:, k] = 0.0
+
+
+@njit(nogil=True, cache=True)
+def _reflect3(h, v, beta, rows_from, rows_to, cols_from, cols_to, k, m):
+    """ Applies (I - beta v v^T), for the `m` element `v`, to rows k..k+m
+        of h[:, cols_from:cols_to] from the left, then to columns k..k+m
+        of h[rows_from:rows_to] from the right.
+    """
+    for j in range(cols_from, cols_to):
+        s = 0.0
+        for i in range(m):
+            s += v[i] * h[k + i, j]
+        s *= beta
+        for i in range(m):
+            h[k + i, j] -= s * v[i]
+    for i in range(rows_from, rows_to):
+        s = 0.0
+        for j in range(m):
+            s += h[i, k + j] * v[j]
+        s *= beta
+        for j in range(m):
+            h[i, k + j] -= s * v[j]
+
+
+@njit(nogil=True, cache=True)
+def _francis_step(h, trace, det):
+    """ One implicit double-shift QR step on the unreduced Hessenberg
+        block `h`, with the pair of shifts whose sum is `trace` and
+        product is `det`, so complex conjugate shifts stay in real
+        arithmetic. The bulge is chased down with 3x3 reflections.
+    """
+    n = h.shape[0]
+    u = np.empty(3)
+    v = np.empty(3)
+    u[0] = h[0, 0] * h[0, 0] + h[0, 1] * h[1, 0] - trace * h[0, 0] + det
+    u[1] = h[1, 0] * (h[0, 0] + h[1, 1] - trace)
+    u[2] = h[1, 0] * h[2, 1]
+    for k in range(n - 2):
+        beta, _ = _householder(u, v)
+        if beta != 0.0:
+            _reflect3(h, v, beta, 0, min(k + 4, n), max(k - 1, 0), n, k, 3)
+        u[0] = h[k + 1, k]
+        u[1] = h[k + 2, k]
+        if k < n - 3:
+            u[2] = h[k + 3, k]
+
+    beta, _ = _householder(u[:2], v)
+    if beta != 0.0:
+        _reflect3(h, v, beta, 0, n, n - 3, n, n - 2, 2)
+
+
+@njit(nogil=True, cache=True)
+def _eig2(a, b, c, d):
+    """ The eigenvalues of [[a, b], [c, d]]. """
+    mean = 0.5 * (a + d)
+    disc = (0.5 * (a - d)) ** 2 + b * c
+    if disc < 0.0:
+        root = np.sqrt(-disc)
+        return complex(mean, root), complex(mean, -root)
+
+    # the larger root first, then the other from the determinant,
+    # avoiding cancellation
+    large = mean + np.copysign(np.sqrt(disc), mean)
+    small = (a * d - b * c) / large if large != 0.0 else mean - np.sqrt(disc)
+    return complex(large), complex(small)
+
+
+@njit(nogil=True, cache=True)
+def _hessenberg_qr(h, w):
+    """ The eigenvalues of the upper Hessenberg matrix `h`, into the
+        complex array `w`, by Francis double-shift QR steps on the
+        trailing unreduced block, deflating 1x1 and 2x2 blocks from the
+        bottom as their subdiagonals become negligible. Returns 0, or 1
+        if it didn't converge.
+    """
+    n = h.shape[0]
+    norm = 0.0
+    for i in range(n):
+        for j in range(max(i - 1, 0), n):
+            norm += abs(h[i, j])
+
+    hi = n - 1
+    steps = since_deflation = 0
+    while hi >= 0:
+        lo = hi
+        while lo > 0:
+            scale = abs(h[lo - 1, lo - 1]) + abs(h[lo, lo])
+            if abs(h[lo, lo - 1]) <= EPS * (scale if scale != 0.0 else norm):
+                h[lo, lo - 1] = 0.0
+                break
+            lo -= 1
+
+        if lo == hi:
+            w[hi] = h[hi, hi]
+            hi -= 1
+            since_deflation = 0
+        elif lo == hi - 1:
+            w[hi - 1], w[hi] = _eig2(h[lo, lo], h[lo, hi], h[hi, lo], h[hi, hi])
+            hi -= 2
+            since_deflation = 0
+        else:
+            if steps == MAX_SWEEPS * n:
+                return 1
+            steps += 1
+            since_deflation += 1
+
+            if since_deflation % 10 == 0:
+                # an exceptional shift, to break cycles
+                mu = h[hi, hi] + 0.75 * (abs(h[hi, hi - 1]) + abs(h[hi - 1, hi - 2]))
+                trace, det = 2.0 * mu, mu * mu
+            else:
+                trace = h[hi - 1, hi - 1] + h[hi, hi]
+                det = h[hi - 1, hi - 1] * h[hi, hi] - h[hi - 1, hi] * h[hi, hi - 1]
+            _francis_step(h[lo:hi + 1, lo:hi + 1], trace, det)
+    return 0
+
+
+@njit(nogil=True, cache=True)
+def _eigvals_batch(a, w, info):
+    no_q = np.empty((0, a.shape[-1]))
+    for idx in range(a.shape[0]):
+        _hessenberg(a[idx], no_q)
+        info[idx] = _hessenberg_qr(a[idx], w[idx])
+
+
+@njit(nogil=True, cache=True)
+def _tridiagonalise_batch(a, d, e, qt):
+    betas = np.empty(max(a.shape[-1] - 1, 0))
+    for idx in range(a.shape[0]):
+        _tridiagonalise(a[idx], d[idx], e[idx], betas)
+        _form_qt(a[idx], betas, qt[idx])
+
+
+@njit(nogil=True, cache=True)
+def _hessenberg_batch(a, q):
+    for idx in range(a.shape[0]):
+        q[idx][:] = 0.0
+        for i in range(a.shape[-1]):
+            q[idx, i, i] = 1.0
+        _hessenberg(a[idx], q[idx])
+
+
+def _check_square(a):
+    a = np.asarray(a)
+    if a.ndim < 2 or a.shape[-1] != a.shape[-2]:
+        raise ValueError(f'Expected a square matrix or a stack of them, got shape {a.shape}')
+    return a
+
+
+def _check_info(info):
+    failed = np.flatnonzero(info)
+    if len(failed):
+        raise np.linalg.LinAlgError(f'Eigenvalues did not converge (at index {failed[0]} of the batch)')
+
+
+def _copy_stack(a):
+    """ A float64 (batch, n, n) copy of `a`, which the kernels overwrite. """
+    # not reshape(-1, n, n), which is ambiguous when n is 0
+    return np.array(a, dtype=np.float64).reshape((int(np.prod(a.shape[:-2])),) + a.shape[-2:])
+
+
+def tridiagonalise(a):
+    """ Householder reduction of a symmetric matrix, or a stack of them,
+        to tridiagonal form: returns the diagonal `d`, off-diagonal `e`
+        and orthogonal `q`, with A = Q T Q^T. Only the lower triangle is
+        used.
+    """
+    a = _check_square(a)
+    work = _copy_stack(a)
+    n = a.shape[-1]
+    qt = np.empty_like(work)
+    d = np.empty(work.shape[:-1])
+    e = np.empty((len(work), max(n - 1, 0)))
+
+    _tridiagonalise_batch(work, d, e, qt)
+    q = np.swapaxes(qt, -1, -2).reshape(a.shape)
+    return d.reshape(a.shape[:-1]), e.reshape(a.shape[:-2] + e.shape[-1:]), q
+
+
+def hessenberg(a):
+    """ Householder reduction of a matrix, or a stack of them, to upper
+        Hessenberg form, as `scipy.linalg.hessenberg(a, calc_q=True)`:
+        returns `h` and orthogonal `q`, with A = Q H Q^T.
+    """
+    a = _check_square(a)
+    h = _copy_stack(a)
+    q = np.empty_like(h)
+
+    _hessenberg_batch(h, q)
+    return h.reshape(a.shape), q.reshape(a.shape)
+
+
+def eigh(a, vectors=True):
+    """ Eigenvalues, in ascending order, and eigenvectors of a real
+        symmetric matrix, or of every matrix in a (..., n, n) stack, as
+        `numpy.linalg.eigh`: only the lower triangle is used.
+
+        Each matrix is tridiagonalised with Householder reflections, then
+        diagonalised by implicit QR with Wilkinson shifts, all in one
+        compiled loop over the stack. Returns just the eigenvalues if
+        `vectors` is False, which skips accumulating the transformations.
+
+        The eigenvectors are computed as rows, so the rotations work on
+        contiguous memory, and returned as a transposed view.
+    """
+    a = _check_square(a)
+    work = _copy_stack(a)
+    w = np.empty(work.shape[:-1])
+    vt = np.empty_like(work) if vectors else np.empty((len(work), 0, 0))
+    info = np.empty(len(work), dtype=np.int64)
+
+    _eigh_batch(work, w, vt, info)
+    _check_info(info)
+
+    w = w.reshape(a.shape[:-1])
+    return (w, np.swapaxes(vt.reshape(a.shape), -1, -2)) if vectors else w
+
+
+def eigvalsh(a):
+    """ The eigenvalues of a real symmetric matrix, or a stack of them,
+        in ascending order. See `eigh`.
+    """
+    return eigh(a, vectors=False)
+
+
+def eigvals(a):
+    """ The eigenvalues of a general real matrix, or of every matrix in a
+        (..., n, n) stack, as `numpy.linalg.eigvals`: in no particular
+        order, with complex conjugate pairs adjacent, and complex unless
+        they are all real.
+
+        Each matrix is reduced to Hessenberg form, then to quasi-triangular
+        form by Francis double-shift QR.
+    """
+    a = _check_square(a)
+    work = _copy_stack(a)
+    w = np.empty(work.shape[:-1], dtype=np.complex128)
+    info = np.empty(len(work), dtype=np.int64)
+
+    _eigvals_batch(work, w, info)
+    _check_info(info)
+
+    w = w.reshape(a.shape[:-1])
+    return w.real.copy() if not w.imag.any() else w
+
+
+if __name__ == '__main__':
+    import time
+    import importlib
+
+    import pandas as pd
+
+    streaming = importlib.import_module('numerical.2018_08_statistical_moments.python.streaming')
+
+    def best_of(fn, repeats=3):
+        fn()  # force compile
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    rng = np.random.RandomState(0)
+
+    for n, batch in [(4, 100_000), (16, 10_000), (100, 100), (500, 1)]:
+        a = rng.standard_normal((batch, n, n))
+        symmetric = a + a.transpose(0, 2, 1)
+
+        # name: (function, number of matrices it decomposes)
+        n_calls = min(batch, 1000)
+        candidates = {
+            'eigh': (lambda: eigh(symmetric), batch),
+            'numpy.linalg.eigh': (lambda: np.linalg.eigh(symmetric), batch),
+            'numpy.linalg.eigh per matrix': (lambda: [np.linalg.eigh(m) for m in symmetric[:n_calls]], n_calls),
+            'eigvalsh': (lambda: eigvalsh(symmetric), batch),
+            'numpy.linalg.eigvalsh': (lambda: np.linalg.eigvalsh(symmetric), batch),
+            'eigvals': (lambda: eigvals(a), batch),
+            'numpy.linalg.eigvals': (lambda: np.linalg.eigvals(a), batch),
+        }
+        print(f'\n{batch} matrices of size {n}:')
+        for name, (fn, n_done) in candidates.items():
+            print(f'{name:>28}: {n_done / best_of(fn):12,.0f} matrices per second')
+
+    # the eigen-decomposition of every covariance matrix of a streaming window
+    returns = pd.DataFrame(rng.standard_normal((2_000, 10)) / 100)
+    covariances = streaming.streaming_all_stats(returns)['covariances'][1:]
+    print(f'\n{len(covariances)} streaming covariance matrices of 10 assets:')
+    for name, fn in [('eigh', eigh), ('numpy.linalg.eigh', np.linalg.eigh)]:
+        print(f'{name:>28}: {best_of(lambda: fn(covariances)) * 1e3:8.1f} ms')
@@ -0,0 +1,147 @@
+import numpy as np
+from numpy.testing import assert_allclose
+import pytest
+
+from .eigen import eigh, eigvalsh, eigvals, tridiagonalise, hessenberg
+
+
+def random_symmetric(n, seed=0):
+    a = np.random.RandomState(seed).standard_normal((n, n))
+    return a + a.T
+
+
+def assert_same_eigenvalues(got, expected):
+    """ Eigenvalues in any order, matching each to the nearest. """
+    assert len(got) == len(expected)
+    scale = max(1.0, np.abs(expected).max())
+    for value in got:
+        assert np.abs(expected - value).min() < 1e-10 * scale
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 8, 40])
+def test_eigh(n):
+    a = random_symmetric(n)
+    w, v = eigh(a)
+
+    assert_allclose(w, np.linalg.eigvalsh(a), atol=1e-12 * n)
+    assert_allclose(a @ v, v * w, atol=1e-12 * n)
+    assert_allclose(v.T @ v, np.eye(n), atol=1e-12 * n)
+    assert (np.diff(w) >= 0).all()
+
+
+def test_eigh_uses_lower_triangle():
+    a = random_symmetric(5)
+    assert_allclose(eigvalsh(np.tril(a) + 100 * np.triu(a, 1)), eigvalsh(a))
+
+
+@pytest.mark.parametrize('a', [
+    np.eye(4),
+    np.zeros((3, 3)),
+    np.diag([3.0, 1.0, 2.0]),
+    np.ones((4, 4)),
+    np.diag([2.0, 2.0, 2.0, 1.0]) + np.diag([1e-20, 0.0, 0.0], 1) + np.diag([1e-20, 0.0, 0.0], -1),
+], ids=['identity', 'zeros', 'diagonal', 'rank one', 'tiny off diagonal'])
+def test_eigh_degenerate(a):
+    w, v = eigh(a)
+    assert_allclose(w, np.linalg.eigvalsh(a), atol=1e-14)
+    assert_allclose(a @ v, v * w, atol=1e-14)
+    assert_allclose(v.T @ v, np.eye(len(a)), atol=1e-14)
+
+
+def test_eigh_stack():
+    a = np.stack([random_symmetric(6, seed) for seed in range(12)]).reshape(3, 4, 6, 6)
+    w, v = eigh(a)
+    assert w.shape == (3, 4, 6)
+    assert v.shape == (3, 4, 6, 6)
+    assert_allclose(w, np.linalg.eigvalsh(a), atol=1e-12)
+    assert_allclose(a @ v, v * w[..., None, :], atol=1e-12)
+    assert_allclose(eigvalsh(a), w)
+
+
+def test_eigh_covariances():
+    rng = np.random.RandomState(0)
+    returns = rng.standard_normal((200, 5)) / 100
+    covariances = np.stack([np.cov(returns[:i], rowvar=False) for i in range(10, 200, 10)])
+    assert_allclose(eigvalsh(covariances), np.linalg.eigvalsh(covariances), rtol=1e-10, atol=1e-18)
+
+
+def test_eigh_does_not_modify_input():
+    a = random_symmetric(5)
+    copy = a.copy()
+    eigh(a)
+    assert (a == copy).all()
+
+
+@pytest.mark.parametrize('shape', [(0, 0), (3, 0, 0), (0, 3, 3)])
+def test_empty(shape):
+    a = np.zeros(shape)
+    w, v = eigh(a)
+    expected_w, expected_v = np.linalg.eigh(a)
+    assert w.shape == expected_w.shape and v.shape == expected_v.shape
+    assert eigvalsh(a).shape == eigvals(a).shape == np.linalg.eigvals(a).shape
+    assert [x.shape for x in hessenberg(a)] == [shape, shape]
+    assert tridiagonalise(a)[2].shape == shape
+
+
+def test_not_square():
+    with pytest.raises(ValueError):
+        eigh(np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        eigvals(np.ones(3))
+
+
+def test_not_converged():
+    with pytest.raises(np.linalg.LinAlgError, match='index 1'):
+        eigh(np.stack([np.eye(3), np.full((3, 3), np.nan)]))
+    with pytest.raises(np.linalg.LinAlgError):
+        eigvals(np.full((4, 4), np.nan))
+
+
+def test_tridiagonalise():
+    a = random_symmetric(7)
+    d, e, q = tridiagonalise(a)
+    t = np.diag(d) + np.diag(e, 1) + np.diag(e, -1)
+    assert_allclose(q @ t @ q.T, a, atol=1e-12)
+    assert_allclose(q.T @ q, np.eye(7), atol=1e-12)
+
+
+def test_hessenberg():
+    a = np.random.RandomState(0).standard_normal((2, 7, 7))
+    h, q = hessenberg(a)
+    assert (np.tril(h, -2) == 0).all()
+    assert_allclose(q @ h @ q.transpose(0, 2, 1), a, atol=1e-12)
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 8, 40])
+def test_eigvals(n):
+    a = np.random.RandomState(n).standard_normal((n, n))
+    got = eigvals(a)
+    assert_same_eigenvalues(got, np.linalg.eigvals(a))
+    assert got.dtype == np.linalg.eigvals(a).dtype
+
+
+def test_eigvals_real():
+    a = np.triu(np.arange(1.0, 17.0).reshape(4, 4))
+    w = eigvals(a)
+    assert w.dtype == np.float64
+    assert_allclose(np.sort(w), [1, 6, 11, 16])
+
+
+def test_eigvals_permutation():
+    """ The cyclic shift has its eigenvalues on the unit circle, so
+        unshifted QR makes no progress on it.
+    """
+    a = np.roll(np.eye(6), 1, axis=0)
+    assert_same_eigenvalues(eigvals(a), np.exp(2j * np.pi * np.arange(6) / 6))
+
+
+def test_eigvals_stack():
+    a = np.random.RandomState(0).standard_normal((5, 6, 6))
+    w = eigvals(a)
+    assert w.shape == (5, 6)
+    for got, matrix in zip(w, a):
+        assert_same_eigenvalues(got, np.linalg.eigvals(matrix))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+import numpy as np
+from numpy.testing import assert_allclose
+import pytest
+
+from .top_k import block_power, lanczos, rolling_top_eigh
+
+METHODS = [block_power, lanczos]
+
+
+def random_covariance(n, days=300, seed=0):
+    rng = np.random.RandomState(seed)
+    returns = rng.standard_normal((days, n)) * np.linspace(3, 0.1, n)
+    return returns, np.cov(returns, rowvar=False)
+
+
+def assert_top_k(a, result, k):
+    expected = np.linalg.eigvalsh(a)[::-1][:k]
+    assert_allclose(result.values, expected, rtol=1e-8)
+    assert result.vectors.shape == (len(a), k)
+    assert_allclose(a @ result.vectors, result.vectors * result.values, atol=1e-6 * expected[0])
+    assert_allclose(result.vectors.T @ result.vectors, np.eye(k), atol=1e-8)
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('k', [1, 5, 12])
+def test_dense(method, k):
+    _, a = random_covariance(80)
+    assert_top_k(a, method(a, k), k)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_callable(method):
+    returns, a = random_covariance(80)
+    centred = returns - returns.mean(axis=0)
+    result = method(lambda x: centred.T @ (centred @ x) / (len(returns) - 1), 5, n=80)
+    assert_top_k(a, result, 5)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_warm_start(method):
+    _, a = random_covariance(100)
+    _, b = random_covariance(100, seed=1)
+    nearby = a + 1e-4 * b
+
+    cold = method(nearby, 8)
+    warm = method(nearby, 8, x0=method(a, 8).vectors)
+    assert_top_k(nearby, warm, 8)
+    assert warm.matvecs <= 0.8 * cold.matvecs
+
+    # the same matrix again
+    same = method(a, 8, x0=method(a, 8).vectors)
+    assert same.matvecs <= 0.5 * method(a, 8).matvecs
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_low_rank(method):
+    """ Lanczos finds an invariant subspace before it has k vectors. """
+    factors = np.random.RandomState(0).standard_normal((40, 3))
+    a = factors @ factors.T
+    result = method(a, 4)
+    assert_allclose(result.values[:3], np.linalg.eigvalsh(a)[::-1][:3])
+    assert abs(result.values[3]) < 1e-10
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        lanczos(lambda x: x, 3)
+    with pytest.raises(ValueError):
+        lanczos(np.eye(5), 5)
+    with pytest.raises(ValueError):
+        block_power(np.ones((3, 4)), 2)
+
+
+def test_not_converged():
+    _, a = random_covariance(50)
+    with pytest.raises(np.linalg.LinAlgError):
+        block_power(a, 5, block_size=5, max_iter=2)
+
+
+def test_rolling():
+    returns, _ = random_covariance(30)
+    covariances = np.stack([np.full((30, 30), np.nan)] + [np.cov(returns[:i], rowvar=False)
+                                                          for i in range(100, 300, 20)])
+    values, vectors, matvecs = rolling_top_eigh(covariances, 3)
+
+    assert np.isnan(values[0]).all()
+    assert matvecs[0] == 0
+    for a, w, v in zip(covariances[1:], values[1:], vectors[1:]):
+        assert_allclose(w, np.linalg.eigvalsh(a)[::-1][:3], rtol=1e-8)
+        assert_allclose(a @ v, v * w, atol=1e-6 * w[0])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
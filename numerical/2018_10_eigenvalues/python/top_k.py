@@ -0,0 +1,262 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .eigen import eigh
+
+# The k largest eigenvalues, in descending order, their eigenvectors as
+# columns, and how many times the matrix was applied to a vector
+TopEigen = namedtuple('TopEigen', ['values', 'vectors', 'matvecs'])
+
+
+def _operator(a, n, x0):
+    """ A function applying `a` (a matrix, or a callable applying it to
+        a vector or a block of column vectors), and the dimension.
+    """
+    if callable(a):
+        if n is None:
+            if x0 is None:
+                raise ValueError('n is needed when a is a callable and there is no x0')
+            n = len(x0)
+        return a, n
+
+    a = np.asarray(a)
+    if a.ndim != 2 or a.shape[0] != a.shape[1]:
+        raise ValueError(f'Expected a square matrix, got shape {a.shape}')
+    return a.__matmul__, a.shape[0]
+
+
+def _start_block(x0, n, size, rng):
+    """ `size` orthonormal columns, spanning the columns of `x0` (eg. the
+        previous period's eigenvectors) then random directions.
+    """
+    block = rng.standard_normal((n, size))
+    if x0 is not None:
+        x0 = np.asarray(x0, dtype=np.float64).reshape(n, -1)[:, :size]
+        block[:, :x0.shape[1]] = x0
+    return np.linalg.qr(block)[0]
+
+
+def _descending(values, vectors):
+    order = np.argsort(values)[::-1]
+    return values[order], vectors[:, order]
+
+
+def block_power(a, k, x0=None, n=None, block_size=None, tol=1e-8, max_iter=1000, seed=0):
+    """ The `k` largest eigenvalues and eigenvectors of the symmetric
+        matrix `a` by block power (subspace) iteration, as a `TopEigen`.
+
+        `a` is a matrix, or a callable applying it to an (n, b) block of
+        vectors, such as `lambda x: returns.T @ (returns @ x) / (t - 1)`
+        for a covariance matrix which is never formed. `x0` warm-starts
+        the iteration, eg. from the previous period's eigenvectors.
+
+        Each iteration multiplies a block of `block_size` vectors
+        (`k` plus some extra, which speed up convergence) by `a`, then
+        orthonormalises it, and finds the best approximations to the
+        eigenvectors in its span (Rayleigh-Ritz). It stops when every
+        residual |A x - lambda x| is below `tol` times the largest
+        eigenvalue.
+    """
+    apply, n = _operator(a, n, x0)
+    size = min(n, block_size or k + max(k // 2, 8))
+    if not 0 < k <= size:
+        raise ValueError(f'k must be between 1 and {size}, got {k}')
+
+    x = _start_block(x0, n, size, np.random.RandomState(seed))
+    ax = apply(x)
+    matvecs = size
+    for _ in range(max_iter):
+        h = x.T @ ax
+        values, vectors = _descending(*eigh(0.5 * (h + h.T)))
+        x, ax = x @ vectors, ax @ vectors
+
+        residuals = np.linalg.norm(ax[:, :k] - x[:, :k] * values[:k], axis=0)
+        if residuals.max() <= tol * abs(values[0]):
+            return TopEigen(values[:k], x[:, :k], matvecs)
+
+        x = np.linalg.qr(ax)[0]
+        ax = apply(x)
+        matvecs += size
+
+    raise np.linalg.LinAlgError(f'block_power did not converge in {max_iter} iterations')
+
+
+def lanczos(a, k, x0=None, n=None, n_basis=None, tol=1e-8, max_restarts=1000, seed=0):
+    """ The `k` largest eigenvalues and eigenvectors of the symmetric
+        matrix `a` by thick-restart Lanczos iteration, as a `TopEigen`.
+
+        `a` and `x0` are as in `block_power`; the Krylov space is started
+        from the sum of the columns of `x0`, so if they are close to an
+        invariant subspace it is found in about as many matrix-vector
+        products as there are columns, and the rest refine it. (Starting
+        from all the columns, as block Lanczos, costs that many products
+        per step, which is more than it saves unless `x0` is already
+        within `tol`: over twice as many for a 1e-4 change.)
+
+        Lanczos builds an orthonormal basis of up to `n_basis` vectors for
+        the Krylov space of the starting vector, in which `a` is
+        tridiagonal, checking the Ritz pairs as it goes, then restarts
+        from the best `k` or more of them (Wu & Simon, 2000), so memory
+        stays bounded. Every new vector is reorthogonalised against the
+        whole basis, which is what keeps it stable in floating point.
+    """
+    apply, n = _operator(a, n, x0)
+    m = min(n, n_basis or max(2 * k + 1, 20))
+    if not 0 < k < m:
+        raise ValueError(f'k must be between 1 and {m - 1}, got {k}')
+    keep = min(k + (m - k) // 2, m - 1)
+
+    rng = np.random.RandomState(seed)
+    start = rng.standard_normal(n) if x0 is None else np.asarray(x0, dtype=np.float64).reshape(n, -1).sum(axis=1)
+
+    basis = np.zeros((n, m + 1))
+    basis[:, 0] = start / np.linalg.norm(start)
+    t = np.zeros((m, m))
+    scale = 0.0
+    j0 = matvecs = 0
+    for _ in range(max_restarts):
+        for j in range(j0, m):
+            w = apply(basis[:, j])
+            matvecs += 1
+
+            # orthogonalise against the whole basis, twice
+            v = basis[:, :j + 1]
+            h = v.T @ w
+            w = w - v @ h
+            correction = v.T @ w
+            w -= v @ correction
+            h += correction
+
+            t[:j + 1, j] = h
+            t[j, :j] = h[:j]
+            beta = np.linalg.norm(w)
+            scale = max(scale, np.abs(h).max())
+
+            if beta <= np.finfo(np.float64).eps * scale:
+                # an invariant subspace, so carry on from a new direction
+                w = rng.standard_normal(n)
+                for _ in range(2):
+                    w -= v @ (v.T @ w)
+                w /= np.linalg.norm(w)
+                beta = 0.0
+            else:
+                w /= beta
+            basis[:, j + 1] = w
+            if j + 1 < m:
+                t[j + 1, j] = t[j, j + 1] = beta
+
+            # the Ritz pairs so far, and their residuals from the last
+            # row of the eigenvectors of t (zero, but not to be trusted,
+            # just after a new direction)
+            if (j + 1 > k and beta != 0.0) or j + 1 == m:
+                values, vectors = _descending(*eigh(t[:j + 1, :j + 1]))
+                residuals = np.abs(beta * vectors[-1, :k])
+                if residuals.max() <= tol * abs(values[0]):
+                    return TopEigen(values[:k], basis[:, :j + 1] @ vectors[:, :k], matvecs)
+
+        # restart from the best Ritz vectors, which are coupled to the
+        # next basis vector by the last row of the eigenvectors
+        basis[:, :keep] = basis[:, :m] @ vectors[:, :keep]
+        basis[:, keep] = basis[:, m]
+        t[:] = 0.0
+        t[np.arange(keep), np.arange(keep)] = values[:keep]
+        t[:keep, keep] = t[keep, :keep] = beta * vectors[-1, :keep]
+        j0 = keep
+
+    raise np.linalg.LinAlgError(f'lanczos did not converge in {max_restarts} restarts')
+
+
+def rolling_top_eigh(covariances, k, method=lanczos, **kwargs):
+    """ The top `k` eigenpairs of each of a series of matrices, such as
+        the `covariances` from `streaming_all_stats`, warm-starting each
+        from the eigenvectors of the one before. Matrices with any NaNs
+        (such as the first covariance) give NaNs.
+
+        Returns the eigenvalues (periods, k), eigenvectors (periods, n, k)
+        and the number of matrix-vector products for each period.
+    """
+    covariances = np.asarray(covariances)
+    n_periods, n = covariances.shape[:2]
+    values = np.full((n_periods, k), np.nan)
+    vectors = np.full((n_periods, n, k), np.nan)
+    matvecs = np.zeros(n_periods, dtype=np.int64)
+
+    x0 = None
+    for i, covariance in enumerate(covariances):
+        if np.isnan(covariance).any():
+            continue
+        values[i], vectors[i], matvecs[i] = method(covariance, k, x0=x0, **kwargs)
+        x0 = vectors[i]
+    return values, vectors, matvecs
+
+
+if __name__ == '__main__':
+    import time
+    import argparse
+    import importlib
+
+    import pandas as pd
+
+    streaming = importlib.import_module('numerical.2018_08_statistical_moments.python.streaming')
+
+    parser = argparse.ArgumentParser(description='Benchmark top-k eigensolvers')
+    parser.add_argument('--assets', type=int, default=2_000)
+    parser.add_argument('--days', type=int, default=1_000)
+    parser.add_argument('-k', type=int, default=20)
+    args = parser.parse_args()
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - start
+
+    # returns driven by 30 factors, plus idiosyncratic noise
+    rng = np.random.RandomState(0)
+    n_factors = 30
+    loadings = rng.standard_normal((n_factors, args.assets))
+    factors = rng.standard_normal((args.days + 1, n_factors)) * np.linspace(3, 0.5, n_factors)
+    returns = (factors @ loadings + rng.standard_normal((args.days + 1, args.assets))) / 100
+
+    def covariance(window):
+        centred = window - window.mean(axis=0)
+        return centred, centred.T @ centred / (len(window) - 1)
+
+    centred, today = covariance(returns[:-1])
+    _, tomorrow = covariance(returns[1:])
+    eigh(np.eye(4))  # force compile
+
+    print(f'top {args.k} of a {args.assets}x{args.assets} covariance matrix:')
+    (values, vectors), elapsed = timed(lambda: np.linalg.eigh(today))
+    expected = values[::-1][:args.k]
+    print(f'{"numpy.linalg.eigh":>30}: {elapsed:7.2f}s')
+
+    candidates = {
+        'block_power': lambda: block_power(today, args.k),
+        'lanczos': lambda: lanczos(today, args.k),
+        'lanczos, covariance callable': lambda: lanczos(
+            lambda x: centred.T @ (centred @ x) / (args.days - 1), args.k, n=args.assets),
+    }
+    for name, fn in candidates.items():
+        result, elapsed = timed(fn)
+        error = np.abs(result.values - expected).max() / expected[0]
+        print(f'{name:>30}: {elapsed:7.2f}s, {result.matvecs:5} matvecs, relative error {error:.1e}')
+
+    # the next day's covariance, warm-started from today's eigenvectors
+    print('\nthe next day, warm-started from the previous eigenvectors:')
+    previous = lanczos(today, args.k).vectors
+    for name, method in [('block_power', block_power), ('lanczos', lanczos)]:
+        for label, x0 in [('cold', None), ('warm', previous)]:
+            result, elapsed = timed(lambda: method(tomorrow, args.k, x0=x0))
+            print(f'{name + ", " + label:>30}: {elapsed:7.2f}s, {result.matvecs:5} matvecs')
+
+    # every window of a streaming covariance calculation
+    data = pd.DataFrame(returns[:500, :50])
+    covariances = streaming.streaming_all_stats(data)['covariances'][60:]
+    print(f'\ntop 5 of {len(covariances)} streaming covariance matrices of 50 assets:')
+    for label, x0 in [('cold', False), ('warm', True)]:
+        if x0:
+            (_, _, matvecs), elapsed = timed(lambda: rolling_top_eigh(covariances, 5))
+        else:
+            matvecs, elapsed = timed(lambda: [lanczos(c, 5).matvecs for c in covariances])
+        print(f'{"lanczos, " + label:>30}: {elapsed:7.2f}s, {np.mean(matvecs):5.1f} matvecs per matrix')
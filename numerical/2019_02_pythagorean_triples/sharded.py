@@ -0,0 +1,181 @@
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from math import isqrt
+
+import numpy as np
+
+from .triples import euclid_triples
+
+
+Shard = namedtuple('Shard', ['path', 'm_start', 'm_stop', 'count', 'dtype'])
+
+
+def shard_dtype(up_to):
+    """ The smallest integer type which holds every `c <= up_to`. """
+    return np.int32 if up_to <= np.iinfo(np.int32).max else np.int64
+
+
+def plan_shards(up_to, n_shards, primitive=True):
+    """ Splits the `m` axis of Euclid's formula, [2, sqrt(up_to)], into
+        at most `n_shards` contiguous ranges with roughly equal amounts
+        of output.
+
+        Each `m` generates triples from about `n_max = min(m - 1,
+        sqrt(up_to - m^2))` candidate pairs. When multiples are included
+        each pair also contributes `up_to / (m^2 + n^2)` of them, which
+        summed over `n` is about `up_to / m * atan(n_max / m)`, so the
+        small `m` are much heavier.
+
+        Returns a list of (m_start, m_stop) tuples.
+    """
+    m_max = isqrt(max(up_to - 1, 0))
+    if m_max < 2:
+        return []
+
+    m = np.arange(2, m_max + 1)
+    n_max = np.minimum(m - 1, np.sqrt(up_to - m * m).astype(np.int64))
+    weight = n_max.astype(np.float64)
+    if not primitive:
+        weight += up_to / m * np.arctan(n_max / m)
+    total = np.cumsum(weight)
+
+    targets = total[-1] * np.arange(1, n_shards) / n_shards
+    cuts = np.unique(np.searchsorted(total, targets, side='right') + 2)
+    bounds = [2] + [int(c) for c in cuts if 2 < c <= m_max] + [m_max + 1]
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def sort_order(triples):
+    """ The permutation which sorts triples by (c, a); `b` is fixed by
+        `a` and `c`. Packs both into a single int64 key when `c` fits in
+        32 bits, which sorts far faster than `np.lexsort`.
+    """
+    a = triples[:, 0].astype(np.int64)
+    c = triples[:, 2].astype(np.int64)
+    if not len(c) or c.max() < 2 ** 31:
+        return np.argsort(c << 32 | a)
+    return np.lexsort((a, c))
+
+
+def run_shard(path, m_start, m_stop, up_to, primitive=True, chunk_size=1 << 20):
+    """ Finds every triple from the `m` in [m_start, m_stop) and writes
+        them to `path` as a flat (count, 3) array sorted by (c, a).
+
+        The unsorted chunks are streamed to disk first and then sorted
+        through a memory map, so each shard only needs to fit in
+        memory once.
+    """
+    dtype = shard_dtype(up_to)
+
+    with open(path, 'wb') as f:
+        for chunk in euclid_triples(up_to, primitive, chunk_size, m_start=m_start, m_stop=m_stop):
+            f.write(chunk.astype(dtype).tobytes())
+
+    count = os.path.getsize(path) // (3 * np.dtype(dtype).itemsize)
+    if count:
+        triples = np.memmap(path, dtype=dtype, mode='r+', shape=(count, 3))
+        triples[:] = triples[sort_order(triples)]
+        triples.flush()
+        del triples
+
+    return Shard(path, m_start, m_stop, count, dtype)
+
+
+def sharded_triples(up_to, directory, primitive=True, n_shards=None, max_workers=None, chunk_size=1 << 20):
+    """ Runs the shards of the Euclid search for every triple with
+        `c <= up_to` on a process pool, each writing its results to a
+        file in `directory`.
+
+        Returns the list of completed `Shard`s, ready for `merge_shards`.
+    """
+    n_shards = n_shards or 4 * (max_workers or os.cpu_count())
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(run_shard, os.path.join(directory, f'shard_{idx:04d}.bin'),
+                        m_start, m_stop, up_to, primitive, chunk_size)
+            for idx, (m_start, m_stop) in enumerate(plan_shards(up_to, n_shards, primitive))
+        ]
+        return [f.result() for f in futures]
+
+
+def open_shard(shard):
+    return np.memmap(shard.path, dtype=shard.dtype, mode='r', shape=(shard.count, 3))
+
+
+def merge_shards(shards, block_size=1 << 16):
+    """ k-way merge of sorted shards into a single stream of (k, 3)
+        arrays sorted by (c, a), with duplicates removed.
+
+        Each round reads the next `block_size` rows from the shards
+        which are furthest behind. Any buffered row whose `c` is below
+        the last `c` read from every unfinished shard cannot be
+        preceded by a later row, so is sorted and emitted; the rest wait
+        for the next round. Only about `len(shards) * block_size` rows
+        are ever held in memory.
+    """
+    arrays = [open_shard(s) for s in shards if s.count]
+    positions = [0] * len(arrays)
+    heads = [None] * len(arrays)  # the last `c` read from each shard
+    pending = np.empty((0, 3), dtype=arrays[0].dtype if arrays else np.int64)
+    last = None
+
+    while True:
+        unfinished = [idx for idx, arr in enumerate(arrays) if positions[idx] < len(arr)]
+        low = min((heads[idx] for idx in unfinished if heads[idx] is not None), default=None)
+
+        blocks = [pending]
+        for idx in unfinished:
+            if heads[idx] is None or heads[idx] <= low:
+                start = positions[idx]
+                block = np.array(arrays[idx][start:start + block_size])
+                positions[idx] = start + len(block)
+                heads[idx] = block[-1, 2]
+                blocks.append(block)
+
+        pending = np.concatenate(blocks)
+        if not len(pending):
+            return
+
+        bound = min((heads[idx] for idx, arr in enumerate(arrays) if positions[idx] < len(arr)), default=None)
+        ready = pending[:, 2] < bound if bound is not None else np.ones(len(pending), dtype=bool)
+        out = pending[ready]
+        pending = pending[~ready]
+
+        if not len(out):
+            continue
+
+        out = out[sort_order(out)]
+
+        unique = np.ones(len(out), dtype=bool)
+        unique[1:] = np.any(out[1:] != out[:-1], axis=1)
+        if last is not None:
+            unique[0] = np.any(out[0] != last)
+        out = out[unique]
+
+        if len(out):
+            last = out[-1]
+            yield out
+
+
+def sorted_triples(up_to, primitive=True, n_shards=None, max_workers=None, block_size=1 << 16):
+    """ Every triple with `c <= up_to`, sorted by (c, a), as a stream
+        of arrays. The search runs in parallel into temporary files,
+        which are removed when the stream is exhausted or closed.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        shards = sharded_triples(up_to, directory, primitive, n_shards, max_workers)
+        yield from merge_shards(shards, block_size)
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    count = 0
+    for block in sorted_triples(10 ** 7, primitive=False):
+        count += len(block)
+    print(f'{count:,} triples in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,58 @@
+import importlib
+from math import isqrt
+
+import numpy as np
+from pytest import mark
+
+pythagorean = importlib.import_module('numerical.2019_02_pythagorean_triples.triples')
+sharded = importlib.import_module('numerical.2019_02_pythagorean_triples.sharded')
+
+
+@mark.parametrize('primitive', [True, False])
+@mark.parametrize('n_shards', [1, 3, 16])
+def test_plan_shards_covers_m_range(n_shards, primitive):
+    up_to = 100_000
+    plan = sharded.plan_shards(up_to, n_shards, primitive)
+
+    assert 1 <= len(plan) <= n_shards
+    assert plan[0][0] == 2
+    assert plan[-1][1] == isqrt(up_to - 1) + 1
+    for (_, stop), (start, _) in zip(plan[:-1], plan[1:]):
+        assert stop == start
+
+
+@mark.parametrize('primitive', [True, False])
+@mark.parametrize('block_size', [3, 1 << 16])
+def test_sorted_triples(tmp_path, primitive, block_size):
+    up_to = 5_000
+    shards = sharded.sharded_triples(up_to, str(tmp_path), primitive, n_shards=5, max_workers=2)
+    merged = np.concatenate(list(sharded.merge_shards(shards, block_size)))
+
+    expected = np.concatenate(list(pythagorean.euclid_triples(up_to, primitive)))
+    assert len(merged) == len(expected)
+    assert set(map(tuple, merged.tolist())) == set(map(tuple, expected.tolist()))
+
+    key = merged[:, 2].astype(np.int64) * up_to + merged[:, 0]
+    assert np.all(np.diff(key) > 0)
+
+
+def test_merge_removes_duplicates(tmp_path):
+    shards = sharded.sharded_triples(1_000, str(tmp_path), primitive=False, n_shards=2, max_workers=1)
+    once = np.concatenate(list(sharded.merge_shards(shards)))
+    twice = np.concatenate(list(sharded.merge_shards(shards + shards, block_size=7)))
+    np.testing.assert_array_equal(once, twice)
+
+
+def test_shards_are_compact(tmp_path):
+    shards = sharded.sharded_triples(1_000, str(tmp_path), n_shards=2, max_workers=1)
+    assert all(s.dtype == np.int32 for s in shards)
+    assert sharded.shard_dtype(2 ** 40) == np.int64
+
+
+def test_sorted_triples_empty():
+    assert list(sharded.sorted_triples(4, max_workers=1)) == []
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
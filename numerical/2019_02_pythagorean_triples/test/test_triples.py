@@ -0,0 +1,80 @@
+import importlib
+
+import numpy as np
+from pytest import mark
+
+PATH = 'numerical.2019_02_pythagorean_triples.triples'
+pythagorean = importlib.import_module(PATH)
+
+
+def as_set(chunks):
+    return set(map(tuple, np.concatenate(list(chunks)).tolist()))
+
+
+def test_ragged_arange():
+    got = pythagorean.ragged_arange(np.array([3, 0, 2, 1]), start=1)
+    np.testing.assert_array_equal(got, [1, 2, 3, 1, 2, 1])
+
+
+@mark.parametrize('up_to', [5, 20, 100, 300])
+@mark.parametrize('chunk_size', [1, 7, 1 << 20])
+def test_euclid_matches_naive(up_to, chunk_size):
+    expected = set(pythagorean.naive_triples(up_to=up_to + 1))
+    got = as_set(pythagorean.euclid_triples(up_to, primitive=False, chunk_size=chunk_size))
+    assert got == expected
+
+
+def test_euclid_primitive():
+    got = as_set(pythagorean.euclid_triples(300))
+    expected = {t for t in pythagorean.naive_triples(up_to=301) if np.gcd.reduce(t) == 1}
+    assert got == expected
+
+
+def test_euclid_chunks_bounded():
+    chunks = list(pythagorean.euclid_triples(100_000, primitive=False, chunk_size=1000))
+    assert max(len(c) for c in chunks) <= 1000
+
+    triples = np.concatenate(chunks)
+    a, b, c = triples.T
+    assert np.all(a * a + b * b == c * c)
+    assert np.all((a < b) & (c <= 100_000))
+    assert len(np.unique(triples, axis=0)) == len(triples)
+
+
+def test_euclid_nothing_small():
+    assert list(pythagorean.euclid_triples(4)) == []
+
+
+def test_berggren_tree_levels():
+    levels = list(pythagorean.berggren_tree(depth=4))
+    assert [len(x) for x in levels] == [1, 3, 9, 27, 81]
+
+    np.testing.assert_array_equal(levels[0], [[3, 4, 5]])
+    np.testing.assert_array_equal(levels[1], [[5, 12, 13], [21, 20, 29], [15, 8, 17]])
+
+
+def test_berggren_tree_is_complete():
+    """ Every primitive triple appears exactly once in the tree. """
+    up_to = 10_000
+    tree = np.concatenate(list(pythagorean.berggren_tree(up_to=up_to)))
+    tree = np.column_stack((tree[:, :2].min(axis=1), tree[:, :2].max(axis=1), tree[:, 2]))
+
+    expected = as_set(pythagorean.euclid_triples(up_to))
+    assert len(tree) == len(expected)
+    assert set(map(tuple, tree.tolist())) == expected
+
+
+def test_berggren_tree_overflow():
+    m = 2 ** 30
+    start = (m * m - 1, 2 * m, m * m + 1)
+
+    levels = list(pythagorean.berggren_tree(start=start, depth=3))
+    assert levels[-1].dtype == object
+
+    for a, b, c in np.concatenate(levels):
+        assert a * a + b * b == c * c
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
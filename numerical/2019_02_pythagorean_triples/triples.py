@@ -1,5 +1,5 @@
 from itertools import count
-from math import sqrt
+from math import isqrt, sqrt
 import numpy as np
 
 
@@ -23,6 +23,95 @@ def fibonacci_triples():
             yield tuple(map(int, (sqrt(odd), sqrt(b2), sqrt(c2))))
 
 
+def ragged_arange(counts, start=0):
+    """ Concatenation of `np.arange(start, start + n)` for each `n`
+        in `counts`, without a python loop.
+    """
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(offsets.size, dtype=np.int64) - offsets + start
+
+
+def euclid_block(m, up_to):
+    """ All primitive triples with `c <= up_to` generated by Euclid's
+        formula from the integers `m` and every `n < m`:
+
+            a = m^2 - n^2, b = 2mn, c = m^2 + n^2
+
+        The pairs are filtered to opposite parity and gcd(m, n) == 1,
+        which generates each primitive triple exactly once.
+
+        Returns an int64 array of shape (n_triples, 3), with a < b.
+    """
+    m = np.asarray(m, dtype=np.int64)
+
+    # only generate the n for which m^2 + n^2 <= up_to
+    n_max = np.sqrt(np.maximum(up_to - m * m, 0)).astype(np.int64)
+    n_max = np.clip(n_max, 0, m - 1)
+
+    mm = np.repeat(m, n_max)
+    nn = ragged_arange(n_max, start=1)
+
+    keep = ((mm - nn) % 2 == 1) & (np.gcd(mm, nn) == 1) & (mm * mm + nn * nn <= up_to)
+    mm = mm[keep]
+    nn = nn[keep]
+
+    a = mm * mm - nn * nn
+    b = 2 * mm * nn
+    c = mm * mm + nn * nn
+    return np.column_stack((np.minimum(a, b), np.maximum(a, b), c))
+
+
+def multiples(primitives, up_to, chunk_size=1 << 20):
+    """ Every multiple `k * (a, b, c)` with `k * c <= up_to` of each
+        primitive triple, as a stream of arrays of at most `chunk_size`
+        rows. The `k` for each primitive are laid out consecutively and
+        each chunk is a slice of that flat layout, so even the ~up_to / 5
+        multiples of (3, 4, 5) never need to be held at once.
+    """
+    k = up_to // primitives[:, 2]
+    ends = np.cumsum(k)
+    total = ends[-1] if len(ends) else 0
+
+    for lo in range(0, total, chunk_size):
+        position = np.arange(lo, min(lo + chunk_size, total))
+        row = np.searchsorted(ends, position, side='right')
+        multiple = position - (ends[row] - k[row]) + 1
+        yield primitives[row] * multiple[:, None]
+
+
+def euclid_triples(up_to=20, primitive=True, chunk_size=1 << 20, m_start=2, m_stop=None):
+    """ Every Pythagorean triple with `c <= up_to`, as a stream of
+        int64 arrays of shape (n_triples, 3).
+
+        The (m, n) grid is processed in blocks of consecutive `m`
+        containing roughly `chunk_size` candidate pairs, so memory
+        stays bounded regardless of `up_to`. If `primitive` is False
+        the multiples of each primitive are included too. Triples are
+        not sorted across chunks.
+
+        `m_start` and `m_stop` restrict the search to part of the grid,
+        eg. to split it across processes.
+    """
+    m_max = isqrt(max(up_to - 1, 0))
+    if m_stop is not None:
+        m_max = min(m_max, m_stop - 1)
+
+    while m_start <= m_max:
+        # each m contributes at most m - 1 candidate pairs, so the block
+        # [m_start, block_stop) holds about (block_stop^2 - m_start^2) / 2 pairs
+        block_stop = min(m_max + 1, max(m_start + 1, isqrt(m_start * m_start + 2 * chunk_size)))
+        triples = euclid_block(np.arange(m_start, block_stop), up_to)
+        m_start = block_stop
+
+        if not len(triples):
+            continue
+
+        if primitive:
+            yield triples
+        else:
+            yield from multiples(triples, up_to, chunk_size)
+
+
 A = np.array([
     [1, -2, 2],
     [2, -1, 2],
@@ -55,6 +144,56 @@ def berggren_triples(start=(3, 4, 5)):
         yield last_c
 
 
+BERGGREN = np.stack((A, B, C))
+
+# every entry of a Berggren matrix product is a sum of three terms with
+# coefficients at most 3 in size, so this bounds the growth per level
+MAX_GROWTH = 7
+
+
+def berggren_children(frontier):
+    """ Multiplies a 3 x k frontier of triples (one per column) by A, B
+        and C in a single batched matmul, returning the 3 x 3k frontier
+        of their children: [A @ frontier | B @ frontier | C @ frontier].
+
+        Switches to python integers (dtype=object) when the next level
+        could overflow int64.
+    """
+    if frontier.dtype != object and np.abs(frontier).max() > np.iinfo(np.int64).max // MAX_GROWTH:
+        frontier = frontier.astype(object)
+
+    return np.concatenate(BERGGREN @ frontier, axis=1)
+
+
+def berggren_tree(start=(3, 4, 5), depth=None, up_to=None):
+    """ Breadth-first expansion of the complete tree of primitive
+        triples, yielding one (k, 3) array per level starting with the
+        root (so level `d` holds up to 3^d triples).
+
+        Unlike `berggren_triples`, which follows the A.A.A..., B.B.B...
+        and C.C.C... chains only, this visits every node of the tree.
+        The expansion stops after `depth` levels and/or prunes every
+        branch once `c > up_to` (`c` strictly increases down the tree);
+        with neither limit it yields levels forever.
+
+        As with the matrices themselves, a and b are not ordered.
+    """
+    frontier = np.array(start, dtype=np.int64).reshape(3, 1)
+    level = 0
+
+    while True:
+        if up_to is not None:
+            frontier = frontier[:, frontier[2] <= up_to]
+
+        if not frontier.shape[1] or (depth is not None and level > depth):
+            return
+
+        yield frontier.T
+
+        frontier = berggren_children(frontier)
+        level += 1
+
+
 if __name__ == '__main__':
     for x in naive_triples(up_to=20):
         print(x)
@@ -67,3 +206,9 @@ if __name__ == '__main__':
     berg = berggren_triples()
     for x in range(10):
         print(next(berg))
+
+    for chunk in euclid_triples(up_to=20, primitive=False):
+        print(chunk)
+
+    for level in berggren_tree(depth=2):
+        print(level)
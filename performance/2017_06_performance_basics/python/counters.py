@@ -0,0 +1,269 @@
+
+import ctypes
+import os
+import platform
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+
+# perf_event_open(2) constants, from linux/perf_event.h
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+PERF_TYPE_HW_CACHE = 3
+
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_REFERENCES = 2
+PERF_COUNT_HW_CACHE_MISSES = 3
+PERF_COUNT_HW_BRANCH_MISSES = 5
+PERF_COUNT_SW_TASK_CLOCK = 1
+
+PERF_COUNT_HW_CACHE_L1D = 0
+PERF_COUNT_HW_CACHE_OP_READ = 0
+PERF_COUNT_HW_CACHE_RESULT_MISS = 1
+
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+
+ATTR_FLAG_DISABLED = 1 << 0
+ATTR_FLAG_INHERIT = 1 << 1
+ATTR_FLAG_EXCLUDE_KERNEL = 1 << 5
+ATTR_FLAG_EXCLUDE_HV = 1 << 6
+
+PERF_EVENT_IOC_ENABLE = 0x2400
+PERF_EVENT_IOC_DISABLE = 0x2401
+PERF_EVENT_IOC_RESET = 0x2403
+
+SYSCALL_PERF_EVENT_OPEN = {
+    'x86_64': 298,
+    'aarch64': 241,
+}
+
+Event = namedtuple('Event', ['name', 'type', 'config'])
+
+DEFAULT_EVENTS = (
+    Event('task_clock_ns', PERF_TYPE_SOFTWARE, PERF_COUNT_SW_TASK_CLOCK),
+    Event('cycles', PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES),
+    Event('instructions', PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS),
+    Event('cache_references', PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_REFERENCES),
+    Event('cache_misses', PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES),
+    Event('branch_misses', PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_MISSES),
+    Event('l1d_read_misses', PERF_TYPE_HW_CACHE,
+          PERF_COUNT_HW_CACHE_L1D
+          | PERF_COUNT_HW_CACHE_OP_READ << 8
+          | PERF_COUNT_HW_CACHE_RESULT_MISS << 16),
+)
+
+# struct perf_event_attr is versioned by size; 112 bytes is
+# PERF_ATTR_SIZE_VER5 which every kernel since 4.1 understands.
+ATTR_SIZE = 112
+
+
+def _perf_event_open(event):
+    """ Opens a counter for `event` on the calling thread, and the
+        threads it goes on to start, on any CPU, counting user-space
+        only (perf_event_paranoid <= 2 allows this without privileges).
+        Returns -1 if the event is unavailable, eg. on a VM without a
+        virtualised PMU, or on anything other than Linux.
+    """
+    syscall_nr = SYSCALL_PERF_EVENT_OPEN.get(platform.machine())
+    if not sys.platform.startswith('linux') or syscall_nr is None:
+        return -1
+
+    attr = bytearray(ATTR_SIZE)
+    struct.pack_into('IIQ', attr, 0, event.type, ATTR_SIZE, event.config)
+    struct.pack_into('Q', attr, 32, PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING)
+    flags = ATTR_FLAG_DISABLED | ATTR_FLAG_INHERIT | ATTR_FLAG_EXCLUDE_KERNEL | ATTR_FLAG_EXCLUDE_HV
+    struct.pack_into('Q', attr, 40, flags)
+
+    libc = ctypes.CDLL(None, use_errno=True)
+    buf = (ctypes.c_char * ATTR_SIZE).from_buffer(attr)
+    return libc.syscall(syscall_nr, buf, 0, -1, -1, 0)
+
+
+class PerfCounters:
+    """ A set of perf_event counters for the current thread, and the
+        threads it starts once they are open.
+
+        Used as a context manager around the code to measure:
+
+        >>> counters = PerfCounters()
+        >>> with counters:
+        ...     fn(data)
+        >>> counters.read()
+        {'task_clock_ns': 1234.0, 'cycles': 5678.0, ...}
+
+        Events the kernel refuses to open are reported as NaN, so on
+        non-Linux platforms every counter is NaN.
+
+        Threads only inherit the counters when they are started, so
+        open them before the first call to a numba `parallel` kernel
+        (which starts numba's thread pool), or only the calling
+        thread's share of its work is counted.
+    """
+
+    def __init__(self, events=DEFAULT_EVENTS):
+        self.events = events
+        self._fds = [_perf_event_open(e) for e in events]
+
+    @property
+    def available(self):
+        return [e.name for e, fd in zip(self.events, self._fds) if fd >= 0]
+
+    def _ioctl(self, request):
+        import fcntl  # there's only a counter to control on Linux
+
+        for fd in self._fds:
+            if fd >= 0:
+                fcntl.ioctl(fd, request, 0)
+
+    def __enter__(self):
+        self._ioctl(PERF_EVENT_IOC_RESET)
+        self._ioctl(PERF_EVENT_IOC_ENABLE)
+        return self
+
+    def __exit__(self, *exc):
+        self._ioctl(PERF_EVENT_IOC_DISABLE)
+
+    def read(self):
+        results = {}
+        for event, fd in zip(self.events, self._fds):
+            if fd < 0:
+                results[event.name] = np.nan
+                continue
+
+            value, enabled, running = struct.unpack('QQQ', os.read(fd, 24))
+
+            # scale up if the kernel had to multiplex the counters
+            results[event.name] = float(value) * enabled / running if running else np.nan
+
+        return results
+
+    def close(self):
+        for fd in self._fds:
+            if fd >= 0:
+                os.close(fd)
+        self._fds = [-1] * len(self.events)
+
+    def __del__(self):
+        self.close()
+
+
+def mmm_flops(a, b):
+    m, k = a.shape
+    return 2 * m * k * b.shape[1]
+
+
+def lu_flops(a):
+    n = a.shape[0]
+    return 2 * n ** 3 // 3
+
+
+def streaming_stats_flops(data):
+    # dominated by the rank-1 covariance update each period
+    n_periods, n_assets = data.shape
+    return 2 * n_periods * n_assets * n_assets
+
+
+class Profiler:
+    """ Collects counter readings for repeated calls to any kernel in
+        the repo, eg.
+
+        >>> profiler = Profiler()
+        >>> for n in (100, 200, 400):
+        ...     a = np.random.random((n, n))
+        ...     profiler.run(gemm, a, a, flops=mmm_flops(a, a), size=n)
+        >>> df = profiler.results()
+        >>> plot_results(df, metric='cycles')
+
+        FLOPs are counted analytically and passed in, as hardware
+        floating-point events are model-specific raw events.
+    """
+
+    def __init__(self, events=DEFAULT_EVENTS):
+        self._counters = PerfCounters(events)
+        self._records = []
+
+    def run(self, fn, *args, label=None, size=None, flops=np.nan, repeats=5, warmup=1):
+        label = label or fn.__name__
+
+        for _ in range(warmup):
+            fn(*args)  # force compile / warm the caches
+
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            with self._counters:
+                fn(*args)
+            elapsed = time.perf_counter() - start
+
+            record = {'label': label, 'size': size, 'repeat': repeat,
+                      'seconds': elapsed, 'flops': flops}
+            record.update(self._counters.read())
+            self._records.append(record)
+
+    def results(self):
+        import pandas as pd
+
+        df = pd.DataFrame(self._records)
+        df['ipc'] = df['instructions'] / df['cycles']
+        df['cache_miss_rate'] = df['cache_misses'] / df['cache_references']
+        df['gflops_per_second'] = df['flops'] / df['seconds'] / 1e9
+        return df
+
+
+def plot_results(df, metric='cycles', ax=None):
+    """ Plots the mean of `metric` for each kernel; a bar chart when
+        a single size was profiled (as in `mmm_ram.py`), otherwise a
+        log-log line per kernel against size (as in `profile_and_plot.py`).
+    """
+    import matplotlib.pyplot as plt
+
+    ax = ax or plt.gca()
+    means = df.groupby(['label', 'size'], dropna=False)[metric].mean().unstack('label')
+
+    if len(means) == 1:
+        ax.bar(range(len(means.columns)), means.iloc[0].values, width=0.35)
+        ax.set_xticks(range(len(means.columns)))
+        ax.set_xticklabels(means.columns)
+        ax.set_xlabel('Kernel')
+    else:
+        for label in means.columns:
+            ax.loglog(means.index, means[label], label=label)
+        ax.set_xlabel('Length of array axis (n)')
+        ax.legend(loc='upper left')
+
+    ax.set_ylabel(metric)
+    return ax
+
+
+if __name__ == '__main__':
+    import importlib
+    import matplotlib.pyplot as plt
+
+    from .mmm import mmm_naive, mmm_ram, mmm_cache, gemm
+
+    lu = importlib.import_module('performance.2017_12_LU_decomposition.python.lu_smorgasbord')
+
+    profiler = Profiler()
+    print('Available counters:', profiler._counters.available)
+
+    for n in (64, 128, 256, 512):
+        a = np.random.random((n, n))
+        b = np.random.random((n, n))
+
+        for fn in (mmm_naive, mmm_ram, mmm_cache, gemm):
+            profiler.run(fn, a, b, flops=mmm_flops(a, b), size=n)
+
+        for fn in (lu.lu_parallel, lu.lu_parallel_2):
+            profiler.run(fn, a, flops=lu_flops(a), size=n)
+
+    df = profiler.results()
+    df.to_csv('counters.csv', index=False)
+    print(df.groupby(['label', 'size']).mean(numeric_only=True))
+
+    plot_results(df, metric='task_clock_ns')
+    plt.show()
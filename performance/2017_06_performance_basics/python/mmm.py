@@ -0,0 +1,245 @@
+
+import numpy as np
+from numba import njit, prange
+
+
+# Register block: an MR x NR tile of the output is held in scalar
+# accumulators for the whole of the k-loop, the numba equivalent of
+# `const int c = 4` in the register-optimised C code.
+MR = 4
+NR = 4
+
+# Cache blocks: a KC x NR sliver of packed B (8Kb) stays in L1 whilst
+# an MC x KC block of packed A (128Kb) stays in L2, and a KC x NC
+# panel of packed B (2Mb) is shared by all threads from L3.
+MC = 64
+KC = 256
+NC = 1024
+
+
+@njit(cache=True)
+def mmm_naive(a, b):
+    """ The `kji` loop order from the naive C code, striding down
+        the columns of all three matrices.
+    """
+    n, m = a.shape
+    p = b.shape[1]
+    c = np.zeros((n, p))
+
+    for k in range(m):
+        for j in range(p):
+            for i in range(n):
+                c[i, j] += a[i, k] * b[k, j]
+
+    return c
+
+
+@njit(cache=True)
+def mmm_ram(a, b):
+    """ `ikj` loop order, so the innermost loop walks along
+        contiguous rows of `b` and `c`.
+    """
+    n, m = a.shape
+    p = b.shape[1]
+    c = np.zeros((n, p))
+
+    for i in range(n):
+        for k in range(m):
+            a_ik = a[i, k]
+            for j in range(p):
+                c[i, j] += a_ik * b[k, j]
+
+    return c
+
+
+@njit(cache=True)
+def mmm_cache(a, b, block=20):
+    """ Loop tiling / loop blocking, as in the cache-optimised C code,
+        with the tile edges clipped for sizes which are not a multiple
+        of `block`.
+    """
+    n, m = a.shape
+    p = b.shape[1]
+    c = np.zeros((n, p))
+
+    for i in range(0, n, block):
+        for k in range(0, m, block):
+            for j in range(0, p, block):
+
+                for ii in range(i, min(i + block, n)):
+                    for kk in range(k, min(k + block, m)):
+                        a_ik = a[ii, kk]
+                        for jj in range(j, min(j + block, p)):
+                            c[ii, jj] += a_ik * b[kk, jj]
+
+    return c
+
+
+@njit(cache=True)
+def round_up(x, multiple):
+    return -(-x // multiple) * multiple
+
+
+@njit(cache=True)
+def pack_a(a, i0, k0, mc, kc, a_pack):
+    """ Copies `a[i0:i0 + mc, k0:k0 + kc]` into `a_pack` as a sequence
+        of MR-row slivers, each stored column by column, so that the
+        micro-kernel reads A with unit stride. The last sliver is
+        zero padded.
+    """
+    idx = 0
+    for ir in range(0, mc, MR):
+        for p in range(kc):
+            for r in range(MR):
+                if ir + r < mc:
+                    a_pack[idx] = a[i0 + ir + r, k0 + p]
+                else:
+                    a_pack[idx] = 0.0
+                idx += 1
+
+
+@njit(cache=True)
+def pack_b(b, k0, j0, kc, nc, b_pack):
+    """ Copies `b[k0:k0 + kc, j0:j0 + nc]` into `b_pack` as a sequence
+        of NR-column slivers, each stored row by row. The last sliver
+        is zero padded.
+    """
+    idx = 0
+    for jr in range(0, nc, NR):
+        for p in range(kc):
+            for q in range(NR):
+                if jr + q < nc:
+                    b_pack[idx] = b[k0 + p, j0 + jr + q]
+                else:
+                    b_pack[idx] = 0.0
+                idx += 1
+
+
+@njit(fastmath=True, cache=True)
+def micro_kernel(kc, a_pack, a_off, b_pack, b_off, c, i0, j0):
+    """ C[i0:i0 + 4, j0:j0 + 4] += A_sliver @ B_sliver
+
+        The 16 accumulators are plain locals so LLVM keeps them in
+        registers, and each step of the k-loop is 16 multiply-adds on
+        values loaded from the packed buffers. `fastmath` allows LLVM
+        to contract these into FMA instructions.
+    """
+    c00 = c01 = c02 = c03 = 0.0
+    c10 = c11 = c12 = c13 = 0.0
+    c20 = c21 = c22 = c23 = 0.0
+    c30 = c31 = c32 = c33 = 0.0
+
+    for _ in range(kc):
+        a0 = a_pack[a_off]
+        a1 = a_pack[a_off + 1]
+        a2 = a_pack[a_off + 2]
+        a3 = a_pack[a_off + 3]
+
+        b0 = b_pack[b_off]
+        b1 = b_pack[b_off + 1]
+        b2 = b_pack[b_off + 2]
+        b3 = b_pack[b_off + 3]
+
+        c00 += a0 * b0
+        c01 += a0 * b1
+        c02 += a0 * b2
+        c03 += a0 * b3
+        c10 += a1 * b0
+        c11 += a1 * b1
+        c12 += a1 * b2
+        c13 += a1 * b3
+        c20 += a2 * b0
+        c21 += a2 * b1
+        c22 += a2 * b2
+        c23 += a2 * b3
+        c30 += a3 * b0
+        c31 += a3 * b1
+        c32 += a3 * b2
+        c33 += a3 * b3
+
+        a_off += MR
+        b_off += NR
+
+    c[i0, j0] += c00
+    c[i0, j0 + 1] += c01
+    c[i0, j0 + 2] += c02
+    c[i0, j0 + 3] += c03
+    c[i0 + 1, j0] += c10
+    c[i0 + 1, j0 + 1] += c11
+    c[i0 + 1, j0 + 2] += c12
+    c[i0 + 1, j0 + 3] += c13
+    c[i0 + 2, j0] += c20
+    c[i0 + 2, j0 + 1] += c21
+    c[i0 + 2, j0 + 2] += c22
+    c[i0 + 2, j0 + 3] += c23
+    c[i0 + 3, j0] += c30
+    c[i0 + 3, j0 + 1] += c31
+    c[i0 + 3, j0 + 2] += c32
+    c[i0 + 3, j0 + 3] += c33
+
+
+@njit(cache=True)
+def macro_kernel(mc, nc, kc, a_pack, b_pack, c, i0, j0):
+    for jr in range(0, nc, NR):
+        for ir in range(0, mc, MR):
+            micro_kernel(kc, a_pack, ir * kc, b_pack, jr * kc, c, i0 + ir, j0 + jr)
+
+
+@njit(parallel=True, cache=True)
+def gemm(a, b):
+    """ Cache- and register-blocked matrix-matrix multiplication.
+
+        The loops follow the GotoBLAS / BLIS structure: an NC-wide
+        panel of B is packed once per KC-deep slice of the k-axis,
+        then MC-row blocks of A are packed and multiplied against it
+        in parallel. Each MC block writes to its own rows of C, so
+        the `prange` needs no synchronisation.
+
+        C is allocated padded to a multiple of the register block so
+        the micro-kernel never needs to handle ragged edges.
+    """
+    m, k = a.shape
+    assert k == b.shape[0], 'inner dimensions must agree'
+    n = b.shape[1]
+
+    c = np.zeros((round_up(m, MR), round_up(n, NR)))
+    n_blocks = (m + MC - 1) // MC
+
+    for jc in range(0, n, NC):
+        nc = min(NC, n - jc)
+
+        for pc in range(0, k, KC):
+            kc = min(KC, k - pc)
+            b_pack = np.empty(round_up(nc, NR) * kc)
+            pack_b(b, pc, jc, kc, nc, b_pack)
+
+            for blk in prange(n_blocks):
+                ic = blk * MC
+                mc = min(MC, m - ic)
+                a_pack = np.empty(round_up(mc, MR) * kc)
+                pack_a(a, ic, pc, mc, kc, a_pack)
+                macro_kernel(mc, nc, kc, a_pack, b_pack, c, ic, jc)
+
+    return c[:m, :n].copy()
+
+
+if __name__ == '__main__':
+    import time
+
+    n = 1024
+    A = np.random.random((n, n))
+    B = np.random.random((n, n))
+
+    for fn in (mmm_ram, mmm_cache, gemm):
+        fn(A[:8], B[:, :8].copy())  # force compile
+
+        t1 = time.perf_counter()
+        C = fn(A, B)
+        t2 = time.perf_counter()
+        np.testing.assert_allclose(C, A @ B)
+        print(f'{fn.__name__}: {t2 - t1:.4f}s')
+
+    t1 = time.perf_counter()
+    A @ B
+    t2 = time.perf_counter()
+    print(f'numpy: {t2 - t1:.4f}s')
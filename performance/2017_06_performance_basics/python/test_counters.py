@@ -0,0 +1,87 @@
+
+import sys
+import threading
+
+import numpy as np
+from pytest import mark, skip
+
+from .counters import (
+    DEFAULT_EVENTS, PerfCounters, Profiler,
+    mmm_flops, lu_flops, streaming_stats_flops
+)
+from .mmm import gemm
+
+
+def test_flop_counts():
+    a = np.empty((3, 4))
+    b = np.empty((4, 5))
+    assert mmm_flops(a, b) == 2 * 3 * 4 * 5
+    assert lu_flops(np.empty((30, 30))) == 18000
+    assert streaming_stats_flops(np.empty((10, 3))) == 180
+
+
+def test_counters_read_all_events():
+    counters = PerfCounters()
+    with counters:
+        sum(range(10_000))
+
+    got = counters.read()
+    assert list(got) == [e.name for e in DEFAULT_EVENTS]
+    for name in counters.available:
+        assert got[name] >= 0
+
+
+@mark.skipif(not sys.platform.startswith('linux'), reason='perf_event is linux only')
+def test_task_clock_counts_work():
+    counters = PerfCounters()
+    if 'task_clock_ns' not in counters.available:
+        skip('the task clock counter is unavailable here')
+
+    with counters:
+        sum(range(10_000))
+    short = counters.read()['task_clock_ns']
+
+    with counters:
+        sum(range(10_000_000))
+    long = counters.read()['task_clock_ns']
+
+    assert 0 < short < long
+
+
+@mark.skipif(not sys.platform.startswith('linux'), reason='perf_event is linux only')
+def test_counts_threads_started_after_opening():
+    counters = PerfCounters()
+    if 'task_clock_ns' not in counters.available:
+        skip('the task clock counter is unavailable here')
+
+    with counters:
+        sum(range(10_000))
+    short = counters.read()['task_clock_ns']
+
+    with counters:
+        thread = threading.Thread(target=sum, args=(range(10_000_000),))
+        thread.start()
+        thread.join()
+    threaded = counters.read()['task_clock_ns']
+
+    assert threaded > 10 * short
+
+
+def test_profiler_results():
+    profiler = Profiler()
+    for n in (8, 16):
+        a = np.random.random((n, n))
+        profiler.run(gemm, a, a, flops=mmm_flops(a, a), size=n, repeats=3)
+    profiler.run(np.linalg.inv, a, size=16, repeats=2)
+
+    df = profiler.results()
+    assert len(df) == 8
+    assert set(df['label']) == {'gemm', 'inv'}
+    assert (df['seconds'] > 0).all()
+    assert df['flops'].isnull().sum() == 2
+    assert {'cycles', 'ipc', 'gflops_per_second'} <= set(df.columns)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,50 @@
+
+import numpy as np
+from numpy.testing import assert_allclose
+from pytest import mark
+
+from .mmm import mmm_naive, mmm_ram, mmm_cache, gemm
+
+ALL_FNS = [mmm_naive, mmm_ram, mmm_cache, gemm]
+
+SHAPES = [
+    (1, 1, 1),
+    (3, 5, 7),
+    (4, 4, 4),
+    (64, 256, 4),
+    (65, 257, 33),
+    (130, 300, 1030),
+]
+
+
+@mark.parametrize('shape', SHAPES, ids=str)
+@mark.parametrize('fn', ALL_FNS, ids=lambda f: f.__name__)
+def test_mmm_matches_numpy(fn, shape):
+    m, k, n = shape
+    rng = np.random.RandomState(0)
+    a = rng.randn(m, k)
+    b = rng.randn(k, n)
+
+    assert_allclose(fn(a, b), a @ b)
+
+
+@mark.parametrize('fn', ALL_FNS, ids=lambda f: f.__name__)
+def test_mmm_integer_input(fn):
+    a = np.arange(12).reshape(3, 4)
+    b = np.arange(20).reshape(4, 5)
+
+    assert_allclose(fn(a, b), a @ b)
+
+
+def test_gemm_non_contiguous():
+    rng = np.random.RandomState(0)
+    a = rng.randn(300, 200)
+    b = np.asfortranarray(rng.randn(200, 90))
+
+    assert_allclose(gemm(a.T.T[::2], b), a[::2] @ b)
+    assert_allclose(gemm(b.T, a.T), b.T @ a.T)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
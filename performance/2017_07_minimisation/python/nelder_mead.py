@@ -0,0 +1,267 @@
+from collections import namedtuple
+
+import numpy as np
+from numba import njit, prange
+
+# As scipy: the initial simplex steps 5% along each axis, or 0.00025
+# along an axis where x0 is zero
+STEP = 0.05
+ZERO_STEP = 0.00025
+
+NelderMeadResult = namedtuple('NelderMeadResult', ['x', 'fun', 'nit', 'nfev', 'success'])
+
+
+@njit(cache=True)
+def _insert_last(sim, fsim):
+    """ Moves the last vertex of the simplex, which has just been
+        replaced, to its place in order of increasing `fsim`.
+    """
+    j = len(fsim) - 1
+    f = fsim[j]
+    x = sim[j].copy()
+    while j > 0 and fsim[j - 1] > f:
+        fsim[j] = fsim[j - 1]
+        sim[j] = sim[j - 1]
+        j -= 1
+    fsim[j] = f
+    sim[j] = x
+
+
+@njit(cache=True)
+def _sort(sim, fsim):
+    order = np.argsort(fsim)
+    sim[:] = sim[order]
+    fsim[:] = fsim[order]
+
+
+# Not cached on disk: the type of `objective` is part of the cache key,
+# and differs in every process, so each run would only add another copy
+@njit
+def _nelder_mead(objective, x0, data, xatol, fatol, max_iter, max_fev, adaptive, x_out):
+    """ Minimises `objective(x, data)` from `x0` with the Nelder-Mead
+        simplex algorithm, as `scipy.optimize.minimize` does, writing
+        the best point to `x_out`. Returns the minimum, the number of
+        iterations and function evaluations, and whether it converged.
+
+        With `adaptive`, the expansion, contraction and shrink
+        coefficients depend on the dimension (Gao & Han, 2012), which
+        keeps the simplex from degenerating in higher dimensions.
+    """
+    n = len(x0)
+    if adaptive:
+        rho, chi, psi, sigma = 1.0, 1.0 + 2.0 / n, 0.75 - 1.0 / (2.0 * n), 1.0 - 1.0 / n
+    else:
+        rho, chi, psi, sigma = 1.0, 2.0, 0.5, 0.5
+
+    sim = np.empty((n + 1, n))
+    fsim = np.empty(n + 1)
+    for k in range(n + 1):
+        sim[k] = x0
+        if k > 0:
+            j = k - 1
+            sim[k, j] = x0[j] * (1.0 + STEP) if x0[j] != 0.0 else ZERO_STEP
+        fsim[k] = objective(sim[k], data)
+    nfev = n + 1
+    _sort(sim, fsim)
+
+    xbar = np.empty(n)
+    xr = np.empty(n)
+    xe = np.empty(n)
+    nit = 0
+    converged = False
+    while nfev < max_fev and nit < max_iter:
+        spread = 0.0
+        fspread = 0.0
+        for k in range(1, n + 1):
+            fspread = max(fspread, abs(fsim[0] - fsim[k]))
+            for j in range(n):
+                spread = max(spread, abs(sim[k, j] - sim[0, j]))
+        if spread <= xatol and fspread <= fatol:
+            converged = True
+            break
+
+        # the centroid of all but the worst vertex
+        for j in range(n):
+            s = 0.0
+            for k in range(n):
+                s += sim[k, j]
+            xbar[j] = s / n
+
+        # reflect the worst vertex through the centroid
+        for j in range(n):
+            xr[j] = (1.0 + rho) * xbar[j] - rho * sim[n, j]
+        fxr = objective(xr, data)
+        nfev += 1
+
+        shrink = False
+        if fxr < fsim[0]:
+            # it's the best yet, so try going further
+            for j in range(n):
+                xe[j] = (1.0 + rho * chi) * xbar[j] - rho * chi * sim[n, j]
+            fxe = objective(xe, data)
+            nfev += 1
+            if fxe < fxr:
+                sim[n] = xe
+                fsim[n] = fxe
+            else:
+                sim[n] = xr
+                fsim[n] = fxr
+        elif fxr < fsim[n - 1]:
+            sim[n] = xr
+            fsim[n] = fxr
+        else:
+            # contract, outside the simplex if the reflection improved
+            # on the worst vertex, otherwise inside
+            if fxr < fsim[n]:
+                for j in range(n):
+                    xe[j] = (1.0 + psi * rho) * xbar[j] - psi * rho * sim[n, j]
+                fxc = objective(xe, data)
+                shrink = fxc > fxr
+            else:
+                for j in range(n):
+                    xe[j] = (1.0 - psi) * xbar[j] + psi * sim[n, j]
+                fxc = objective(xe, data)
+                shrink = fxc >= fsim[n]
+            nfev += 1
+
+            if not shrink:
+                sim[n] = xe
+                fsim[n] = fxc
+            else:
+                # shrink every vertex towards the best
+                for k in range(1, n + 1):
+                    for j in range(n):
+                        sim[k, j] = sim[0, j] + sigma * (sim[k, j] - sim[0, j])
+                    fsim[k] = objective(sim[k], data)
+                nfev += n
+
+        nit += 1
+        if shrink:
+            _sort(sim, fsim)
+        else:
+            _insert_last(sim, fsim)
+
+    x_out[:] = sim[0]
+    return fsim[0], nit, nfev, converged
+
+
+@njit(parallel=True)
+def _nelder_mead_batch(objective, x0, data, xatol, fatol, max_iter, max_fev, adaptive, x, fun, nit, nfev, success):
+    for i in prange(len(x0)):
+        fun[i], nit[i], nfev[i], success[i] = _nelder_mead(
+            objective, x0[i], data[i], xatol, fatol, max_iter, max_fev, adaptive, x[i])
+
+
+def _limits(n, max_iter, max_fev):
+    return 200 * n if max_iter is None else max_iter, 200 * n if max_fev is None else max_fev
+
+
+def nelder_mead(objective, x0, data=None, xatol=1e-4, fatol=1e-4, max_iter=None, max_fev=None, adaptive=True):
+    """ Minimises `objective(x, data)` from `x0` with the Nelder-Mead
+        simplex algorithm, returning a `NelderMeadResult`.
+
+        `objective` must be a numba `@njit` function, so the whole
+        minimisation runs in compiled code without calling back into
+        Python. It is compiled for each objective on its first call in
+        each process, as numba can't cache it to disk. `data` is passed
+        to it unchanged, eg. the observations a model is being
+        calibrated to.
+
+        It stops, as `scipy.optimize.minimize(method='Nelder-Mead')`
+        does, when all the vertices of the simplex are within `xatol` of
+        the best one and their values within `fatol`, or after
+        `max_iter` iterations or `max_fev` evaluations (each 200 times
+        the number of parameters by default).
+    """
+    x0 = np.array(x0, dtype=np.float64)
+    data = np.empty(0) if data is None else data
+    x = np.empty_like(x0)
+    max_iter, max_fev = _limits(len(x0), max_iter, max_fev)
+
+    fun, nit, nfev, success = _nelder_mead(objective, x0, data, xatol, fatol, max_iter, max_fev, adaptive, x)
+    return NelderMeadResult(x, fun, nit, nfev, success)
+
+
+def nelder_mead_batch(objective, x0, data, xatol=1e-4, fatol=1e-4, max_iter=None, max_fev=None, adaptive=True):
+    """ Runs an independent `nelder_mead` for each row of `data`,
+        minimising `objective(x, data[i])` from `x0[i]` (or from `x0` for
+        all of them if it is one point), in parallel over the problems.
+
+        Returns a `NelderMeadResult` of arrays, one entry per problem.
+    """
+    n_problems = len(data)
+    x0 = np.array(np.broadcast_to(x0, (n_problems, np.shape(x0)[-1])), dtype=np.float64)
+    max_iter, max_fev = _limits(x0.shape[1], max_iter, max_fev)
+
+    x = np.empty_like(x0)
+    fun = np.empty(n_problems)
+    nit = np.empty(n_problems, dtype=np.int64)
+    nfev = np.empty(n_problems, dtype=np.int64)
+    success = np.empty(n_problems, dtype=np.bool_)
+    _nelder_mead_batch(objective, x0, data, xatol, fatol, max_iter, max_fev, adaptive, x, fun, nit, nfev, success)
+    return NelderMeadResult(x, fun, nit, nfev, success)
+
+
+if __name__ == '__main__':
+    import time
+
+    import scipy.optimize
+
+    @njit
+    def rosenbrock(x, data):
+        total = 0.0
+        for i in range(len(x) - 1):
+            total += 100.0 * (x[i + 1] - x[i] ** 2) ** 2 + (1.0 - x[i]) ** 2
+        return total
+
+    @njit
+    def decay_error(params, observations):
+        """ Squared error of a * exp(-b t) + c against observations at
+            t = 0, 1, 2, ...
+        """
+        a, b, c = params
+        total = 0.0
+        for t in range(len(observations)):
+            total += (a * np.exp(-b * t) + c - observations[t]) ** 2
+        return total
+
+    def best_of(fn, repeats=3):
+        fn()  # force compile
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    print('Rosenbrock from -1.2, 1.0, ...:')
+    for n in [2, 5, 10]:
+        x0 = np.tile([-1.2, 1.0], n)[:n]
+        options = {'adaptive': True, 'maxiter': 200 * n * 10, 'maxfev': 200 * n * 10}
+        ours = nelder_mead(rosenbrock, x0, max_iter=2000 * n, max_fev=2000 * n)
+        theirs = scipy.optimize.minimize(rosenbrock, x0, args=(None,), method='Nelder-Mead', options=options)
+        t_ours = best_of(lambda: nelder_mead(rosenbrock, x0, max_iter=2000 * n, max_fev=2000 * n))
+        t_theirs = best_of(lambda: scipy.optimize.minimize(
+            rosenbrock, x0, args=(None,), method='Nelder-Mead', options=options))
+        print(f'  n={n:2}: nelder_mead {t_ours * 1e3:8.3f}ms ({ours.nfev} evaluations, f={ours.fun:.1e}), '
+              f'scipy {t_theirs * 1e3:8.3f}ms ({theirs.nfev} evaluations, f={theirs.fun:.1e})')
+
+    # calibrating many small models, each to its own noisy observations
+    rng = np.random.RandomState(0)
+    n_problems = 10_000
+    true = rng.uniform([1, 0.1, -1], [5, 1, 1], (n_problems, 3))
+    t = np.arange(20)
+    observations = (true[:, :1] * np.exp(-true[:, 1:2] * t) + true[:, 2:]
+                    + rng.standard_normal((n_problems, len(t))) * 0.01)
+    x0 = np.array([1.0, 0.5, 0.0])
+
+    n_scipy = 200
+    t_scipy = best_of(lambda: [scipy.optimize.minimize(decay_error, x0, args=(obs,), method='Nelder-Mead',
+                                                       options={'adaptive': True}) for obs in observations[:n_scipy]],
+                      repeats=1)
+    t_loop = best_of(lambda: [nelder_mead(decay_error, x0, obs) for obs in observations[:1000]], repeats=1)
+    t_batch = best_of(lambda: nelder_mead_batch(decay_error, x0, observations))
+    print(f'\ncalibrating {n_problems} exponential decay models:')
+    print(f'  scipy, one call per problem:       {t_scipy / n_scipy * 1e6:8.1f}us per problem')
+    print(f'  nelder_mead, one call per problem: {t_loop / 1000 * 1e6:8.1f}us per problem')
+    print(f'  nelder_mead_batch:                 {t_batch / n_problems * 1e6:8.1f}us per problem')
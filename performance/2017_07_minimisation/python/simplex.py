@@ -0,0 +1,405 @@
+import importlib
+from collections import namedtuple
+
+import numpy as np
+from numba import njit
+
+elimination = importlib.import_module('architecture.2019_01_linear_systems_APIs_and_authentication.python.elimination')
+lu_factor_in_place = elimination.lu_factor_in_place
+lu_solve_in_place = elimination.lu_solve_in_place
+
+# As scipy.optimize.linprog
+OPTIMAL, ITERATION_LIMIT, INFEASIBLE, UNBOUNDED, SINGULAR = range(5)
+MESSAGES = {
+    OPTIMAL: 'Optimal solution found',
+    ITERATION_LIMIT: 'Iteration limit reached',
+    INFEASIBLE: 'The problem is infeasible',
+    UNBOUNDED: 'The problem is unbounded',
+    SINGULAR: 'The basis matrix became singular',
+}
+
+# The solution, and the basis to warm-start a similar problem from
+LinearProgramResult = namedtuple('LinearProgramResult', ['x', 'fun', 'status', 'nit', 'basis'])
+
+
+@njit(nogil=True, cache=True)
+def _lu_solve_transpose(lu, pivots, y):
+    """ Solves A^T y = c in place in the vector `y`, from the
+        `lu_factor_in_place` of A: as P A = L U, that's U^T z = c, then
+        L^T w = z, then y = P^T w.
+    """
+    n = lu.shape[0]
+    for k in range(n):
+        s = y[k]
+        for i in range(k):
+            s -= lu[i, k] * y[i]
+        y[k] = s / lu[k, k]
+
+    for k in range(n - 1, -1, -1):
+        s = y[k]
+        for i in range(k + 1, n):
+            s -= lu[i, k] * y[i]
+        y[k] = s
+
+    for k in range(n - 1, -1, -1):
+        p = pivots[k]
+        if p != k:
+            y[k], y[p] = y[p], y[k]
+
+
+@njit(nogil=True, cache=True)
+def _factorise(a, basis, b, lu, pivots, x_b):
+    """ Factorises the basis matrix, the columns `basis` of `a`, into
+        `lu` and `pivots`, and solves for the basic variables `x_b`.
+        Returns 0, or nonzero if the basis matrix is singular.
+    """
+    m = len(basis)
+    for j in range(m):
+        for i in range(m):
+            lu[i, j] = a[i, basis[j]]
+    info = lu_factor_in_place(lu, pivots)
+    if info == 0:
+        rhs = b.copy().reshape((m, 1))
+        lu_solve_in_place(lu, pivots, rhs)
+        x_b[:] = rhs[:, 0]
+    return info
+
+
+@njit(nogil=True, cache=True)
+def _ftran(lu, pivots, eta_rows, eta_columns, n_etas, x):
+    """ Solves B x = a in place in the (m, 1) array `x`, where the basis
+        matrix B is the factorised one times the eta matrices: each the
+        identity with column `eta_rows[k]` replaced by `eta_columns[k]`.
+    """
+    lu_solve_in_place(lu, pivots, x)
+    for k in range(n_etas):
+        r = eta_rows[k]
+        d = eta_columns[k]
+        x_r = x[r, 0] / d[r]
+        for i in range(len(d)):
+            x[i, 0] -= d[i] * x_r
+        x[r, 0] = x_r
+
+
+@njit(nogil=True, cache=True)
+def _btran(lu, pivots, eta_rows, eta_columns, n_etas, y):
+    """ Solves B^T y = c in place in the vector `y`, for B as in `_ftran`. """
+    for k in range(n_etas - 1, -1, -1):
+        r = eta_rows[k]
+        d = eta_columns[k]
+        s = y[r]
+        for i in range(len(d)):
+            if i != r:
+                s -= y[i] * d[i]
+        y[r] = s / d[r]
+    _lu_solve_transpose(lu, pivots, y)
+
+
+@njit(nogil=True, cache=True)
+def _simplex(a, b, c, basis, n_allowed, x_b, max_iter, max_etas, tol):
+    """ Minimises c @ x subject to a @ x == b and x >= 0 by the revised
+        simplex method, from the feasible `basis` (updated in place),
+        with only the first `n_allowed` columns allowed to enter it.
+        Returns the status, and the number of iterations.
+
+        Each iteration prices every column with the duals y, from
+        B^T y = c_B, brings in the one with the most negative reduced
+        cost (or, after a run of degenerate pivots, the first, which
+        can't cycle: Bland's rule), and removes the first basic variable
+        to reach zero along its direction B^-1 a_q.
+
+        Rather than refactorising B when a column changes, the change is
+        appended as an eta matrix, which costs O(m) per solve instead of
+        a new O(m^3) factorisation, and B is refactorised after
+        `max_etas` of them to keep the solves short and accurate.
+    """
+    m = len(basis)
+    lu = np.empty((m, m))
+    pivots = np.empty(m, dtype=np.int64)
+    eta_rows = np.empty(max(max_etas, 1), dtype=np.int64)
+    eta_columns = np.empty((max(max_etas, 1), m))
+    n_etas = 0
+    if _factorise(a, basis, b, lu, pivots, x_b) != 0:
+        return SINGULAR, 0
+
+    is_basic = np.zeros(a.shape[1], dtype=np.bool_)
+    is_basic[basis] = True
+    y = np.empty(m)
+    column = np.empty((m, 1))
+    degenerate = 0
+
+    for nit in range(max_iter):
+        for i in range(m):
+            y[i] = c[basis[i]]
+        _btran(lu, pivots, eta_rows, eta_columns, n_etas, y)
+        priced = y @ a
+
+        bland = degenerate > m
+        q = -1
+        best = -tol
+        for j in range(n_allowed):
+            if not is_basic[j]:
+                reduced = c[j] - priced[j]
+                if reduced < best:
+                    q = j
+                    if bland:
+                        break
+                    best = reduced
+        if q < 0:
+            return OPTIMAL, nit
+
+        column[:, 0] = a[:, q]
+        _ftran(lu, pivots, eta_rows, eta_columns, n_etas, column)
+        w = column[:, 0]
+
+        r = -1
+        theta = np.inf
+        for i in range(m):
+            if w[i] > tol:
+                ratio = max(x_b[i], 0.0) / w[i]
+                if r < 0 or ratio < theta - tol:
+                    r, theta = i, ratio
+                elif ratio <= theta + tol and (basis[i] < basis[r] if bland else w[i] > w[r]):
+                    r, theta = i, min(ratio, theta)
+        if r < 0:
+            return UNBOUNDED, nit
+        degenerate = degenerate + 1 if theta <= tol else 0
+
+        for i in range(m):
+            x_b[i] -= theta * w[i]
+        x_b[r] = theta
+        is_basic[basis[r]] = False
+        is_basic[q] = True
+        basis[r] = q
+
+        if n_etas < max_etas:
+            eta_rows[n_etas] = r
+            eta_columns[n_etas] = w
+            n_etas += 1
+        else:
+            n_etas = 0
+            if _factorise(a, basis, b, lu, pivots, x_b) != 0:
+                return SINGULAR, nit + 1
+
+    return ITERATION_LIMIT, max_iter
+
+
+@njit(nogil=True, cache=True)
+def _drive_out_artificials(a, b, basis, n_real, tol):
+    """ Replaces the artificial variables left in the basis, at zero
+        after phase 1, with real ones where possible: any column with a
+        non-zero entry in the artificial's row of B^-1 a. Where there
+        is none, that constraint is redundant and it stays, at zero.
+    """
+    m = len(basis)
+    lu = np.empty((m, m))
+    pivots = np.empty(m, dtype=np.int64)
+    x_b = np.empty(m)
+    is_basic = np.zeros(a.shape[1], dtype=np.bool_)
+    is_basic[basis] = True
+    for r in range(m):
+        if basis[r] < n_real:
+            continue
+        _factorise(a, basis, b, lu, pivots, x_b)
+        row = np.zeros(m)
+        row[r] = 1.0
+        _lu_solve_transpose(lu, pivots, row)
+
+        q = -1
+        largest = tol
+        for j in range(n_real):
+            if not is_basic[j]:
+                alpha = 0.0
+                for i in range(m):
+                    alpha += row[i] * a[i, j]
+                if abs(alpha) > largest:
+                    q, largest = j, abs(alpha)
+        if q >= 0:
+            is_basic[basis[r]] = False
+            is_basic[q] = True
+            basis[r] = q
+
+
+@njit(nogil=True, cache=True)
+def _solve(a, b, c, basis, cold_basis, n_real, warm, max_iter, max_etas, tol, x):
+    """ Two-phase revised simplex. Starts from `basis` if `warm` and it
+        is feasible, otherwise from `cold_basis`, in which the columns
+        from `n_real` on are artificial variables, which phase 1
+        minimises the sum of. Writes the solution to `x` and returns
+        the status and number of iterations.
+    """
+    m = len(b)
+    x_b = np.empty(m)
+    if warm:
+        lu = np.empty((m, m))
+        pivots = np.empty(m, dtype=np.int64)
+        if _factorise(a, basis, b, lu, pivots, x_b) != 0:
+            warm = False
+        else:
+            for i in range(m):
+                if x_b[i] < -tol:
+                    warm = False
+    if not warm:
+        basis[:] = cold_basis
+
+    nit = 0
+    status = OPTIMAL
+    artificial = False
+    for i in range(m):
+        artificial |= basis[i] >= n_real
+    if artificial:
+        phase_1 = np.zeros(a.shape[1])
+        phase_1[n_real:] = 1.0
+        status, nit = _simplex(a, b, phase_1, basis, n_real, x_b, max_iter, max_etas, tol)
+        infeasibility = 0.0
+        for i in range(m):
+            if basis[i] >= n_real:
+                infeasibility += x_b[i]
+        if status == OPTIMAL and infeasibility > tol * (1.0 + np.abs(b).max()):
+            status = INFEASIBLE
+        if status == OPTIMAL:
+            _drive_out_artificials(a, b, basis, n_real, tol)
+
+    if status == OPTIMAL:
+        status, phase_2 = _simplex(a, b, c, basis, n_real, x_b, max_iter - nit, max_etas, tol)
+        nit += phase_2
+
+    x[:] = 0.0
+    for i in range(m):
+        x[basis[i]] = x_b[i]
+    return status, nit
+
+
+def _constraints(a, b, n, name):
+    if a is None:
+        return np.empty((0, n)), np.empty(0)
+    a = np.asarray(a, dtype=np.float64).reshape(-1, n)
+    b = np.asarray(b, dtype=np.float64).reshape(-1)
+    if len(a) != len(b):
+        raise ValueError(f'A_{name} has {len(a)} rows but b_{name} has {len(b)} entries')
+    return a, b
+
+
+def revised_simplex(c, A_ub=None, b_ub=None, A_eq=None, b_eq=None, basis=None,
+                    max_iter=10_000, max_etas=64, tol=1e-9):
+    """ Minimises `c @ x` subject to `A_ub @ x <= b_ub`, `A_eq @ x ==
+        b_eq` and `x >= 0`, as `scipy.optimize.linprog` does, by the
+        revised simplex method. Returns a `LinearProgramResult`, with
+        `status` as in `MESSAGES`.
+
+        The columns of the basis are the variables, then a slack
+        variable for each inequality (in that order); the result's
+        `basis` can warm-start a problem with the same constraints but
+        different costs (eg. tomorrow's portfolio), or slightly
+        different bounds, if it's still feasible for it. Otherwise it
+        starts from the slacks, with artificial variables for the rows
+        they can't satisfy, and first finds a feasible point.
+
+        A redundant equality (eg. a multiple of another) keeps its
+        artificial variable in the basis, at zero, as index `n + m_ub +
+        i` for row `i` of the constraints (the inequalities, then the
+        equalities), so the basis still round-trips.
+
+        The basis matrix is factorised with the LU kernels of the linear
+        systems lesson, and updated in product form, refactorising after
+        `max_etas` updates (0 refactorises every pivot).
+    """
+    c = np.asarray(c, dtype=np.float64).reshape(-1)
+    n = len(c)
+    A_ub, b_ub = _constraints(A_ub, b_ub, n, 'ub')
+    A_eq, b_eq = _constraints(A_eq, b_eq, n, 'eq')
+    m_ub = len(A_ub)
+    m = m_ub + len(A_eq)
+    n_real = n + m_ub
+
+    # equality form, with a slack for each inequality, and b >= 0
+    a = np.zeros((m, n_real))
+    a[:m_ub, :n] = A_ub
+    a[m_ub:, :n] = A_eq
+    a[np.arange(m_ub), n + np.arange(m_ub)] = 1.0
+    b = np.concatenate([b_ub, b_eq])
+    negative = b < 0
+    a[negative] *= -1.0
+    b[negative] *= -1.0
+
+    # the slacks which are feasible start in the basis, and artificial
+    # variables for the other rows
+    needs_artificial = negative.copy()
+    needs_artificial[m_ub:] = True
+    rows = np.flatnonzero(needs_artificial)
+    artificials = np.zeros((m, len(rows)))
+    artificials[rows, np.arange(len(rows))] = 1.0
+    a = np.ascontiguousarray(np.hstack([a, artificials]))
+    cold_basis = n + np.arange(m)
+    cold_basis[rows] = n_real + np.arange(len(rows))
+
+    # the artificial variable of each row, n_real + row outside, or its
+    # slack if it has none (both are that row of the identity)
+    artificial_columns = n + np.arange(m)
+    artificial_columns[rows] = n_real + np.arange(len(rows))
+    if basis is not None:
+        given = np.array(basis, dtype=np.int64)
+        basis = given.copy()
+        valid = basis.shape == (m,) and basis.min(initial=0) >= 0 and basis.max(initial=0) < n_real + m
+        if valid:
+            artificial = basis >= n_real
+            basis[artificial] = artificial_columns[basis[artificial] - n_real]
+        if not valid or len(np.unique(basis)) != m:
+            raise ValueError(f'basis must be {m} different indices of variables, slacks '
+                             f'or artificial variables, got {given}')
+    warm = basis is not None
+    basis = cold_basis.copy() if basis is None else basis
+
+    costs = np.zeros(a.shape[1])
+    costs[:n] = c
+    x = np.empty(a.shape[1])
+    status, nit = _solve(a, b, costs, basis, cold_basis, n_real, warm, max_iter, max_etas, tol, x)
+
+    artificial = basis >= n_real
+    basis[artificial] = n_real + rows[basis[artificial] - n_real]
+    return LinearProgramResult(x[:n], c @ x[:n], status, nit, basis)
+
+
+if __name__ == '__main__':
+    import time
+
+    import scipy.optimize
+
+    def random_lp(n_rows, n_columns, rng):
+        """ Maximise returns subject to random non-negative resource
+            limits, and a few equality constraints which some point x0
+            satisfies, so it's feasible.
+        """
+        A_ub = rng.uniform(0.0, 1.0, (n_rows, n_columns))
+        b_ub = rng.uniform(0.5, 1.0, n_rows) * n_columns / 4
+        c = -rng.uniform(0.5, 1.0, n_columns)
+        A_eq = rng.uniform(0.0, 1.0, (max(n_rows // 20, 1), n_columns))
+        x0 = rng.uniform(0.0, 0.2, n_columns)
+        return c, A_ub, b_ub, A_eq, A_eq @ x0
+
+    def best_of(fn, repeats=3):
+        fn()  # force compile
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    rng = np.random.RandomState(0)
+    print(f'{"rows x columns":>16} {"highs":>9} {"refactorised":>13} {"eta updates":>12} {"warm start":>11}')
+    for n_rows, n_columns in [(10, 20), (25, 50), (50, 100), (100, 200), (200, 400), (400, 800), (800, 1600)]:
+        c, A_ub, b_ub, A_eq, b_eq = random_lp(n_rows, n_columns, rng)
+        expected, t_highs = best_of(lambda: scipy.optimize.linprog(c, A_ub, b_ub, A_eq, b_eq, method='highs'))
+        _, t_refactorised = best_of(lambda: revised_simplex(c, A_ub, b_ub, A_eq, b_eq, max_etas=0))
+        result, t_eta = best_of(lambda: revised_simplex(c, A_ub, b_ub, A_eq, b_eq))
+        assert result.status == OPTIMAL and abs(result.fun - expected.fun) <= 1e-8 * abs(expected.fun)
+
+        # the next day's returns, from today's basis
+        c_next = c * rng.uniform(0.95, 1.05, n_columns)
+        warm, t_warm = best_of(lambda: revised_simplex(c_next, A_ub, b_ub, A_eq, b_eq, basis=result.basis))
+        cold = revised_simplex(c_next, A_ub, b_ub, A_eq, b_eq)
+        assert abs(warm.fun - cold.fun) <= 1e-8 * abs(cold.fun)
+
+        print(f'{f"{n_rows} x {n_columns}":>16} {t_highs * 1e3:7.2f}ms {t_refactorised * 1e3:11.2f}ms '
+              f'{t_eta * 1e3:10.2f}ms {t_warm * 1e3:9.2f}ms   ({result.nit} pivots cold, {warm.nit} warm)')
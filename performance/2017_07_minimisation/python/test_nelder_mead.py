@@ -0,0 +1,99 @@
+import numpy as np
+from numba import njit
+from numpy.testing import assert_allclose
+import pytest
+import scipy.optimize
+
+from .nelder_mead import nelder_mead, nelder_mead_batch
+
+
+@njit
+def rosenbrock(x, data):
+    total = 0.0
+    for i in range(len(x) - 1):
+        total += 100.0 * (x[i + 1] - x[i] ** 2) ** 2 + (1.0 - x[i]) ** 2
+    return total
+
+
+@njit
+def shifted_quadratic(x, centre):
+    return np.sum((x - centre) ** 2)
+
+
+@njit
+def line_error(params, observations):
+    """ Squared error of a straight line against observations at t = 0, 1, 2, ... """
+    total = 0.0
+    for t in range(len(observations)):
+        total += (params[0] + params[1] * t - observations[t]) ** 2
+    return total
+
+
+def test_rosenbrock():
+    result = nelder_mead(rosenbrock, [-1.2, 1.0], xatol=1e-8, fatol=1e-8)
+    assert result.success
+    assert_allclose(result.x, [1.0, 1.0], atol=1e-6)
+    assert result.fun < 1e-12
+
+
+@pytest.mark.parametrize('adaptive', [True, False])
+@pytest.mark.parametrize('x0', [[-1.2, 1.0], [-1.2, 1.0, -0.5, 0.8], [0.3, -0.7, 1.5, 0.2, -1.1]])
+def test_same_as_scipy(adaptive, x0):
+    """ The same steps as scipy, so the same result (scipy counts
+        iterations from one).
+    """
+    result = nelder_mead(rosenbrock, x0, adaptive=adaptive)
+    expected = scipy.optimize.minimize(rosenbrock, x0, args=(None,), method='Nelder-Mead',
+                                       options={'adaptive': adaptive})
+    assert_allclose(result.x, expected.x)
+    assert result.fun == expected.fun
+    assert (result.nit + 1, result.nfev, result.success) == (expected.nit, expected.nfev, expected.success)
+
+
+def test_adaptive_in_higher_dimensions():
+    x0 = np.zeros(12)
+    centre = np.arange(12.0)
+    adaptive = nelder_mead(shifted_quadratic, x0, centre, max_iter=20_000, max_fev=20_000)
+    standard = nelder_mead(shifted_quadratic, x0, centre, max_iter=20_000, max_fev=20_000, adaptive=False)
+    assert_allclose(adaptive.x, centre, atol=1e-3)
+
+    # the standard coefficients let the simplex collapse, far from the minimum
+    assert adaptive.fun < 1e-6
+    assert standard.fun > 1.0
+
+
+def test_limits():
+    result = nelder_mead(rosenbrock, [-1.2, 1.0], max_iter=10)
+    assert not result.success
+    assert result.nit == 10
+
+    result = nelder_mead(rosenbrock, [-1.2, 1.0], max_fev=20)
+    assert not result.success
+    assert 20 <= result.nfev < 25
+
+
+def test_batch():
+    rng = np.random.RandomState(0)
+    lines = rng.standard_normal((50, 2))
+    observations = lines[:, :1] + lines[:, 1:] * np.arange(10) + 0.01 * rng.standard_normal((50, 10))
+
+    result = nelder_mead_batch(line_error, [0.0, 0.0], observations, xatol=1e-8, fatol=1e-10)
+    assert result.success.all()
+    assert result.x.shape == (50, 2)
+    for i in range(50):
+        one = nelder_mead(line_error, [0.0, 0.0], observations[i], xatol=1e-8, fatol=1e-10)
+        assert_allclose(result.x[i], one.x)
+        assert (result.fun[i], result.nfev[i]) == (one.fun, one.nfev)
+
+        least_squares = np.polyfit(np.arange(10), observations[i], 1)[::-1]
+        assert_allclose(result.x[i], least_squares, atol=1e-6)
+
+
+def test_batch_starting_points():
+    centres = np.arange(12.0).reshape(4, 3)
+    result = nelder_mead_batch(shifted_quadratic, centres + 1.0, centres)
+    assert_allclose(result.x, centres, atol=1e-3)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
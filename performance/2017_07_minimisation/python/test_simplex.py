@@ -0,0 +1,136 @@
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+import pytest
+import scipy.optimize
+
+from .simplex import revised_simplex, OPTIMAL, ITERATION_LIMIT, INFEASIBLE, UNBOUNDED
+
+
+def random_lp(n_rows, n_columns, seed=0):
+    rng = np.random.RandomState(seed)
+    A_ub = rng.uniform(0.0, 1.0, (n_rows, n_columns))
+    b_ub = rng.uniform(0.5, 1.0, n_rows) * n_columns / 4
+    c = -rng.uniform(0.5, 1.0, n_columns)
+    A_eq = rng.uniform(0.0, 1.0, (3, n_columns))
+    return c, A_ub, b_ub, A_eq, A_eq @ rng.uniform(0.0, 0.2, n_columns)
+
+
+def assert_same_as_linprog(result, *problem):
+    expected = scipy.optimize.linprog(*problem, method='highs')
+    assert result.status == OPTIMAL
+    assert result.fun == pytest.approx(expected.fun, rel=1e-9)
+
+    c, A_ub, b_ub, A_eq, b_eq = problem + (None,) * (5 - len(problem))
+    assert (result.x >= -1e-9).all()
+    if A_ub is not None:
+        assert (np.asarray(A_ub) @ result.x <= np.asarray(b_ub) + 1e-9).all()
+    if A_eq is not None:
+        assert_allclose(np.asarray(A_eq) @ result.x, b_eq, atol=1e-9)
+
+
+def test_small():
+    # the textbook example: maximise 3x + 5y
+    problem = ([-3, -5], [[1, 0], [0, 2], [3, 2]], [4, 12, 18])
+    result = revised_simplex(*problem)
+    assert_allclose(result.x, [2, 6])
+    assert result.fun == pytest.approx(-36)
+    assert_same_as_linprog(result, *problem)
+
+
+@pytest.mark.parametrize('max_etas', [0, 1, 5, 64])
+@pytest.mark.parametrize('shape', [(10, 20), (40, 30), (60, 120)])
+def test_random(shape, max_etas):
+    problem = random_lp(*shape)
+    assert_same_as_linprog(revised_simplex(*problem, max_etas=max_etas), *problem)
+
+
+def test_negative_bounds():
+    # x + y >= 2, written as -x - y <= -2, needs phase 1
+    problem = ([1, 2], [[-1, -1], [1, -1]], [-2, 1])
+    result = revised_simplex(*problem)
+    assert_allclose(result.x, [1.5, 0.5])
+    assert_same_as_linprog(result, *problem)
+
+
+def test_redundant_equalities():
+    A_eq = [[1, 1, 1], [2, 2, 2], [1, -1, 0]]
+    problem = ([1, 2, 3], None, None, A_eq, [3, 6, 0])
+    result = revised_simplex(*problem)
+    assert_allclose(result.x, [1.5, 1.5, 0])
+    assert_same_as_linprog(result, *problem)
+
+    # the artificial variable of one of the first two rows stays in the
+    # basis, as 3 + its row
+    assert result.basis.max() in (3, 4)
+    warm = revised_simplex(*problem, basis=result.basis)
+    assert warm.nit == 0
+    assert_array_equal(warm.basis, result.basis)
+    assert_allclose(warm.x, result.x)
+
+    cheaper = revised_simplex([2, 1, 3], None, None, A_eq, [3, 6, 0], basis=result.basis)
+    assert_same_as_linprog(cheaper, [2, 1, 3], None, None, A_eq, [3, 6, 0])
+
+
+def test_degenerate():
+    """ Beale's example, which cycles forever with the most negative
+        reduced cost and no tie-breaking.
+    """
+    c = [-0.75, 150, -0.02, 6]
+    A_ub = [[0.25, -60, -0.04, 9], [0.5, -90, -0.02, 3], [0, 0, 1, 0]]
+    result = revised_simplex(c, A_ub, [0, 0, 1])
+    assert result.status == OPTIMAL
+    assert result.fun == pytest.approx(-0.05)
+
+
+def test_infeasible():
+    result = revised_simplex([1, 1], [[1, 1]], [1], [[1, 0]], [2])
+    assert result.status == INFEASIBLE
+
+
+def test_unbounded():
+    result = revised_simplex([-1, 0], [[0, 1]], [1])
+    assert result.status == UNBOUNDED
+
+
+def test_iteration_limit():
+    result = revised_simplex(*random_lp(40, 80), max_iter=3)
+    assert result.status == ITERATION_LIMIT
+    assert result.nit == 3
+
+
+def test_warm_start():
+    c, A_ub, b_ub, A_eq, b_eq = random_lp(60, 120)
+    today = revised_simplex(c, A_ub, b_ub, A_eq, b_eq)
+
+    c_next = c * np.random.RandomState(1).uniform(0.95, 1.05, len(c))
+    cold = revised_simplex(c_next, A_ub, b_ub, A_eq, b_eq)
+    warm = revised_simplex(c_next, A_ub, b_ub, A_eq, b_eq, basis=today.basis)
+    assert_same_as_linprog(warm, c_next, A_ub, b_ub, A_eq, b_eq)
+    assert warm.nit < cold.nit
+
+    # the same problem is already solved
+    assert revised_simplex(c, A_ub, b_ub, A_eq, b_eq, basis=today.basis).nit == 0
+
+
+def test_infeasible_warm_start():
+    """ A basis which isn't feasible any more falls back to a cold start. """
+    c, A_ub, b_ub, A_eq, b_eq = random_lp(30, 40)
+    basis = revised_simplex(c, A_ub, b_ub, A_eq, b_eq).basis
+    b_tight = b_ub * 0.4
+    assert_same_as_linprog(revised_simplex(c, A_ub, b_tight, A_eq, b_eq, basis=basis), c, A_ub, b_tight, A_eq, b_eq)
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        revised_simplex([1, 1], [[1, 1]], [1, 2])
+    with pytest.raises(ValueError):
+        revised_simplex([1, 1], [[1, 1]], [1], basis=[0, 1])
+    with pytest.raises(ValueError):
+        revised_simplex([1, 1], [[1, 1]], [1], basis=[5])
+    with pytest.raises(ValueError):
+        # the artificial variable of the first row is its slack
+        revised_simplex([1, 1], [[1, 1], [1, 0]], [1, 1], basis=[2, 4])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -112,7 +112,7 @@ def lu_5(A):
     return lower, upper
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def lu_parallel(x):
     upper = np.asfortranarray(np.zeros(x.shape, dtype=np.float64))
     n = len(x)
@@ -137,7 +137,7 @@ def lu_parallel(x):
     return lower, upper
 
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def lu_parallel_2(x):
     upper = np.asfortranarray(np.zeros(x.shape, dtype=np.float64))
     n = len(x)
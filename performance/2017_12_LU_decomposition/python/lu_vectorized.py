@@ -5,7 +5,7 @@ import numpy as np
 @guvectorize(
     ['void(float64[:, :], int64, int64, float64[:, :], float64[:, :])'],
     '(x, y), (), (), (m, n)->(m, n)',
-    target='cpu', nopython=True
+    target='cpu', nopython=True, cache=True
 )
 def upper_inner(x, i, n, lower, upper):
     for k in range(i, n):
@@ -19,7 +19,7 @@ def upper_inner(x, i, n, lower, upper):
 @guvectorize(
     ['void(float64[:, :], int64, int64, float64[:, :], float64[:, :])'],
     '(x, y), (), (), (m, n)->(m, n)',
-    target='cpu', nopython=True
+    target='cpu', nopython=True, cache=True
 )
 def lower_inner(x, i, n, lower, upper):
     for k in range(i + 1, n):
@@ -48,7 +48,7 @@ def lu_vectorized(x):
 @guvectorize(
     ['void(float64[:, :], float64[:, :], float64[:, :])'],
     '(x, y), (m, n)->(m, n)',
-    target='cpu', nopython=True
+    target='cpu', nopython=True, cache=True
 )
 def inner(x, lower, upper):
     n = len(x)
@@ -1,22 +1,23 @@
 
 import time
 
-import matplotlib.pyplot as plt
 from numba import njit
 import numpy as np
 from numpy.testing import assert_array_almost_equal
-import pandas as pd
 import numba
 
-from doolittle import lu_decomp
-from lu_smorgasbord import (
+from .doolittle import lu_decomp
+from .lu_smorgasbord import (
     lu_0, lu_1, lu_2, lu_3, lu_4, lu_5,
     lu_parallel, lu_parallel_2
 )
-from lu_c_fortran import lu_decomp_c_fortran
-from lu_vectorized import lu_vectorized, lu_vectorized_experimental
+from .lu_c_fortran import lu_decomp_c_fortran
+from .lu_vectorized import lu_vectorized, lu_vectorized_experimental
 
 if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
     np.random.seed(0)
 
     lu_decomp_python = lu_decomp
@@ -36,7 +36,55 @@ def gen_data():
     return pd.concat(results)
 
 
+def _build_rows(start, stop, ids, dates, data):
+    """ Rows [start, stop) of the long-format frame, in the same
+        date-major order as `gen_data`: row `r` is identifier
+        `r % len(ids)` on date `r // len(ids)`.
+    """
+    rows = np.arange(start, stop)
+    codes, date_idx = rows % len(ids), rows // len(ids)
+
+    return pd.DataFrame({
+        'identifier': pd.Categorical.from_codes(codes, categories=ids),
+        'value': data[codes],
+        'date': dates.values[date_idx],
+    }, index=pd.RangeIndex(start, stop))
+
+
+def gen_data_chunks(n_identifiers=3000, n_dates=3001, chunk_size=1 << 20, seed=None):
+    """ Yields the `gen_data` frame as DataFrames of at most
+        `chunk_size` rows, so data sets larger than memory can be
+        written out block by block.
+
+        Each chunk is built directly from integer row numbers, with the
+        identifiers stored as categorical codes, rather than by
+        concatenating a DataFrame per date.
+    """
+    ids = pd.Index(gen_identifiers(n_identifiers))
+    dates = gen_dates(n_dates - 1)  # which includes both ends
+    data = np.random.RandomState(seed).random_sample(n_identifiers)
+
+    n_rows = len(ids) * len(dates)
+    for start in range(0, n_rows, chunk_size):
+        yield _build_rows(start, min(start + chunk_size, n_rows), ids, dates, data)
+
+
+def gen_data_fast(n_identifiers=3000, n_dates=3001, seed=None):
+    """ The same data as `gen_data` in a single vectorised pass, for
+        `n_identifiers` identifiers on `n_dates` dates (3001 in
+        `gen_data`), equivalent to `np.tile`-ing the identifiers and
+        values and `np.repeat`-ing the dates, with `identifier` as a
+        categorical column.
+    """
+    ids = pd.Index(gen_identifiers(n_identifiers))
+    dates = gen_dates(n_dates - 1)  # which includes both ends
+    data = np.random.RandomState(seed).random_sample(n_identifiers)
+
+    return _build_rows(0, len(ids) * len(dates), ids, dates, data)
+
+
 if __name__ == '__main__':
-    df = gen_data()
+    df = gen_data_fast()
+    df['identifier'] = df['identifier'].astype(object)
     print(f'DataFrame: {df.shape}')
-    df.to_hdf('initial.h5', key='df')
\ No newline at end of file
+    df.to_hdf('initial.h5', key='df')
@@ -0,0 +1,570 @@
+
+import base64
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .encoders import Encoded, encode, decode, column_values, select_codecs
+
+
+# File layout:
+#
+#   MAGIC | chunk | chunk | ... | footer (json) | footer length (u8) | MAGIC
+#
+# Rows are written in row groups of up to `chunk_rows` rows, with one
+# chunk per column in each group. Every chunk starts on an ALIGNMENT
+# byte boundary, so uncompressed chunks can be viewed straight out of
+# the memory map as arrays of their dtype. The footer holds each
+# column's dtype and dictionary, and each chunk's offset, length, row
+# count and encoding, plus a zone map used to skip chunks when
+# filtering: the min and max of the chunk, and for dictionary encoded
+# columns a bitmap of which codes it contains.
+MAGIC = b'COLF0001'
+ALIGNMENT = 64
+FOOTER_LENGTH = struct.Struct('<Q')
+
+
+def encode_chunk(values, codec='raw', compression=None, level=1):
+    """ Encodes a 1-d array for storage, returning its chunk metadata
+        (without the offset) and the bytes to write.
+
+        With the `raw` codec and no compression the bytes are the array
+        itself, which a reader can memory map without copying.
+    """
+    encoded = encode(values, codec)
+    payload = encoded.payload
+    if compression == 'zlib':
+        payload = np.frombuffer(zlib.compress(payload, level), dtype=np.uint8)
+    elif compression is not None:
+        raise ValueError(f'Unknown compression: {compression}')
+
+    meta = {
+        'count': encoded.count,
+        'dtype': encoded.dtype,
+        'codec': encoded.codec,
+        'params': list(encoded.params),
+        'compression': compression,
+        'length': len(payload),
+    }
+    return meta, payload
+
+
+def decode_chunk(meta, payload):
+    """ The inverse of `encode_chunk`, given the chunk's bytes; returns
+        a zero-copy view of `payload` where possible.
+    """
+    if meta['compression'] == 'zlib':
+        payload = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+
+    if meta['codec'] == 'raw':
+        return payload.view(meta['dtype'])
+
+    return decode(Encoded(meta['codec'], meta['dtype'], meta['count'], tuple(meta['params']), payload))
+
+
+def zone_map(values):
+    """ The min and max of a chunk, as JSON numbers (datetimes as
+        int64), or None if it has no non-null values.
+    """
+    if values.dtype.kind == 'f':
+        values = values[~np.isnan(values)]
+    elif values.dtype.kind == 'M':
+        values = values.view(np.int64)
+
+    if not len(values):
+        return None, None
+    return values.min().item(), values.max().item()
+
+
+def pack_codes(codes):
+    """ A base64 bitmap of the dictionary codes present in a chunk,
+        without the -1 of missing values.
+    """
+    codes = codes[codes >= 0]
+    present = np.zeros(codes.max() + 1 if len(codes) else 0, dtype=bool)
+    present[codes] = True
+    return base64.b64encode(np.packbits(present, bitorder='little')).decode()
+
+
+def has_codes(packed, codes):
+    """ Whether any of `codes` is set in a `pack_codes` bitmap. """
+    bits = np.frombuffer(base64.b64decode(packed), dtype=np.uint8)
+    codes = codes[codes < 8 * len(bits)]
+    return bool(np.any(bits[codes >> 3] >> (codes & 7) & 1))
+
+
+def build_chunk(values, codec='raw', compression=None, level=1, dictionary=False):
+    """ `encode_chunk`, with the chunk's zone map added to its metadata. """
+    chunk, payload = encode_chunk(values, codec, compression, level)
+    chunk['min'], chunk['max'] = zone_map(values)
+    if dictionary:
+        chunk['codes'] = pack_codes(values)
+    return chunk, payload
+
+
+def _dictionary_to_json(categories):
+    if categories.dtype.kind == 'M':
+        return {'dtype': categories.dtype.str, 'values': categories.asi8.tolist()}
+    return {'dtype': None, 'values': categories.tolist()}
+
+
+def _dictionary_from_json(dictionary):
+    if dictionary['dtype'] is None:
+        return pd.Index(dictionary['values'])
+    return pd.Index(np.array(dictionary['values'], dtype=np.int64).view(dictionary['dtype']))
+
+
+class TableWriter:
+    """ Writes DataFrames with the same columns to a chunked columnar
+        file, one row group at a time, so tables larger than memory can
+        be written from a generator such as `gen_data_chunks`.
+
+        Categorical and string columns are dictionary encoded: their
+        codes are stored in the chunks and their categories once, in the
+        footer. New categories seen in later frames are appended to the
+        dictionary.
+
+        `codecs` maps column names to an `encoders` codec, or is 'auto'
+        to choose a codec per column from the first frame; by default
+        every column is written raw.
+    """
+
+    def __init__(self, path, chunk_rows=1 << 16, codecs=None, compression=None, level=1):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.codecs = codecs or {}
+        self.compression = compression
+        self.level = level
+
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._columns = None
+        self._n_rows = 0
+
+    def _init_columns(self, df):
+        if self.codecs == 'auto':
+            self.codecs = select_codecs(df)
+
+        self._columns = []
+        for name in df.columns:
+            column = df[name]
+            categorical = isinstance(column.dtype, pd.CategoricalDtype) or column.dtype.kind in 'OUS' \
+                or isinstance(column.dtype, pd.StringDtype)
+            self._columns.append({
+                'name': name,
+                'dtype': 'category' if categorical else column.dtype.str,
+                'dictionary': pd.Index([]) if categorical else None,
+                'chunks': [],
+            })
+
+    def _column_values(self, column, meta):
+        if meta['dictionary'] is None:
+            return column_values(column)
+
+        if not isinstance(column.dtype, pd.CategoricalDtype):
+            column = column.astype('category')
+
+        dictionary = meta['dictionary']
+        if not column.cat.categories.equals(dictionary):
+            new = column.cat.categories.difference(dictionary, sort=False)
+            meta['dictionary'] = dictionary = dictionary.append(new) if len(dictionary) else new
+            column = column.cat.set_categories(dictionary)
+
+        return column.cat.codes.to_numpy()
+
+    def _append(self, meta, chunk, payload):
+        """ Writes a chunk's payload, aligned, and adds it to the index. """
+        offset = self._file.tell()
+        padding = -offset % ALIGNMENT
+        self._file.write(b'\0' * padding)
+        self._file.write(memoryview(payload))
+
+        chunk['offset'] = offset + padding
+        meta['chunks'].append(chunk)
+
+    def _split(self, df):
+        """ Yields, for each row group of `df` in turn, each column's
+            metadata and the array to store with the arguments for
+            `build_chunk`. Dictionaries are updated as it goes, so this
+            runs in order on the calling thread.
+        """
+        if self._columns is None:
+            self._init_columns(df)
+
+        if [c['name'] for c in self._columns] != list(df.columns):
+            raise ValueError('Frames must all have the same columns')
+
+        for start in range(0, len(df), self.chunk_rows):
+            rows = df.iloc[start:start + self.chunk_rows]
+            for meta in self._columns:
+                values = self._column_values(rows[meta['name']], meta)
+                codec = self.codecs.get(meta['name'], 'raw')
+                yield meta, (values, codec, self.compression, self.level, meta['dictionary'] is not None)
+            self._n_rows += len(rows)
+
+    def write(self, df):
+        for meta, args in self._split(df):
+            self._append(meta, *build_chunk(*args))
+
+    def close(self):
+        if self._file.closed:
+            return
+
+        columns = []
+        for meta in self._columns or []:
+            meta = dict(meta)
+            if meta['dictionary'] is not None:
+                meta['dictionary'] = _dictionary_to_json(meta['dictionary'])
+            columns.append(meta)
+
+        footer = json.dumps({'n_rows': self._n_rows, 'columns': columns}).encode()
+        self._file.write(footer)
+        self._file.write(FOOTER_LENGTH.pack(len(footer)))
+        self._file.write(MAGIC)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(path, frames, **kwargs):
+    """ Writes a DataFrame, or an iterable of DataFrames, to `path`. """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    with TableWriter(path, **kwargs) as writer:
+        for df in frames:
+            writer.write(df)
+
+
+class Column:
+    """ A lazily decoded column of a `Table`.
+
+        Nothing is read until it is indexed or iterated; uncompressed
+        chunks are then views of the memory-mapped file, and encoded
+        chunks are decoded one at a time as they are needed.
+    """
+
+    def __init__(self, table, meta):
+        self.name = meta['name']
+        self._table = table
+        self._meta = meta
+        self._starts = np.cumsum([0] + [c['count'] for c in meta['chunks']])
+        self.dictionary = None if meta['dictionary'] is None else _dictionary_from_json(meta['dictionary'])
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    @property
+    def n_chunks(self):
+        return len(self._meta['chunks'])
+
+    def chunk(self, idx):
+        """ The values (or dictionary codes) of chunk `idx`. """
+        meta = self._meta['chunks'][idx]
+        payload = self._table._mmap[meta['offset']:meta['offset'] + meta['length']]
+        return decode_chunk(meta, payload)
+
+    def chunks(self, start=0, stop=None):
+        """ Yields (chunk start row, values) for the chunks overlapping
+            rows [start, stop).
+        """
+        stop = len(self) if stop is None else stop
+        first = np.searchsorted(self._starts, start, side='right') - 1
+        for idx in range(max(first, 0), self.n_chunks):
+            if self._starts[idx] >= stop:
+                break
+            yield int(self._starts[idx]), self.chunk(idx)
+
+    def codes(self, start=0, stop=None):
+        """ Rows [start, stop) of the stored array, which for dictionary
+            encoded columns are the category codes. A single chunk is
+            returned without copying.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        start = min(start, stop)
+        parts = [values[max(start - s, 0):stop - s] for s, values in self.chunks(start, stop)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.empty(0, dtype=np.dtype(self._meta['chunks'][0]['dtype']) if self.n_chunks else np.int64)
+        return np.concatenate(parts)
+
+    def read(self, start=0, stop=None):
+        """ Rows [start, stop) as a pandas Series, decoding categories. """
+        values = self.codes(start, stop)
+        if self.dictionary is not None:
+            values = pd.Categorical.from_codes(values, categories=self.dictionary)
+        start = min(start, len(self))
+        return pd.Series(values, name=self.name, index=pd.RangeIndex(start, start + len(values)), copy=False)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice) and item.step in (None, 1):
+            start, stop, _ = item.indices(len(self))
+            return self.codes(start, stop)
+        raise TypeError('Columns only support contiguous slices')
+
+    def searchsorted(self, value, side='left'):
+        """ `np.searchsorted` over a column stored in sorted order, such
+            as `date` in `gen_data`, which decodes only the chunks it
+            probes: the first value of each is checked to find the chunk,
+            then the chunk itself is searched.
+        """
+        lo, hi = 0, self.n_chunks
+        while lo < hi:
+            mid = (lo + hi) // 2
+            first = self.chunk(mid)[0]
+            if first < value or (side == 'right' and first == value):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return 0
+
+        values = self.chunk(lo - 1)
+        return int(self._starts[lo - 1]) + int(np.searchsorted(values, value, side=side))
+
+    def _stored(self, values):
+        """ `values` as the numbers held in the zone maps: dictionary
+            codes (-1 if not in the dictionary), int64 for datetimes.
+        """
+        if self.dictionary is not None:
+            return self.dictionary.get_indexer(pd.Index(values))
+
+        values = np.asarray(values, dtype=self._meta['chunks'][0]['dtype'])
+        return values.view(np.int64) if values.dtype.kind == 'M' else values
+
+    def prune(self, condition, keep=None):
+        """ A boolean per chunk, False where the zone map shows no row of
+            the chunk can match `condition` (see `Table.query`). Only the
+            chunks still True in `keep` are checked.
+        """
+        keep = np.ones(self.n_chunks, dtype=bool) if keep is None else keep.copy()
+        chunks = self._meta['chunks']
+        if not chunks:
+            return keep
+
+        dtype = np.float64 if np.dtype(chunks[0]['dtype']).kind == 'f' else np.int64
+        empty = np.array([c['min'] is None for c in chunks], dtype=bool)
+        lows = np.array([c['min'] or 0 for c in chunks], dtype=dtype)
+        highs = np.array([c['max'] or 0 for c in chunks], dtype=dtype)
+        keep &= ~empty
+
+        if self.dictionary is not None:
+            if isinstance(condition, tuple):
+                codes = np.flatnonzero(self._category_mask(condition))
+            else:
+                codes = np.sort(self._stored(list(condition)))
+                codes = codes[codes >= 0]
+
+            # the range of codes in each chunk, then its bitmap
+            keep &= np.searchsorted(codes, lows, 'left') < np.searchsorted(codes, highs, 'right')
+            for idx in np.flatnonzero(keep):
+                keep[idx] = has_codes(chunks[idx]['codes'], codes)
+            return keep
+
+        if isinstance(condition, tuple):
+            low, high = condition
+            if low is not None:
+                keep &= highs >= self._stored([low])[0]
+            if high is not None:
+                keep &= lows <= self._stored([high])[0]
+            return keep
+
+        values = np.sort(self._stored(list(condition)))
+        return keep & (np.searchsorted(values, lows, 'left') < np.searchsorted(values, highs, 'right'))
+
+    def _category_mask(self, condition):
+        low, high = condition
+        mask = np.ones(len(self.dictionary), dtype=bool)
+        if low is not None:
+            mask &= self.dictionary >= low
+        if high is not None:
+            mask &= self.dictionary <= high
+        return mask
+
+    def matches(self, idx, condition):
+        """ A boolean per row of chunk `idx`, True where it matches
+            `condition`.
+        """
+        values = self.chunk(idx)
+        if isinstance(condition, tuple) and self.dictionary is not None:
+            # missing values have code -1, which mustn't index the mask
+            return self._category_mask(condition)[values] & (values >= 0)
+
+        if isinstance(condition, tuple):
+            low, high = condition
+            mask = np.ones(len(values), dtype=bool)
+            if low is not None:
+                mask &= values >= np.asarray(low, dtype=values.dtype)
+            if high is not None:
+                mask &= values <= np.asarray(high, dtype=values.dtype)
+            return mask
+
+        codes = self._stored(list(condition))
+        return np.isin(values, codes[codes >= 0] if self.dictionary is not None else codes)
+
+
+class Table:
+    """ A read-only, memory-mapped chunked columnar file.
+
+        >>> with Table('data.col') as table:
+        ...     dates = table['date']
+        ...     start = dates.searchsorted(np.datetime64('2019-01-01'))
+        ...     stop = dates.searchsorted(np.datetime64('2019-02-01'))
+        ...     df = table.read(['identifier', 'value'], start, stop)
+
+        Only the footer is read when the table is opened; the pages
+        holding each chunk are read by the OS when it is first used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.empty(0, np.uint8)
+
+        tail = len(FOOTER_LENGTH.pack(0)) + len(MAGIC)
+        if bytes(self._mmap[:len(MAGIC)]) != MAGIC or bytes(self._mmap[-len(MAGIC):]) != MAGIC:
+            raise ValueError(f'{path} is not a columnar table')
+
+        footer_length, = FOOTER_LENGTH.unpack(bytes(self._mmap[-tail:-len(MAGIC)]))
+        footer = json.loads(bytes(self._mmap[-tail - footer_length:-tail]))
+
+        self.n_rows = footer['n_rows']
+        self._columns = {meta['name']: Column(self, meta) for meta in footer['columns']}
+        self._n_groups = len(footer['columns'][0]['chunks']) if footer['columns'] else 0
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def read(self, columns=None, start=0, stop=None):
+        """ Rows [start, stop) of `columns` as a DataFrame. """
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({name: self[name].read(start, stop) for name in columns}, copy=False)
+
+    def nbytes(self, columns=None, groups=None):
+        """ The bytes stored for `columns` in row `groups`. """
+        columns = self.columns if columns is None else columns
+        groups = range(self._n_groups) if groups is None else groups
+        return sum(self[name]._meta['chunks'][idx]['length'] for name in columns for idx in groups)
+
+    def row_groups(self, filters):
+        """ The indices of the row groups whose zone maps show they may
+            hold rows matching every one of `filters`.
+        """
+        keep = np.ones(self._n_groups, dtype=bool)
+        # check the cheap min / max ranges before the dictionaries
+        for name, condition in sorted(filters.items(), key=lambda f: self[f[0]].dictionary is not None):
+            keep = self[name].prune(condition, keep)
+        return np.flatnonzero(keep)
+
+    def query(self, columns=None, **filters):
+        """ The rows of `columns` matching all of `filters`, which map
+            column names to either an inclusive `(low, high)` range
+            (either end may be None) or a list of values:
+
+            >>> table.query(date=('2019-01-01', '2019-01-31'),
+            ...             identifier=['ABC000001', 'ABC000002'])
+
+            Row groups which can't match, from their zone maps, are
+            skipped without reading or decoding any of their chunks.
+        """
+        columns = self.columns if columns is None else columns
+        starts = self[self.columns[0]]._starts if self.columns else [0]
+
+        frames = []
+        for idx in self.row_groups(filters):
+            mask = np.ones(starts[idx + 1] - starts[idx], dtype=bool)
+            for name, condition in filters.items():
+                mask &= self[name].matches(idx, condition)
+            if mask.any():
+                frames.append(self.read(columns, starts[idx], starts[idx + 1])[mask])
+
+        return pd.concat(frames) if frames else self.read(columns, 0, 0)
+
+    def close(self):
+        self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_table(path, columns=None, start=0, stop=None):
+    with Table(path) as table:
+        return table.read(columns, start, stop)
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    import importlib
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    with tempfile.TemporaryDirectory() as directory:
+        # force compile
+        write_table(os.path.join(directory, 'warmup.col'), gen_data.gen_data_fast(10, 10), codecs='auto')
+        read_table(os.path.join(directory, 'warmup.col'))
+
+        for label, kwargs in [('raw', {}), ('encoded', {'codecs': 'auto'}),
+                              ('zlib', {'compression': 'zlib'})]:
+            path = os.path.join(directory, f'{label}.col')
+
+            start = time.perf_counter()
+            write_table(path, gen_data.gen_data_chunks(), **kwargs)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            df = read_table(path)
+            read_time = time.perf_counter() - start
+
+            first = df['date'].iloc[len(df) // 2].to_datetime64()
+            del df
+
+            start = time.perf_counter()
+            with Table(path) as table:
+                dates = table['date']
+                lo = dates.searchsorted(first)
+                hi = dates.searchsorted(first + np.timedelta64(30, 'D'))
+                month = table.read(['identifier', 'value'], lo, hi)
+            month_time = time.perf_counter() - start
+
+            print(f'{label:>8}: {os.path.getsize(path) / 1e6:7.1f}Mb, write {write_time:.2f}s, '
+                  f'read {read_time:.2f}s, one month ({len(month):,} rows) {month_time * 1e3:.1f}ms')
+
+        # predicate pushdown: one month for ten identifiers, with the
+        # rows in date order (as generated) and identifier order
+        df = gen_data.gen_data_fast()
+        first = df['date'].iloc[len(df) // 2]
+        filters = {'date': (first, first + pd.Timedelta(days=30)),
+                   'identifier': [f'{gen_data.IDENT_BASE}{x:06d}' for x in range(0, 3000, 300)]}
+
+        for label, ordered in [('by date', df), ('by identifier', df.sort_values(['identifier', 'date']))]:
+            path = os.path.join(directory, 'pushdown.col')
+            write_table(path, ordered, chunk_rows=1 << 14)
+
+            start = time.perf_counter()
+            with Table(path) as table:
+                result = table.query(**filters)
+                groups = table.row_groups(filters)
+                n_bytes = table.nbytes(groups=groups)
+            query_time = time.perf_counter() - start
+
+            print(f'{label:>14}: {len(result):,} rows from {len(groups)} row groups '
+                  f'({n_bytes / 1e3:,.0f}Kb of {os.path.getsize(path) / 1e6:.0f}Mb) in {query_time * 1e3:.1f}ms')
@@ -0,0 +1,202 @@
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# Integer types to try, smallest first
+INTEGER_TYPES = ('int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32')
+
+
+def sample(df, sample_size=100_000, seed=0):
+    """ A random sample of at most `sample_size` rows. """
+    if len(df) <= sample_size:
+        return df
+    rows = np.sort(np.random.RandomState(seed).choice(len(df), sample_size, replace=False))
+    return df.iloc[rows]
+
+
+def smallest_integer(low, high):
+    for dtype in INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'int64'
+
+
+def float32_error(values):
+    """ The largest error from rounding `values` to float32, relative
+        to each value and to the range of the values, or inf if any
+        finite value overflows.
+
+        Relative to each value alone, rounding a float64 is always
+        within 2**-24, so with a large offset (eg. epoch seconds) the
+        differences between values could be lost without it showing;
+        relative to their range, it does.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    with np.errstate(over='ignore'):
+        rounded = values.astype(np.float32).astype(np.float64)
+    if not np.isfinite(rounded).all():
+        return np.inf
+    error = np.abs(rounded - values)
+    nonzero = values != 0
+    relative = np.max(error[nonzero] / np.abs(values[nonzero]), initial=0.0)
+    spread = np.ptp(values) if len(values) else 0.0
+    return max(relative, error.max() / spread) if spread else relative
+
+
+def plan_dtypes(df, sample_size=100_000, max_cardinality=0.5, rtol=1e-6, seed=0):
+    """ Chooses the smallest safe dtype for each column of `df`, as in
+        the manual steps of the readme:
+
+        - object, string and datetime columns whose number of distinct
+          values is at most `max_cardinality` of their length become
+          categoricals, of the sorted values in the whole column, so
+          every file converted with the plan has the same codes
+        - integers are downcast to the smallest type holding their range
+        - float64 becomes float32 if no value changes by more than
+          `rtol` of itself, or of the range of the column (see
+          `float32_error`)
+
+        Distinct values and rounding errors are measured on a sample of
+        `sample_size` rows; integer ranges use the whole column, as
+        they are cheap and a sample could miss the extremes.
+
+        Returns a dict of column name to dtype for `apply_plan`: a
+        `pd.CategoricalDtype`, or else the name of a numpy dtype. It
+        contains only the columns to convert, and can be saved with
+        `save_plan` and reused for every file of the same data.
+    """
+    rows = sample(df, sample_size, seed)
+    plan = {}
+
+    for name in df.columns:
+        column, dtype = df[name], df[name].dtype
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            continue
+
+        if dtype.kind in 'OUSM' or isinstance(dtype, pd.StringDtype):
+            if rows[name].nunique(dropna=False) <= max_cardinality * len(rows):
+                plan[name] = pd.CategoricalDtype(pd.Index(column.dropna().unique()).sort_values())
+
+        elif dtype.kind in 'iu':
+            target = smallest_integer(column.min(), column.max()) if len(column) else dtype.name
+            if np.dtype(target).itemsize < dtype.itemsize:
+                plan[name] = target
+
+        elif dtype == np.float64:
+            if float32_error(rows[name].to_numpy()) <= rtol:
+                plan[name] = 'float32'
+
+    return plan
+
+
+def apply_plan(df, plan, errors='raise', rtol=1e-6):
+    """ A copy of `df` with the conversions in `plan` applied.
+
+        As a plan may have been made from a sample, or from another day's
+        data, integer and float conversions are checked against the
+        whole column first: integers must be finite whole numbers in the
+        target's range, floats must round within `rtol`, as in
+        `plan_dtypes`, and categoricals mustn't have values outside
+        their categories. A column which no longer fits raises a
+        ValueError, or with `errors='ignore'` is left as it is.
+    """
+    df = df.copy()
+    for name, target in plan.items():
+        column = df[name]
+        values = column.to_numpy()
+
+        if target in INTEGER_TYPES:
+            info = np.iinfo(target)
+            if values.dtype.kind in 'iu':
+                fits = True
+            elif values.dtype.kind == 'f':
+                fits = bool(np.isfinite(values).all() and (values == np.trunc(values)).all())
+            else:
+                fits = False
+            fits = fits and (not len(values) or (info.min <= values.min() and values.max() <= info.max))
+        elif target == 'float32':
+            fits = values.dtype.kind in 'iuf' and float32_error(values) <= rtol
+        elif isinstance(target, pd.CategoricalDtype):
+            fits = bool((column.isna() | column.isin(target.categories)).all())
+        else:
+            fits = True
+
+        if fits:
+            df[name] = column.astype(target)
+        elif errors == 'raise':
+            raise ValueError(f'Column {name!r} does not fit in {target}')
+
+    return df
+
+
+def memory_report(before, after):
+    """ The memory used by each column before and after optimising. """
+    report = pd.DataFrame({
+        'from': before.dtypes.astype(str),
+        'to': after.dtypes.astype(str),
+        'before': before.memory_usage(index=False, deep=True),
+        'after': after.memory_usage(index=False, deep=True),
+    })
+    report['saved'] = report['before'] - report['after']
+    report.loc['total'] = ['', '', report['before'].sum(), report['after'].sum(), report['saved'].sum()]
+    return report
+
+
+def optimise_dtypes(df, **kwargs):
+    """ Plans and applies the smallest safe dtypes for `df`, returning
+        the new frame, the plan and a `memory_report`.
+    """
+    plan = plan_dtypes(df, **kwargs)
+    optimised = apply_plan(df, plan)
+    return optimised, plan, memory_report(df, optimised)
+
+
+def _dtype_to_json(dtype):
+    if not isinstance(dtype, pd.CategoricalDtype):
+        return dtype
+    categories = dtype.categories
+    values = categories.astype(str) if categories.dtype.kind == 'M' else categories
+    return {'categories': values.tolist(), 'dtype': str(categories.dtype)}
+
+
+def _dtype_from_json(dtype):
+    if not isinstance(dtype, dict):
+        return dtype
+    return pd.CategoricalDtype(pd.Index(dtype['categories'], dtype=dtype['dtype']))
+
+
+def save_plan(plan, path):
+    with open(path, 'w') as f:
+        json.dump({name: _dtype_to_json(dtype) for name, dtype in plan.items()}, f, indent=2)
+
+
+def load_plan(path):
+    with open(path) as f:
+        return {name: _dtype_from_json(dtype) for name, dtype in json.load(f).items()}
+
+
+if __name__ == '__main__':
+    import time
+    import importlib
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    df = gen_data.gen_data_fast()
+    df['identifier'] = df['identifier'].astype(object)  # as written by `gen_data`
+
+    start = time.perf_counter()
+    plan = plan_dtypes(df)
+    plan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimised = apply_plan(df, plan)
+    apply_time = time.perf_counter() - start
+
+    print(f'plan {plan_time:.2f}s, apply {apply_time:.2f}s: {plan}')
+    print(memory_report(df, optimised))
@@ -0,0 +1,515 @@
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+# An encoded column: `params` holds the handful of integers each codec
+# needs to decode its `payload` (a uint8 array), eg. the first value
+# and bit width for delta encoding.
+Encoded = namedtuple('Encoded', ['codec', 'dtype', 'count', 'params', 'payload'])
+
+U1 = np.uint64(1)
+U64_BITS = 64
+
+# The kernels are compiled with `nogil` so that, like zlib, they can
+# encode and decode chunks on several threads at once.
+
+
+# Bit streams
+
+@njit(nogil=True, cache=True)
+def write_bits(buf, pos, value, width):
+    """ Writes the low `width` bits of `value` into `buf` starting at
+        bit `pos` (least significant bit first), returning the new
+        position. `buf` must be zeroed.
+    """
+    while width > 0:
+        byte = pos >> 3
+        offset = pos & 7
+        take = min(8 - offset, width)
+        mask = (U1 << np.uint64(take)) - U1
+        buf[byte] |= np.uint8((value & mask) << np.uint64(offset))
+        value >>= np.uint64(take)
+        pos += take
+        width -= take
+    return pos
+
+
+@njit(nogil=True, cache=True)
+def read_bits(buf, pos, width):
+    """ Reads `width` bits written by `write_bits` from bit `pos`,
+        returning the value as a uint64.
+    """
+    value = np.uint64(0)
+    shift = 0
+    while width > 0:
+        byte = pos >> 3
+        offset = pos & 7
+        take = min(8 - offset, width)
+        mask = (U1 << np.uint64(take)) - U1
+        bits = (np.uint64(buf[byte]) >> np.uint64(offset)) & mask
+        value |= bits << np.uint64(shift)
+        pos += take
+        shift += take
+        width -= take
+    return value
+
+
+@njit(nogil=True, cache=True)
+def bit_width(values):
+    """ The number of bits needed to hold the largest of `values`
+        (uint64).
+    """
+    high = np.uint64(0)
+    for v in values:
+        high |= v
+    width = 0
+    while high:
+        high >>= U1
+        width += 1
+    return width
+
+
+@njit(nogil=True, cache=True)
+def pack_bits(values, width):
+    """ Packs uint64 `values` into `width` bits each.
+
+        The bits are OR-ed into whole 64-bit words, a value straddling
+        two words being split between them, which on a little-endian
+        machine gives the same byte stream as `write_bits`.
+    """
+    n_bits = len(values) * width
+    words = np.zeros(n_bits // U64_BITS + 2, dtype=np.uint64)
+    pos = 0
+    for v in values:
+        word, offset = pos >> 6, pos & 63
+        words[word] |= v << np.uint64(offset)
+        if offset + width > U64_BITS:
+            words[word + 1] |= v >> np.uint64(U64_BITS - offset)
+        pos += width
+    return words.view(np.uint8)[:(n_bits + 7) // 8].copy()
+
+
+@njit(nogil=True, cache=True)
+def unpack_bits(buf, width, count):
+    words = np.zeros(len(buf) // 8 + 2, dtype=np.uint64)
+    words.view(np.uint8)[:len(buf)] = buf
+    mask = ~np.uint64(0) >> np.uint64(U64_BITS - width) if width else np.uint64(0)
+
+    out = np.empty(count, dtype=np.uint64)
+    pos = 0
+    for i in range(count):
+        word, offset = pos >> 6, pos & 63
+        v = words[word] >> np.uint64(offset)
+        if offset + width > U64_BITS:
+            v |= words[word + 1] << np.uint64(U64_BITS - offset)
+        out[i] = v & mask
+        pos += width
+    return out
+
+
+@njit(nogil=True, cache=True)
+def zigzag_encode(values):
+    """ Maps signed integers to unsigned so that small magnitudes,
+        positive or negative, give small values: 0, -1, 1, -2 ... ->
+        0, 1, 2, 3 ...
+    """
+    out = np.empty(len(values), dtype=np.uint64)
+    for i, v in enumerate(values):
+        out[i] = np.uint64((v << 1) ^ (v >> 63))
+    return out
+
+
+@njit(nogil=True, cache=True)
+def zigzag_decode(values):
+    out = np.empty(len(values), dtype=np.int64)
+    for i, v in enumerate(values):
+        out[i] = np.int64(v >> U1) ^ -np.int64(v & U1)
+    return out
+
+
+# Integer codecs, which all work on int64 arrays
+
+@njit(nogil=True, cache=True)
+def for_encode(values):
+    """ Frame of reference: stores each value as its offset from the
+        minimum, packed to the width of the largest offset.
+    """
+    low = values.min() if len(values) else 0
+    offsets = (values - low).view(np.uint64)
+    width = bit_width(offsets)
+    return low, width, pack_bits(offsets, width)
+
+
+@njit(nogil=True, cache=True)
+def for_decode(low, width, buf, count):
+    return unpack_bits(buf, width, count).view(np.int64) + low
+
+
+@njit(nogil=True, cache=True)
+def rle_encode(values):
+    """ Run-length encoding, returning the value and length of each
+        run of repeated values.
+    """
+    n = len(values)
+    run_values = np.empty(n, dtype=np.int64)
+    run_lengths = np.empty(n, dtype=np.int64)
+
+    n_runs = 0
+    i = 0
+    while i < n:
+        j = i + 1
+        while j < n and values[j] == values[i]:
+            j += 1
+        run_values[n_runs] = values[i]
+        run_lengths[n_runs] = j - i
+        n_runs += 1
+        i = j
+
+    return run_values[:n_runs], run_lengths[:n_runs]
+
+
+@njit(nogil=True, cache=True)
+def rle_decode(run_values, run_lengths):
+    out = np.empty(run_lengths.sum(), dtype=np.int64)
+    pos = 0
+    for value, length in zip(run_values, run_lengths):
+        out[pos:pos + length] = value
+        pos += length
+    return out
+
+
+@njit(nogil=True, cache=True)
+def delta_encode(values):
+    """ The differences between consecutive values; the first value is
+        kept as is.
+    """
+    out = np.empty_like(values)
+    prev = 0
+    for i, v in enumerate(values):
+        out[i] = v - prev
+        prev = v
+    return out
+
+
+@njit(nogil=True, cache=True)
+def delta_decode(deltas):
+    return np.cumsum(deltas)
+
+
+@njit(nogil=True, cache=True)
+def delta_of_delta_encode(values):
+    """ Second differences, which are zero for evenly spaced values such
+        as regular timestamps.
+    """
+    return delta_encode(delta_encode(values))
+
+
+@njit(nogil=True, cache=True)
+def delta_of_delta_decode(deltas):
+    return np.cumsum(np.cumsum(deltas))
+
+
+# Gorilla XOR encoding of float64, from Facebook's Gorilla TSDB paper
+
+@njit(nogil=True, cache=True)
+def _leading_zeros(x):
+    n = 0
+    for bit in range(63, -1, -1):
+        if (x >> np.uint64(bit)) & U1:
+            break
+        n += 1
+    return n
+
+
+@njit(nogil=True, cache=True)
+def _trailing_zeros(x):
+    n = 0
+    for bit in range(64):
+        if (x >> np.uint64(bit)) & U1:
+            break
+        n += 1
+    return n
+
+
+@njit(nogil=True, cache=True)
+def gorilla_encode(values):
+    """ Each float64 is XORed with the previous one; similar values
+        share their sign, exponent and high mantissa bits so the XOR
+        has many leading (and often trailing) zeros. Per value:
+
+        - '0' if the XOR is zero (a repeated value)
+        - '10' then the meaningful bits, if they fit inside the
+          previous leading / trailing zero window
+        - '11', 5 bits of leading zeros, 6 bits of length, then the
+          meaningful bits, otherwise
+    """
+    bits = values.view(np.uint64)
+    buf = np.zeros((len(bits) * (2 + 5 + 6 + U64_BITS) + 7) // 8 + 8, dtype=np.uint8)
+    if not len(bits):
+        return buf[:0]
+
+    pos = write_bits(buf, 0, bits[0], U64_BITS)
+    prev = bits[0]
+    prev_leading, prev_trailing = U64_BITS, 0
+
+    for i in range(1, len(bits)):
+        xor = bits[i] ^ prev
+        prev = bits[i]
+
+        if xor == 0:
+            pos = write_bits(buf, pos, np.uint64(0), 1)
+            continue
+
+        leading = min(_leading_zeros(xor), 31)
+        trailing = _trailing_zeros(xor)
+
+        if leading >= prev_leading and trailing >= prev_trailing:
+            meaningful = U64_BITS - prev_leading - prev_trailing
+            pos = write_bits(buf, pos, np.uint64(0b01), 2)
+            pos = write_bits(buf, pos, xor >> np.uint64(prev_trailing), meaningful)
+        else:
+            meaningful = U64_BITS - leading - trailing
+            pos = write_bits(buf, pos, np.uint64(0b11), 2)
+            pos = write_bits(buf, pos, np.uint64(leading), 5)
+            pos = write_bits(buf, pos, np.uint64(meaningful & 63), 6)  # 64 is stored as 0
+            pos = write_bits(buf, pos, xor >> np.uint64(trailing), meaningful)
+            prev_leading, prev_trailing = leading, trailing
+
+    return buf[:(pos + 7) // 8]
+
+
+@njit(nogil=True, cache=True)
+def gorilla_decode(buf, count):
+    out = np.empty(count, dtype=np.uint64)
+    if not count:
+        return out.view(np.float64)
+
+    out[0] = read_bits(buf, 0, U64_BITS)
+    pos = U64_BITS
+    prev = out[0]
+    leading, trailing = U64_BITS, 0
+
+    for i in range(1, count):
+        if read_bits(buf, pos, 1) == 0:
+            pos += 1
+            out[i] = prev
+            continue
+
+        control = read_bits(buf, pos + 1, 1)
+        pos += 2
+        if control:
+            leading = np.int64(read_bits(buf, pos, 5))
+            meaningful = np.int64(read_bits(buf, pos + 5, 6))
+            if meaningful == 0:
+                meaningful = U64_BITS
+            trailing = U64_BITS - leading - meaningful
+            pos += 11
+
+        meaningful = U64_BITS - leading - trailing
+        xor = read_bits(buf, pos, meaningful) << np.uint64(trailing)
+        pos += meaningful
+
+        prev ^= xor
+        out[i] = prev
+
+    return out.view(np.float64)
+
+
+# Column level codecs
+
+def _as_int64(values):
+    values = np.ascontiguousarray(values)
+    if values.dtype.kind == 'M':
+        return values.view(np.int64)
+    return values.astype(np.int64, copy=False)
+
+
+def _encode_residuals(residuals, n_head):
+    """ Keeps the first `n_head` residuals, which are as large as the
+        values themselves, as parameters and packs the rest.
+    """
+    head = tuple(int(r) for r in residuals[:n_head])
+    zigzag = zigzag_encode(residuals[n_head:])
+    width = bit_width(zigzag)
+    return head + (width,), pack_bits(zigzag, width)
+
+
+def _decode_residuals(params, payload, count):
+    *head, width = params
+    n_head = min(len(head), count)
+    residuals = np.empty(count, dtype=np.int64)
+    residuals[:n_head] = head[:n_head]
+    residuals[n_head:] = zigzag_decode(unpack_bits(payload, width, count - n_head))
+    return residuals
+
+
+def encode_raw(values):
+    return (), np.ascontiguousarray(values).view(np.uint8).ravel()
+
+
+def decode_raw(params, payload, count, dtype):
+    return payload.view(dtype)[:count]
+
+
+def encode_bitpack(values):
+    low, width, payload = for_encode(_as_int64(values))
+    return (int(low), width), payload
+
+
+def decode_bitpack(params, payload, count, dtype):
+    low, width = params
+    return for_decode(low, width, payload, count)
+
+
+def encode_rle(values):
+    run_values, run_lengths = rle_encode(_as_int64(values))
+    value_low, value_width, value_payload = for_encode(run_values)
+    length_low, length_width, length_payload = for_encode(run_lengths)
+    params = (len(run_values), int(value_low), value_width, int(length_low), length_width, len(value_payload))
+    return params, np.concatenate((value_payload, length_payload))
+
+
+def decode_rle(params, payload, count, dtype):
+    n_runs, value_low, value_width, length_low, length_width, split = params
+    run_values = for_decode(value_low, value_width, payload[:split], n_runs)
+    run_lengths = for_decode(length_low, length_width, payload[split:], n_runs)
+    return rle_decode(run_values, run_lengths)
+
+
+def encode_delta(values):
+    return _encode_residuals(delta_encode(_as_int64(values)), 1)
+
+
+def decode_delta(params, payload, count, dtype):
+    return delta_decode(_decode_residuals(params, payload, count))
+
+
+def encode_delta_of_delta(values):
+    return _encode_residuals(delta_of_delta_encode(_as_int64(values)), 2)
+
+
+def decode_delta_of_delta(params, payload, count, dtype):
+    return delta_of_delta_decode(_decode_residuals(params, payload, count))
+
+
+def encode_gorilla(values):
+    return (), gorilla_encode(np.ascontiguousarray(values, dtype=np.float64))
+
+
+def decode_gorilla(params, payload, count, dtype):
+    return gorilla_decode(payload, count)
+
+
+CODECS = {
+    'raw': (encode_raw, decode_raw),
+    'bitpack': (encode_bitpack, decode_bitpack),
+    'rle': (encode_rle, decode_rle),
+    'delta': (encode_delta, decode_delta),
+    'delta_of_delta': (encode_delta_of_delta, decode_delta_of_delta),
+    'gorilla': (encode_gorilla, decode_gorilla),
+}
+
+INTEGER_CODECS = ('raw', 'bitpack', 'rle', 'delta', 'delta_of_delta')
+FLOAT_CODECS = ('raw', 'gorilla')
+
+
+def encode(values, codec='raw'):
+    """ Encodes a 1-d integer, datetime64 or float64 array. """
+    values = np.asarray(values)
+    params, payload = CODECS[codec][0](values)
+    return Encoded(codec, values.dtype.str, len(values), params, payload)
+
+
+def decode(encoded):
+    codec, dtype, count, params, payload = encoded
+    values = CODECS[codec][1](params, payload, count, np.dtype(dtype))
+    return values.astype(np.int64, copy=False).view(dtype) \
+        if np.dtype(dtype).kind == 'M' else values.astype(dtype, copy=False)
+
+
+def candidate_codecs(values):
+    kind = np.asarray(values).dtype.kind
+    if kind in 'iuM':
+        return INTEGER_CODECS
+    if kind == 'f':
+        return FLOAT_CODECS
+    return ('raw',)
+
+
+def choose_codec(values, sample_size=1 << 16):
+    """ Picks the codec giving the smallest payload for the first
+        `sample_size` values of the column.
+    """
+    sample = np.asarray(values)[:sample_size]
+    sizes = {codec: len(encode(sample, codec).payload) for codec in candidate_codecs(sample)}
+    return min(sizes, key=sizes.get)
+
+
+def column_values(column):
+    """ The numpy array to encode for a DataFrame column; categoricals
+        (such as `identifier` from `gen_data`) are encoded by their codes.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy()
+    return column.to_numpy()
+
+
+def select_codecs(df, sample_size=1 << 16):
+    """ The best codec for each column of `df`. """
+    return {name: choose_codec(column_values(df[name]), sample_size) for name in df.columns}
+
+
+if __name__ == '__main__':
+    import time
+    import zlib
+    import importlib
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    df = gen_data.gen_data_fast(n_identifiers=1000, n_dates=1000)
+    codecs = select_codecs(df)
+
+    def throughput(fn, n_bytes, repeats=5):
+        result = fn()  # force compile
+        best = np.inf
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return result, n_bytes / best / 1e6
+
+    print(f'{"column":<12}{"codec":<16}{"ratio":>8}{"encode MB/s":>14}{"decode MB/s":>14}')
+
+    for name in df.columns:
+        values = column_values(df[name])
+        n_bytes = values.nbytes
+
+        candidates = [(codec, lambda c=codec: encode(values, c), decode)
+                      for codec in candidate_codecs(values)]
+        candidates.append(('zlib', lambda: zlib.compress(values.tobytes(), 1), zlib.decompress))
+
+        try:
+            import blosc
+            candidates.append(('blosc', lambda: blosc.compress(values.tobytes(), typesize=values.itemsize),
+                               blosc.decompress))
+        except ImportError:
+            pass
+
+        for label, enc, dec in candidates:
+            encoded, enc_rate = throughput(enc, n_bytes)
+            _, dec_rate = throughput(lambda: dec(encoded), n_bytes)
+            size = len(encoded.payload) if isinstance(encoded, Encoded) else len(encoded)
+            chosen = '*' if label == codecs[name] else ''
+            print(f'{name:<12}{label + chosen:<16}{n_bytes / size:8.1f}{enc_rate:14.0f}{dec_rate:14.0f}')
+
+    try:
+        import io
+        buf = io.BytesIO()
+        df.to_parquet(buf)
+        print(f'parquet: {df.memory_usage(index=False).sum() / len(buf.getvalue()):.1f}x')
+    except ImportError:
+        pass
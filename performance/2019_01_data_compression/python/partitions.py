@@ -0,0 +1,302 @@
+
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .columnar import Table, write_table, zone_map, _dictionary_to_json, _dictionary_from_json
+from .encoders import column_values
+
+MANIFEST = 'manifest.json'
+
+
+class PartitionedStore:
+    """ A directory of columnar tables, one per appended partition (eg.
+        one day of `gen_data`), listed in a JSON manifest.
+
+        Appending a day writes a single new file and rewrites the small
+        manifest, so costs O(day) however large the store grows.
+        Categorical and string columns share a dictionary held in the
+        manifest which only ever grows: each partition appends its new
+        values (its dictionary delta) and is written with the codes of
+        the shared dictionary, so partitions can be read and combined
+        without recoding. The manifest also keeps each partition's min
+        and max of the other columns, so whole files can be skipped.
+
+        Many small partitions compress badly and are slow to query;
+        `compact` merges them into larger, well-compressed ones, and can
+        run on a background thread whilst the store is read and
+        appended to.
+    """
+
+    def __init__(self, directory, chunk_rows=1 << 16, codecs=None, compression=None):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.codecs = codecs
+        self.compression = compression
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+        else:
+            manifest = {'columns': [], 'dictionaries': {}, 'dtypes': {}, 'partitions': []}
+
+        self._columns = manifest.get('columns', [])
+        self._dictionaries = {name: _dictionary_from_json(d) for name, d in manifest['dictionaries'].items()}
+        self._dtypes = manifest['dtypes']
+        self._partitions = manifest['partitions']
+        # only one compaction at a time
+        self._compacting = threading.Lock()
+
+    @property
+    def partitions(self):
+        with self._lock:
+            return list(self._partitions)
+
+    @property
+    def n_rows(self):
+        return sum(p['n_rows'] for p in self.partitions)
+
+    def _save_manifest(self):
+        """ Atomically replaces the manifest; call with the lock held. """
+        manifest = {
+            'columns': self._columns,
+            'dictionaries': {name: _dictionary_to_json(d) for name, d in self._dictionaries.items()},
+            'dtypes': self._dtypes,
+            'partitions': self._partitions,
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f)
+        os.replace(path + '.tmp', path)
+
+    def _encode_dictionaries(self, df):
+        """ `df` with its categorical and string columns recoded to the
+            shared dictionaries extended by its new values, those
+            dictionaries, and the number of new values in each. Missing
+            values aren't added to the dictionaries, and have code -1.
+
+            The store's own dictionaries aren't changed, so a failed
+            write leaves them as they were. Call with the lock held.
+        """
+        df = df.copy()
+        dictionaries = {}
+        deltas = {}
+        for name in df.columns:
+            column = df[name]
+            if not (isinstance(column.dtype, pd.CategoricalDtype) or column.dtype.kind in 'OUS'
+                    or isinstance(column.dtype, pd.StringDtype)):
+                continue
+
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                values = column.cat.categories
+            else:
+                values = pd.Index(column.dropna().unique())
+            dictionary = self._dictionaries.get(name, pd.Index([]))
+            new = values.difference(dictionary, sort=False)
+            if len(new):
+                dictionary = dictionary.append(new) if len(dictionary) else new
+            dictionaries[name] = dictionary
+
+            deltas[name] = len(new)
+            df[name] = pd.Categorical(column, categories=dictionary)
+
+        return df, dictionaries, deltas
+
+    def _write_partition(self, frames, **kwargs):
+        """ Writes `frames` to a new file, returning its manifest entry
+            without the zone maps.
+        """
+        name = f'part-{uuid.uuid4().hex}.col'
+        path = os.path.join(self.directory, name)
+        try:
+            write_table(path, frames, chunk_rows=self.chunk_rows, **kwargs)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return {'file': name}
+
+    def append(self, df):
+        """ Writes `df` as a new partition. If the write fails the store
+            is left as it was.
+        """
+        with self._lock:
+            df, dictionaries, deltas = self._encode_dictionaries(df)
+            entry = self._write_partition(df, codecs=self.codecs, compression=self.compression)
+
+            self._dictionaries.update(dictionaries)
+            if not self._columns:
+                self._columns = list(df.columns)
+            entry.update({'n_rows': len(df), 'dictionary_delta': deltas, 'min': {}, 'max': {}})
+            for name in df.columns:
+                if name not in deltas:
+                    self._dtypes.setdefault(name, df[name].dtype.str)
+                    entry['min'][name], entry['max'][name] = zone_map(np.ascontiguousarray(column_values(df[name])))
+
+            self._partitions.append(entry)
+            self._save_manifest()
+            return entry
+
+    def _may_match(self, partition, filters):
+        """ Whether the partition's min and max allow it to hold rows
+            matching the range `filters` on non-dictionary columns.
+        """
+        for name, condition in filters.items():
+            if name not in self._dtypes or not isinstance(condition, tuple):
+                continue
+            low, high = partition['min'][name], partition['max'][name]
+            if low is None:
+                return False
+
+            bounds = [None if c is None else np.asarray(c, dtype=self._dtypes[name]) for c in condition]
+            bounds = [None if b is None else (b.view(np.int64) if b.dtype.kind == 'M' else b).item() for b in bounds]
+            if (bounds[0] is not None and high < bounds[0]) or (bounds[1] is not None and low > bounds[1]):
+                return False
+        return True
+
+    def read(self, columns=None, **filters):
+        """ The rows of `columns` matching all of `filters`, as for
+            `Table.query`, in the order they were appended. Partitions
+            which can't match, from the manifest, aren't opened.
+        """
+        with self._lock:
+            dictionaries = dict(self._dictionaries)
+            stored = list(self._columns)
+            partitions = [p for p in self._partitions if self._may_match(p, filters)]
+            # open the files now, so a compaction can't remove them first
+            tables = [Table(os.path.join(self.directory, p['file'])) for p in partitions]
+
+        if not tables:
+            return self._empty(stored if columns is None else columns, dictionaries)
+
+        frames = []
+        for table in tables:
+            with table:
+                df = table.query(columns, **filters)
+            for name in df.columns:
+                if name in dictionaries:
+                    df[name] = df[name].cat.set_categories(dictionaries[name])
+            frames.append(df)
+
+        return pd.concat(frames, ignore_index=True)
+
+    def _empty(self, columns, dictionaries):
+        """ A frame of `columns` with no rows, with their stored dtypes. """
+        return pd.DataFrame({
+            name: pd.Categorical([], categories=dictionaries[name]) if name in dictionaries
+            else np.empty(0, dtype=self._dtypes.get(name, object))
+            for name in columns
+        })
+
+    def compact(self, max_rows=1 << 24, codecs='auto', compression='zlib'):
+        """ Merges runs of consecutive partitions into partitions of up
+            to `max_rows` rows, written with `codecs` and `compression`.
+
+            The merged files are written without holding the lock, so
+            reads and appends carry on meanwhile; the manifest is then
+            swapped in one step, and the old files removed.
+        """
+        with self._compacting:
+            return self._compact(max_rows, codecs, compression)
+
+    def _compact(self, max_rows, codecs, compression):
+        groups, group = [], []
+        for partition in self.partitions:
+            if group and sum(p['n_rows'] for p in group) + partition['n_rows'] > max_rows:
+                groups.append(group)
+                group = []
+            group.append(partition)
+        groups.append(group)
+
+        merged = {}
+        for group in groups:
+            if len(group) < 2:
+                continue
+
+            def frames(group=group):
+                for partition in group:
+                    with Table(os.path.join(self.directory, partition['file'])) as table:
+                        yield table.read()
+
+            entry = self._write_partition(frames(), codecs=codecs, compression=compression)
+            entry.update({
+                'n_rows': sum(p['n_rows'] for p in group),
+                'dictionary_delta': {name: sum(p['dictionary_delta'][name] for p in group)
+                                     for name in group[0]['dictionary_delta']},
+                'min': {name: min((p['min'][name] for p in group if p['min'][name] is not None), default=None)
+                        for name in group[0]['min']},
+                'max': {name: max((p['max'][name] for p in group if p['max'][name] is not None), default=None)
+                        for name in group[0]['max']},
+            })
+            merged[group[0]['file']] = (entry, {p['file'] for p in group})
+
+        with self._lock:
+            partitions, removed = [], set()
+            for partition in self._partitions:
+                if partition['file'] in merged:
+                    entry, files = merged[partition['file']]
+                    partitions.append(entry)
+                    removed |= files
+                elif partition['file'] not in removed:
+                    partitions.append(partition)
+            self._partitions = partitions
+            self._save_manifest()
+
+        for name in removed:
+            os.remove(os.path.join(self.directory, name))
+
+        return len(removed)
+
+    def compact_in_background(self, **kwargs):
+        """ Runs `compact` on a new thread, which is returned. """
+        thread = threading.Thread(target=self.compact, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    import importlib
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    df = gen_data.gen_data_fast(n_dates=365)
+    days = [day for _, day in df.groupby('date', sort=True)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PartitionedStore(directory)
+        store.append(days[0])  # force compile
+
+        start = time.perf_counter()
+        for day in days[1:]:
+            store.append(day)
+        append_time = (time.perf_counter() - start) / (len(days) - 1)
+
+        def size():
+            return sum(os.path.getsize(os.path.join(directory, p['file'])) for p in store.partitions)
+
+        month = (days[100]['date'].iloc[0], days[130]['date'].iloc[0])
+
+        def read_month():
+            store.read(date=month)  # force compile of the decoders
+            start = time.perf_counter()
+            store.read(date=month)
+            return time.perf_counter() - start
+
+        print(f'{len(store.partitions)} partitions, {size() / 1e6:.1f}Mb, {append_time * 1e3:.1f}ms per append, '
+              f'read one month in {read_month() * 1e3:.0f}ms')
+
+        start = time.perf_counter()
+        store.compact_in_background(max_rows=1 << 20).join()
+        compact_time = time.perf_counter() - start
+
+        print(f'compacted to {len(store.partitions)} partitions, {size() / 1e6:.1f}Mb in {compact_time:.2f}s, '
+              f'read one month in {read_month() * 1e3:.0f}ms')
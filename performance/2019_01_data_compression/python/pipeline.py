@@ -0,0 +1,160 @@
+
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .columnar import Table, TableWriter, build_chunk, decode_chunk
+
+
+class ParallelTableWriter(TableWriter):
+    """ A `TableWriter` which compresses chunks on a thread pool.
+
+        zlib and the numba encoders release the GIL, so chunks can be
+        encoded on several cores at once. The calling thread splits each
+        frame into chunks and submits them to the pool, and a writer
+        thread takes the results in order from a bounded queue and
+        appends them to the file, so disk writes overlap compression.
+        Once `queue_size` chunks are in flight `write` blocks until the
+        writer catches up, which bounds the memory used however large
+        the frames are.
+    """
+
+    def __init__(self, path, max_workers=None, queue_size=None, **kwargs):
+        super().__init__(path, **kwargs)
+        # ThreadPoolExecutor's default
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._pool = ThreadPoolExecutor(self.max_workers)
+        self._queue = queue.Queue(maxsize=queue_size or 2 * self.max_workers)
+        self._error = None
+        self._writer = threading.Thread(target=self._drain, daemon=True)
+        self._writer.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            meta, future = item
+            try:
+                if self._error is None:
+                    self._append(meta, *future.result())
+            except BaseException as e:
+                # keep draining the queue so `write` never blocks forever
+                self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, df):
+        for meta, args in self._split(df):
+            self._check()
+            self._queue.put((meta, self._pool.submit(build_chunk, *args)))
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            self._pool.shutdown()
+
+        if self._error is not None:
+            self._file.close()
+        self._check()
+        super().close()
+
+
+def write_parallel(path, frames, **kwargs):
+    """ `write_table` using a `ParallelTableWriter`. """
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    with ParallelTableWriter(path, **kwargs) as writer:
+        for df in frames:
+            writer.write(df)
+
+
+def read_parallel(path, columns=None, max_workers=None):
+    """ Reads a whole table, decoding its chunks on a thread pool.
+
+        Each column is allocated once, and every chunk is decoded
+        straight into its rows by one of the workers; with compressed
+        chunks the page faults reading the file also happen on the
+        workers, overlapping with decompression.
+    """
+    with Table(path) as table, ThreadPoolExecutor(max_workers) as pool:
+        columns = table.columns if columns is None else columns
+
+        def decode_into(out, meta, start, payload):
+            out[start:start + meta['count']] = decode_chunk(meta, payload)
+
+        arrays, futures = {}, []
+        for name in columns:
+            chunks = table[name]._meta['chunks']
+            dtype = np.result_type(*[np.dtype(c['dtype']) for c in chunks]) if chunks else np.int64
+            arrays[name] = out = np.empty(len(table[name]), dtype=dtype)
+
+            start = 0
+            for meta in chunks:
+                payload = table._mmap[meta['offset']:meta['offset'] + meta['length']]
+                futures.append(pool.submit(decode_into, out, meta, start, payload))
+                start += meta['count']
+
+        for future in futures:
+            future.result()
+
+        data = {}
+        for name, values in arrays.items():
+            dictionary = table[name].dictionary
+            if dictionary is not None:
+                values = pd.Categorical.from_codes(values, categories=dictionary)
+            data[name] = pd.Series(values, name=name, copy=False)
+
+        return pd.DataFrame(data, copy=False)
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    import importlib
+
+    from .columnar import write_table, read_table
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    df = gen_data.gen_data_fast()
+    df['value'] = np.random.random(len(df))  # less repetitive than `gen_data`
+    n_bytes = df.memory_usage(index=False).sum()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.col')
+        options = {'compression': 'zlib', 'level': 6, 'codecs': 'auto'}
+
+        write_table(path, df.iloc[:1000], **options)  # force compile
+        read_table(path)
+
+        start = time.perf_counter()
+        write_table(path, df, **options)
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read_table(path)
+        read_time = time.perf_counter() - start
+
+        print(f'{"serial":>10}: write {n_bytes / write_time / 1e6:6.0f}MB/s, read {n_bytes / read_time / 1e6:6.0f}MB/s')
+
+        for workers in sorted({1, 2, 4, os.cpu_count()}):
+            start = time.perf_counter()
+            write_parallel(path, df, max_workers=workers, **options)
+            write_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_parallel(path, max_workers=workers)
+            read_time = time.perf_counter() - start
+
+            print(f'{workers:>2} threads: write {n_bytes / write_time / 1e6:6.0f}MB/s, '
+                  f'read {n_bytes / read_time / 1e6:6.0f}MB/s')
@@ -0,0 +1,181 @@
+
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+from .columnar import Table, write_table
+from .dtypes import sample
+from .encoders import column_values, select_codecs
+
+# The column holding each row's position in the original frame
+ROW_COLUMN = '__row__'
+
+
+def as_numbers(values):
+    """ `values`, with strings and other objects replaced by their rank
+        among the distinct values (-1 if missing), so they can be sorted
+        and differenced like categorical codes.
+    """
+    if values.dtype.kind in 'OUS':
+        return pd.factorize(values, sort=True)[0]
+    return values
+
+
+def sort_permutation(df, order):
+    """ The stable permutation sorting `df` by the columns in `order`
+        (categoricals by their codes, strings by `as_numbers`). Empty
+        `order` is the identity.
+    """
+    if not order:
+        return np.arange(len(df))
+    # lexsort sorts by its last key first
+    return np.lexsort([as_numbers(column_values(df[name])) for name in reversed(order)])
+
+
+def entropy_bits(values):
+    """ The bits needed to store `values` at their order-0 (Shannon)
+        entropy, ie. with an ideal code for their frequencies.
+    """
+    if not len(values):
+        return 0.0
+    _, counts = np.unique(values, return_counts=True)
+    return float(-(counts * np.log2(counts / len(values))).sum())
+
+
+def estimated_bits(values):
+    """ An estimate of the bits needed to store a column in its current
+        order: the least of the entropy of its values, of its runs (for
+        run-length encoding), and of its first and second differences
+        (for delta and delta-of-delta encoding). Strings are estimated
+        by their `as_numbers` codes.
+    """
+    values = np.ascontiguousarray(as_numbers(values))
+    if values.dtype.kind in 'fM':
+        values = values.view(np.int64)  # deltas of the bits, as in Gorilla
+
+    starts = np.flatnonzero(np.diff(values)) + 1
+    run_values = values[np.concatenate(([0], starts))] if len(values) else values
+    run_lengths = np.diff(np.concatenate(([0], starts, [len(values)])))
+
+    return min(
+        entropy_bits(values),
+        entropy_bits(run_values) + entropy_bits(run_lengths),
+        entropy_bits(np.diff(values)) + 64,
+        entropy_bits(np.diff(values, 2)) + 128,
+    )
+
+
+def estimated_size(df):
+    """ The estimated encoded size of `df`, in bytes, with its rows in
+        their current order.
+    """
+    return sum(estimated_bits(column_values(df[name])) for name in df.columns) / 8
+
+
+def sort_candidates(df, max_keys=3, max_cardinality=0.1):
+    """ The sort orders worth trying: every ordering of up to
+        `max_keys` of the columns with few distinct values (relative to
+        the length of `df`), plus the original order.
+    """
+    keys = [name for name in df.columns
+            if df[name].nunique() <= max_cardinality * len(df)]
+    orders = [()]
+    for n in range(1, min(max_keys, len(keys)) + 1):
+        orders.extend(permutations(keys, n))
+    return orders
+
+
+def choose_sort_order(df, candidates=None, sample_size=100_000, seed=0):
+    """ Estimates the encoded size of `df` sorted in each of the
+        `candidates` orders (by default `sort_candidates`), using a
+        random sample of rows, and returns the best order with a Series
+        of the estimated sizes.
+
+        Sorting a sample gives shorter runs than sorting all of `df`, so
+        the sizes are only comparable with each other.
+    """
+    rows = sample(df, sample_size, seed).reset_index(drop=True)
+    candidates = sort_candidates(rows) if candidates is None else candidates
+
+    candidates = [tuple(order) for order in candidates]
+    sizes = pd.Series([estimated_size(rows.iloc[sort_permutation(rows, order)]) for order in candidates],
+                      index=pd.Index(candidates, tupleize_cols=False), name='bytes')
+    return sizes.idxmin(), sizes.sort_values(kind='stable')
+
+
+def invert_permutation(permutation):
+    """ The inverse of a permutation in O(n), rather than an argsort. """
+    inverse = np.empty_like(permutation)
+    inverse[permutation] = np.arange(len(permutation))
+    return inverse
+
+
+def write_sorted(path, df, order=None, **kwargs):
+    """ Writes `df` to a columnar table sorted by `order`, chosen with
+        `choose_sort_order` if not given, with an extra column holding
+        each row's original position so `read_original_order` can undo
+        the sort. Returns the order used.
+    """
+    if order is None:
+        order, _ = choose_sort_order(df)
+
+    permutation = sort_permutation(df, order)
+    ordered = df.iloc[permutation].reset_index(drop=True)
+    ordered[ROW_COLUMN] = permutation
+
+    # sorting by a few keys leaves the original positions in long
+    # arithmetic runs, which delta-of-delta encodes as (mostly) zeros
+    codecs = kwargs.pop('codecs', None) or {}
+    if codecs == 'auto':
+        codecs = select_codecs(ordered[df.columns])
+    codecs = {ROW_COLUMN: 'delta_of_delta', **codecs}
+    write_table(path, ordered, codecs=codecs, **kwargs)
+    return order
+
+
+def read_original_order(path, columns=None):
+    """ Reads a table written by `write_sorted` back in the order of the
+        original frame.
+    """
+    with Table(path) as table:
+        columns = [c for c in table.columns if c != ROW_COLUMN] if columns is None else columns
+        df = table.read(columns)
+        rows = np.asarray(table[ROW_COLUMN][0:len(table)])
+
+    return df.iloc[invert_permutation(rows)].reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    import os
+    import time
+    import tempfile
+    import importlib
+
+    gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+    df = gen_data.gen_data_fast()
+
+    # give each identifier a random walk through time, like a price
+    n_ids = df['identifier'].cat.categories.size
+    steps = np.random.RandomState(0).normal(0, 0.01, (len(df) // n_ids, n_ids))
+    df['value'] = np.round(df['value'] * 100 + steps.cumsum(axis=0).ravel(), 2)
+
+    start = time.perf_counter()
+    order, sizes = choose_sort_order(df)
+    print(f'chose {order} in {time.perf_counter() - start:.2f}s')
+    print(sizes.head())
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.col')
+        for candidate in [(), ('date', 'identifier'), ('identifier', 'date')]:
+            write_sorted(path, df, candidate, codecs='auto', compression='zlib')
+            with Table(path) as table:
+                data = table.nbytes(list(df.columns))
+                index = table.nbytes([ROW_COLUMN])
+            print(f'{str(candidate):>26}: {data / 1e6:6.1f}Mb + {index / 1e6:.1f}Mb permutation index')
+
+        start = time.perf_counter()
+        restored = read_original_order(path)
+        print(f'restored original order in {time.perf_counter() - start:.2f}s')
+        assert restored['value'].equals(df['value'])
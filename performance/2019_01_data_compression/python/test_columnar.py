@@ -0,0 +1,180 @@
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import mark
+
+from .columnar import Table, TableWriter, write_table, read_table
+
+gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+OPTIONS = [
+    {},
+    {'codecs': 'auto'},
+    {'compression': 'zlib'},
+    {'codecs': {'date': 'delta_of_delta', 'value': 'gorilla'}, 'compression': 'zlib'},
+]
+
+
+@pytest.fixture
+def df():
+    return gen_data.gen_data_fast(n_identifiers=50, n_dates=41, seed=0)
+
+
+@mark.parametrize('options', OPTIONS, ids=str)
+def test_round_trip(tmp_path, df, options):
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=300, **options)
+
+    pd.testing.assert_frame_equal(read_table(path), df)
+
+
+@mark.parametrize('options', OPTIONS, ids=str)
+def test_read_rows(tmp_path, df, options):
+    path = tmp_path / 'data.col'
+    write_table(path, gen_data.gen_data_chunks(50, 41, chunk_size=700, seed=0), chunk_rows=300, **options)
+
+    with Table(path) as table:
+        assert len(table) == len(df)
+        assert table['value'].n_chunks == 3 * 3  # 700, 700, 650 rows, each split 300 + 300 + rest
+        for start, stop in [(0, 1), (299, 301), (123, 1234), (2000, 5000), (3000, 3000)]:
+            pd.testing.assert_frame_equal(table.read(['date', 'identifier'], start, stop),
+                                          df[['date', 'identifier']].iloc[start:stop])
+
+
+def test_raw_chunks_are_zero_copy(tmp_path, df):
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=1000)
+
+    with Table(path) as table:
+        for name in table.columns:
+            assert np.shares_memory(table[name].chunk(1), table._mmap)
+        assert np.shares_memory(table['value'][1000:1500], table._mmap)
+
+
+@mark.parametrize('options', OPTIONS, ids=str)
+def test_searchsorted(tmp_path, df, options):
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=256, **options)
+    dates = df['date'].to_numpy()
+
+    with Table(path) as table:
+        for value in np.concatenate((dates[::97], [dates[0] - np.timedelta64(1, 'D'), dates[-1] + 1])):
+            for side in ('left', 'right'):
+                assert table['date'].searchsorted(value, side) == np.searchsorted(dates, value, side)
+
+
+def test_dictionary_grows(tmp_path):
+    path = tmp_path / 'data.col'
+    frames = [
+        pd.DataFrame({'name': ['a', 'b', 'a'], 'x': [1, 2, 3]}),
+        pd.DataFrame({'name': pd.Categorical(['c', 'a']), 'x': [4, 5]}),
+        pd.DataFrame({'name': ['b', 'd'], 'x': [6, 7]}),
+    ]
+    with TableWriter(path) as writer:
+        for frame in frames:
+            writer.write(frame)
+
+    with Table(path) as table:
+        assert list(table['name'].dictionary) == ['a', 'b', 'c', 'd']
+        df = table.read()
+
+    assert df['name'].astype(object).tolist() == ['a', 'b', 'a', 'c', 'a', 'b', 'd']
+    assert df['x'].tolist() == list(range(1, 8))
+
+
+def test_missing_categories(tmp_path):
+    # the second chunk is all missing, so has no dictionary codes at all
+    df = pd.DataFrame({'s': ['a', 'b', None, None, 'c', None], 'x': range(6)})
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=2)
+
+    with Table(path) as table:
+        assert table.read()['s'].astype(object).tolist() == ['a', 'b', np.nan, np.nan, 'c', np.nan]
+        assert list(table.row_groups({'s': ['b']})) == [0]
+        assert list(table.row_groups({'s': ['c']})) == [2]
+        assert list(table.row_groups({'s': ('b', None)})) == [0, 2]
+        assert table.query(s=('a', 'z'))['x'].tolist() == [0, 1, 4]
+        assert table.query(s=('c', None))['x'].tolist() == [4]
+        assert table.query(s=['a', 'c'])['x'].tolist() == [0, 4]
+
+
+def test_categorical_dates(tmp_path, df):
+    df['date'] = df['date'].astype('category')
+    path = tmp_path / 'data.col'
+    write_table(path, df)
+
+    pd.testing.assert_frame_equal(read_table(path), df)
+
+
+def expected_query(df, date=None, identifier=None, value=None):
+    mask = np.ones(len(df), dtype=bool)
+    if date is not None:
+        low, high = date
+        mask &= (df['date'] >= low if low is not None else True) & (df['date'] <= high if high is not None else True)
+    if identifier is not None:
+        mask &= df['identifier'].isin(identifier)
+    if value is not None:
+        mask &= df['value'].between(*value)
+    return df[mask]
+
+
+QUERIES = [
+    {'date': ('2026-09-20', '2026-09-25')},
+    {'date': (None, '2026-09-12'), 'identifier': ['ABC000003', 'ABC000040', 'XYZ']},
+    {'identifier': ['ABC000049']},
+    {'identifier': ['XYZ']},
+    {'value': (0.25, 0.5)},
+    {'date': ('2030-01-01', None)},
+]
+
+
+@mark.parametrize('options', OPTIONS[:3], ids=str)
+@mark.parametrize('sort', [None, ['identifier', 'date']])
+@mark.parametrize('filters', QUERIES, ids=str)
+def test_query(tmp_path, options, sort, filters):
+    df = gen_data.gen_data_fast(n_identifiers=50, n_dates=41, seed=0)
+    df['date'] = df['date'] - (df['date'].iloc[0] - pd.Timestamp('2026-09-09'))
+    if sort:
+        df = df.sort_values(sort)
+
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=128, **options)
+
+    with Table(path) as table:
+        got = table.query(**filters)
+    expected = expected_query(df.reset_index(drop=True), **filters)
+
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_query_skips_row_groups(tmp_path):
+    df = gen_data.gen_data_fast(n_identifiers=50, n_dates=41, seed=0)
+    path = tmp_path / 'data.col'
+    write_table(path, df.sort_values(['identifier', 'date']), chunk_rows=41)
+
+    with Table(path) as table:
+        assert len(table.row_groups({})) == 50
+        assert list(table.row_groups({'identifier': ['ABC000003', 'ABC000040']})) == [3, 40]
+        assert list(table.row_groups({'identifier': ['XYZ']})) == []
+        assert len(table.row_groups({'date': (df['date'].max(), None)})) == 50
+
+    write_table(path, df, chunk_rows=50)
+    with Table(path) as table:
+        dates = df['date'].unique()
+        assert list(table.row_groups({'date': (dates[3], dates[5])})) == [3, 4, 5]
+        assert list(table.row_groups({'value': (2.0, 3.0)})) == []
+
+
+def test_not_a_table(tmp_path):
+    path = tmp_path / 'data.col'
+    path.write_bytes(b'not a table at all')
+
+    with pytest.raises(ValueError):
+        Table(path)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
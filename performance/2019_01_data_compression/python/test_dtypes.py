@@ -0,0 +1,124 @@
+
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest import mark
+
+from .dtypes import plan_dtypes, apply_plan, optimise_dtypes, smallest_integer, save_plan, load_plan
+
+gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+
+@mark.parametrize('low, high, expected', [
+    (0, 0, 'int8'),
+    (-128, 127, 'int8'),
+    (0, 255, 'uint8'),
+    (-1, 255, 'int16'),
+    (0, 2 ** 32 - 1, 'uint32'),
+    (-1, 2 ** 32, 'int64'),
+])
+def test_smallest_integer(low, high, expected):
+    assert smallest_integer(low, high) == expected
+
+
+def test_gen_data_plan():
+    df = gen_data.gen_data_fast(n_identifiers=100, n_dates=50, seed=0)
+    df['identifier'] = df['identifier'].astype(object)
+
+    optimised, plan, report = optimise_dtypes(df, sample_size=1000)
+
+    assert plan == {'identifier': 'category', 'value': 'float32', 'date': 'category'}
+    assert plan['identifier'].categories.equals(pd.Index(np.sort(df['identifier'].unique())))
+    assert plan['date'].categories.equals(pd.Index(np.sort(df['date'].unique())))
+    assert report.loc['total', 'after'] < report.loc['total', 'before'] / 4
+    assert (optimised['identifier'].astype(object) == df['identifier']).all()
+    assert (optimised['date'].astype(df['date'].dtype) == df['date']).all()
+    np.testing.assert_allclose(optimised['value'], df['value'], rtol=1e-6)
+
+
+def test_plan_is_safe():
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'small': rng.randint(-100, 100, 1000),
+        'unsigned': rng.randint(0, 60000, 1000),
+        'wide': np.arange(1000) * 2 ** 40,
+        'precise': np.linspace(0, 1, 1000) + 1 / 3,
+        'huge': np.full(1000, 1e300),
+        'rounded': np.round(rng.random_sample(1000), 2).astype(np.float32).astype(np.float64),
+        'unique': np.arange(1000).astype(str),
+        'few': rng.choice(['a', 'b', None], 1000),
+        'epoch': 1.7e9 + 0.5 * np.arange(1000),
+    })
+
+    plan = plan_dtypes(df, sample_size=100, rtol=0)
+
+    assert plan == {'small': 'int8', 'unsigned': 'uint16', 'rounded': 'float32', 'few': 'category'}
+
+
+def test_reuse_plan(tmp_path):
+    day_1 = pd.DataFrame({'x': np.arange(100), 'y': np.linspace(0, 1, 100, dtype=np.float32).astype(np.float64)})
+    day_2 = pd.DataFrame({'x': np.arange(100) * 1000, 'y': np.ones(100)})
+
+    plan = plan_dtypes(day_1)
+    save_plan(plan, tmp_path / 'plan.json')
+    plan = load_plan(tmp_path / 'plan.json')
+    assert plan == {'x': 'int8', 'y': 'float32'}
+
+    with pytest.raises(ValueError):
+        apply_plan(day_2, plan)
+
+    df = apply_plan(day_2, plan, errors='ignore')
+    assert df['x'].dtype == np.int64
+    assert df['y'].dtype == np.float32
+
+
+def test_reuse_categories(tmp_path):
+    dates = np.datetime64('2019-01-01', 'ns') + np.arange(3) * np.timedelta64(1, 'D')
+    day_1 = pd.DataFrame({'name': ['b', 'a', None, 'b'] * 5, 'date': dates[[0, 1, 0, 2] * 5]})
+    day_2 = pd.DataFrame({'name': ['b', 'b', 'b', None], 'date': dates[[2, 2, 2, 2]]})
+
+    plan = plan_dtypes(day_1)
+    save_plan(plan, tmp_path / 'plan.json')
+    assert load_plan(tmp_path / 'plan.json') == plan
+
+    # the same codes in both days, so they can be combined as they are
+    first, second = apply_plan(day_1, plan), apply_plan(day_2, plan)
+    assert first['name'].dtype == second['name'].dtype
+    assert list(first['name'].cat.categories) == ['a', 'b']
+    assert list(second['name'].cat.codes) == [1, 1, 1, -1]
+    assert pd.concat([first, second])['date'].dtype == plan['date']
+
+    day_3 = pd.DataFrame({'name': ['c', 'a', 'b', 'a'], 'date': dates[[0, 1, 0, 2]]})
+    with pytest.raises(ValueError, match="'name'"):
+        apply_plan(day_3, plan)
+    assert apply_plan(day_3, plan, errors='ignore')['name'].dtype == day_3['name'].dtype
+
+
+def test_large_offset():
+    # float32 can only hold epoch seconds to the nearest 128s, which is
+    # within 1e-7 of each value but loses all the differences between them
+    df = pd.DataFrame({'epoch': 1.7e9 + 0.5 * np.arange(1000), 'constant': np.full(1000, 1.7e9)})
+    assert df['epoch'].astype(np.float32).nunique() < 10
+
+    assert plan_dtypes(df) == {'constant': 'float32'}
+
+
+@mark.parametrize('values, target', [
+    ([1.0, 2.0, np.nan], 'int8'),
+    ([1.0, 0.5, 2.0], 'int8'),
+    ([1.0, np.inf, 2.0], 'int8'),
+    (['1', '2', '3'], 'int8'),
+    (1.7e9 + 0.5 * np.arange(10), 'float32'),
+    ([1.0, 1e300], 'float32'),
+])
+def test_apply_plan_checks_values(values, target):
+    df = pd.DataFrame({'x': values})
+    with pytest.raises(ValueError):
+        apply_plan(df, {'x': target})
+    pd.testing.assert_frame_equal(apply_plan(df, {'x': target}, errors='ignore'), df)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,97 @@
+
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_equal
+from pytest import mark
+
+from .encoders import (
+    INTEGER_CODECS, FLOAT_CODECS, encode, decode, pack_bits, unpack_bits,
+    write_bits, zigzag_encode, zigzag_decode, choose_codec, select_codecs,
+)
+
+rng = np.random.RandomState(0)
+
+INTEGERS = {
+    'random': rng.randint(-1000, 1000, 1000),
+    'extremes': np.array([np.iinfo(np.int64).min, 0, np.iinfo(np.int64).max, -1]),
+    'runs': np.repeat(rng.randint(0, 50, 100), rng.randint(1, 20, 100)),
+    'int16': np.tile(np.arange(300, dtype=np.int16), 3),
+    'dates': np.repeat(np.arange('2019-01-01', '2019-03-01', dtype='M8[D]').astype('M8[ns]'), 30),
+    'empty': np.array([], dtype=np.int64),
+}
+
+FLOATS = {
+    'random': rng.random_sample(1000),
+    'walk': np.round(100 + np.cumsum(rng.randn(1000)), 2),
+    'constant': np.ones(100),
+    'special': np.array([0.0, -0.0, np.inf, -np.inf, 1e-300, np.nan, 5e300, 1.0]),
+    'empty': np.array([]),
+}
+
+
+@mark.parametrize('width', [0, 1, 7, 8, 13, 32, 33, 63, 64])
+def test_pack_bits(width):
+    values = rng.randint(0, 2 ** 62, 101).astype(np.uint64) * np.uint64(4) + np.uint64(3)
+    values &= np.uint64(2 ** width - 1) if width < 64 else np.iinfo(np.uint64).max
+
+    packed = pack_bits(values, width)
+    assert len(packed) == (len(values) * width + 7) // 8
+    assert_array_equal(unpack_bits(packed, width, len(values)), values)
+
+    buf = np.zeros(len(packed) + 8, dtype=np.uint8)
+    pos = 0
+    for v in values:
+        pos = write_bits(buf, pos, v, width)
+    assert_array_equal(buf[:len(packed)], packed)
+
+
+def test_zigzag():
+    values = np.array([0, -1, 1, -2, 2, np.iinfo(np.int64).min, np.iinfo(np.int64).max])
+    assert_array_equal(zigzag_encode(values)[:5], [0, 1, 2, 3, 4])
+    assert_array_equal(zigzag_decode(zigzag_encode(values)), values)
+
+
+@mark.parametrize('codec', INTEGER_CODECS)
+@mark.parametrize('name', INTEGERS)
+def test_integer_round_trip(name, codec):
+    values = INTEGERS[name]
+    decoded = decode(encode(values, codec))
+
+    assert decoded.dtype == values.dtype
+    assert_array_equal(decoded, values)
+
+
+@mark.parametrize('codec', FLOAT_CODECS)
+@mark.parametrize('name', FLOATS)
+def test_float_round_trip(name, codec):
+    values = FLOATS[name]
+    decoded = decode(encode(values, codec))
+
+    # compare the bits, so -0.0 and nan are checked exactly
+    assert_array_equal(decoded.view(np.uint64), values.view(np.uint64))
+
+
+def test_compression():
+    assert len(encode(np.ones(1000), 'gorilla').payload) < 200
+    assert len(encode(np.repeat(np.arange(10), 100), 'rle').payload) < 100
+    assert len(encode(np.arange(0, 10 ** 9, 1000), 'delta_of_delta').payload) == 0
+
+
+def test_select_codecs():
+    df = pd.DataFrame({
+        'identifier': pd.Categorical.from_codes(np.tile(np.arange(100), 50), categories=list(map(str, range(100)))),
+        'value': np.tile(rng.random_sample(100), 50),
+        'date': np.repeat(np.arange('2019-01-01', '2019-02-20', dtype='M8[D]').astype('M8[ns]'), 100),
+    })
+    codecs = select_codecs(df)
+
+    assert codecs['date'] == 'rle'
+    assert codecs['identifier'] == 'bitpack'
+    assert codecs['value'] in FLOAT_CODECS
+    assert choose_codec(np.arange(10 ** 4) * 7) == 'delta_of_delta'
+    assert choose_codec(np.cumsum(rng.randint(-3, 4, 10 ** 4)) + 10 ** 9) == 'delta'
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,181 @@
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .partitions import PartitionedStore
+
+
+def make_day(day, identifiers):
+    rng = np.random.RandomState(day)
+    return pd.DataFrame({
+        'identifier': identifiers,
+        'date': np.datetime64('2019-01-01', 'ns') + np.timedelta64(day, 'D'),
+        'value': rng.random_sample(len(identifiers)),
+    })
+
+
+@pytest.fixture
+def days():
+    # new identifiers appear on later days
+    return [make_day(day, [f'ID{x}' for x in range(10 + 2 * day)]) for day in range(10)]
+
+
+def as_objects(df):
+    df = df.copy()
+    df['identifier'] = df['identifier'].astype(object)
+    return df
+
+
+def expected(frames):
+    return as_objects(pd.concat(frames, ignore_index=True))
+
+
+def test_append_and_read(tmp_path, days):
+    store = PartitionedStore(tmp_path, chunk_rows=8)
+    for day in days:
+        store.append(day)
+
+    assert len(store.partitions) == len(days)
+    assert store.n_rows == sum(len(day) for day in days)
+    pd.testing.assert_frame_equal(as_objects(store.read()), expected(days))
+
+
+def test_dictionary_deltas(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    for day in days:
+        store.append(day)
+
+    deltas = [p['dictionary_delta']['identifier'] for p in store.partitions]
+    assert deltas == [10] + [2] * (len(days) - 1)
+
+    # codes are shared by every partition
+    df = store.read()
+    assert list(df['identifier'].cat.categories) == [f'ID{x}' for x in range(28)]
+
+
+def test_reopen(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    for day in days[:5]:
+        store.append(day)
+
+    store = PartitionedStore(tmp_path)
+    for day in days[5:]:
+        store.append(day)
+    pd.testing.assert_frame_equal(as_objects(store.read()), expected(days))
+
+
+def test_read_filters(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    for day in days:
+        store.append(day)
+
+    df = store.read(['identifier', 'value'], date=('2019-01-03', '2019-01-04'), identifier=['ID1', 'ID11'])
+    all_days = expected(days)
+    mask = all_days['date'].between('2019-01-03', '2019-01-04') & all_days['identifier'].isin(['ID1', 'ID11'])
+    pd.testing.assert_frame_equal(as_objects(df), all_days.loc[mask, ['identifier', 'value']].reset_index(drop=True))
+
+    # nothing matches, so no partitions are read, but the columns and
+    # dtypes are as stored
+    for partition in store.partitions:
+        os.remove(tmp_path / partition['file'])
+    df = store.read(['value'], date=('2020-01-01', None))
+    assert len(df) == 0 and list(df.columns) == ['value']
+    pd.testing.assert_frame_equal(as_objects(store.read(date=('2020-01-01', None))), expected(days).iloc[:0])
+    assert store.read(date=('2020-01-01', None))['identifier'].cat.categories.equals(
+        pd.Index([f'ID{x}' for x in range(28)]))
+
+
+def test_read_skips_partitions(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    for day in days:
+        store.append(day)
+
+    os.remove(tmp_path / store.partitions[0]['file'])
+    assert len(store.read(date=('2019-01-02', None))) == sum(len(day) for day in days[1:])
+
+
+def test_missing_values(tmp_path, days):
+    days[1].loc[[0, 3], 'identifier'] = None
+    days[2].loc[[5], 'identifier'] = np.nan
+    days[3]['identifier'] = pd.Series(np.nan, index=days[3].index, dtype=object)
+    store = PartitionedStore(tmp_path, chunk_rows=4)
+    for day in days[:4]:
+        store.append(day)
+
+    df = store.read()
+    assert df['identifier'].isna().sum() == 3 + len(days[3])
+    pd.testing.assert_frame_equal(as_objects(df), expected(days[:4]))
+    assert store.partitions[1]['dictionary_delta'] == {'identifier': 2}
+    assert store.partitions[3]['dictionary_delta'] == {'identifier': 0}
+
+
+def test_failed_append(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    store.append(days[0])
+
+    store.codecs = {'value': 'unknown'}
+    with pytest.raises(KeyError):
+        store.append(days[1])
+
+    # the new identifiers weren't added, and nothing was written
+    assert len(store.partitions) == 1
+    assert len(store._dictionaries['identifier']) == 10
+    assert sorted(os.listdir(tmp_path)) == sorted(['manifest.json', store.partitions[0]['file']])
+
+    store.codecs = None
+    store.append(days[1])
+    assert [p['dictionary_delta']['identifier'] for p in store.partitions] == [10, 2]
+    pd.testing.assert_frame_equal(as_objects(store.read()), expected(days[:2]))
+
+
+def test_compact(tmp_path, days):
+    store = PartitionedStore(tmp_path, chunk_rows=8)
+    for day in days:
+        store.append(day)
+
+    # days of 10, 12, ... 28 rows merge into 10-16, 18-20, 22-24, 26, 28
+    assert store.compact(max_rows=52) == 8
+    assert [p['n_rows'] for p in store.partitions] == [52, 38, 46, 26, 28]
+    assert sorted(os.listdir(tmp_path)) == sorted(['manifest.json'] + [p['file'] for p in store.partitions])
+
+    pd.testing.assert_frame_equal(as_objects(store.read()), expected(days))
+    pd.testing.assert_frame_equal(as_objects(store.read(date=('2019-01-05', '2019-01-05'))), expected(days[4:5]))
+
+    # nothing more to merge
+    assert store.compact(max_rows=52) == 0
+
+
+def test_compact_in_background(tmp_path, days):
+    store = PartitionedStore(tmp_path)
+    for day in days[:5]:
+        store.append(day)
+
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                store.read(date=('2019-01-03', None))
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    thread = store.compact_in_background()
+    for day in days[5:]:
+        store.append(day)
+    thread.join()
+    stop.set()
+    reader.join()
+
+    assert not errors
+    pd.testing.assert_frame_equal(as_objects(store.read()), expected(days))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,48 @@
+
+import importlib
+
+import pandas as pd
+import pytest
+from pytest import mark
+
+from .columnar import Table, write_table, read_table
+from .pipeline import ParallelTableWriter, write_parallel, read_parallel
+
+gen_data = importlib.import_module('performance.2019_01_data_compression.gen_data')
+
+
+@pytest.fixture
+def df():
+    return gen_data.gen_data_fast(n_identifiers=50, n_dates=41, seed=0)
+
+
+@mark.parametrize('max_workers', [1, 3])
+@mark.parametrize('options', [{}, {'compression': 'zlib'}, {'codecs': 'auto', 'compression': 'zlib'}], ids=str)
+def test_write_parallel_matches_serial(tmp_path, df, max_workers, options):
+    serial, parallel = tmp_path / 'serial.col', tmp_path / 'parallel.col'
+    write_table(serial, df, chunk_rows=100, **options)
+    write_parallel(parallel, gen_data.gen_data_chunks(50, 41, chunk_size=333, seed=0),
+                   chunk_rows=100, max_workers=max_workers, queue_size=2, **options)
+
+    pd.testing.assert_frame_equal(read_table(parallel), df)
+    with Table(serial) as a, Table(parallel) as b:
+        pd.testing.assert_frame_equal(a.query(identifier=['ABC000007']), b.query(identifier=['ABC000007']))
+
+
+@mark.parametrize('max_workers', [1, 4])
+def test_read_parallel(tmp_path, df, max_workers):
+    path = tmp_path / 'data.col'
+    write_table(path, df, chunk_rows=64, codecs='auto', compression='zlib')
+
+    pd.testing.assert_frame_equal(read_parallel(path, max_workers=max_workers), df)
+    pd.testing.assert_frame_equal(read_parallel(path, ['value'], max_workers), df[['value']])
+
+
+def test_errors_are_raised(tmp_path, df):
+    with pytest.raises(KeyError):
+        with ParallelTableWriter(tmp_path / 'data.col', codecs={'value': 'unknown'}, max_workers=2) as writer:
+            writer.write(df)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
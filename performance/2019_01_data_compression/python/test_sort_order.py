@@ -0,0 +1,88 @@
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .columnar import Table
+from .sort_order import (
+    ROW_COLUMN, sort_permutation, sort_candidates, choose_sort_order,
+    invert_permutation, write_sorted, read_original_order,
+)
+
+
+@pytest.fixture
+def df():
+    rng = np.random.RandomState(0)
+    n_ids, n_dates = 40, 50
+
+    # each identifier's value changes slowly, so sorting by identifier
+    # first gives long runs and small deltas
+    return pd.DataFrame({
+        'identifier': pd.Categorical.from_codes(np.tile(np.arange(n_ids), n_dates),
+                                                categories=[f'ID{x}' for x in range(n_ids)]),
+        'date': np.repeat(np.datetime64('2019-01-01', 'ns') + np.arange(n_dates) * np.timedelta64(1, 'D'), n_ids),
+        'value': np.tile(rng.random_sample(n_ids), n_dates) + np.repeat(np.arange(n_dates) / 8, n_ids),
+    })
+
+
+def test_sort_permutation(df):
+    perm = sort_permutation(df, ('identifier', 'date'))
+    ordered = df.iloc[perm]
+
+    assert (np.diff(ordered['identifier'].cat.codes) >= 0).all()
+    assert (ordered.groupby('identifier', observed=True)['date'].apply(lambda d: d.is_monotonic_increasing)).all()
+    np.testing.assert_array_equal(sort_permutation(df, ()), np.arange(len(df)))
+
+
+def test_invert_permutation():
+    perm = np.random.RandomState(0).permutation(1000)
+    np.testing.assert_array_equal(invert_permutation(perm), np.argsort(perm))
+
+
+def test_sort_candidates(df):
+    candidates = sort_candidates(df, max_keys=2)
+    assert candidates == [(), ('identifier',), ('date',), ('identifier', 'date'), ('date', 'identifier')]
+
+
+def test_choose_sort_order(df):
+    order, sizes = choose_sort_order(df, sample_size=1000)
+
+    assert order[0] == 'identifier'
+    assert sizes.iloc[0] == sizes[order]
+    assert sizes[order] < sizes[()]
+
+
+def test_string_columns(tmp_path, df):
+    # as gen_data writes identifiers, with a few missing
+    df['identifier'] = df['identifier'].astype(object)
+    df.loc[[5, 17], 'identifier'] = None
+
+    order, sizes = choose_sort_order(df, sample_size=1000)
+    assert order[0] == 'identifier'
+    assert sizes[order] < sizes[()]
+
+    identifiers = df['identifier'].iloc[sort_permutation(df, ('identifier', 'date'))]
+    assert identifiers.iloc[:2].isna().all()
+    assert identifiers.iloc[2:].is_monotonic_increasing
+
+    assert write_sorted(tmp_path / 'data.col', df)[0] == 'identifier'
+
+
+@pytest.mark.parametrize('options', [{}, {'codecs': 'auto', 'compression': 'zlib'}], ids=str)
+def test_write_sorted_round_trip(tmp_path, df, options):
+    path = tmp_path / 'data.col'
+    order = write_sorted(path, df, **options)
+
+    assert order[0] == 'identifier'
+    with Table(path) as table:
+        assert table['identifier'].read().is_monotonic_increasing
+        assert ROW_COLUMN in table.columns
+        if options:
+            assert table.nbytes([ROW_COLUMN]) < len(df) / 4
+
+    pd.testing.assert_frame_equal(read_original_order(path), df)
+    pd.testing.assert_frame_equal(read_original_order(path, ['value']), df[['value']])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,41 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+from pytest import mark
+
+PATH = 'performance.2019_01_data_compression.gen_data'
+gen_data = importlib.import_module(PATH)
+
+
+def test_gen_data_fast_matches_gen_data(monkeypatch):
+    # shrink the default sizes used by `gen_data`, to 7 identifiers on 4
+    # dates (`gen_dates` includes both ends)
+    gen_identifiers, gen_dates = gen_data.gen_identifiers, gen_data.gen_dates
+    monkeypatch.setattr(gen_data, 'gen_identifiers', lambda n=3000: gen_identifiers(7))
+    monkeypatch.setattr(gen_data, 'gen_dates', lambda n=3000: gen_dates(3))
+
+    np.random.seed(0)
+    expected = gen_data.gen_data()
+    monkeypatch.undo()
+    df = gen_data.gen_data_fast(7, 4, seed=0)
+
+    assert df.shape == expected.shape == (7 * 4, 3)
+    assert isinstance(df['identifier'].dtype, pd.CategoricalDtype)
+    np.testing.assert_array_equal(df['identifier'].astype(object), expected['identifier'].astype(object))
+    np.testing.assert_array_equal(df['value'], expected['value'])
+    np.testing.assert_array_equal(df['date'], expected['date'])
+
+
+@mark.parametrize('chunk_size', [1, 6, 35, 1000])
+def test_gen_data_chunks(chunk_size):
+    chunks = list(gen_data.gen_data_chunks(7, 4, chunk_size=chunk_size, seed=1))
+
+    assert all(len(c) <= chunk_size for c in chunks)
+    assert sum(len(c) for c in chunks) == 7 * 4
+    pd.testing.assert_frame_equal(pd.concat(chunks), gen_data.gen_data_fast(7, 4, seed=1))
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,185 @@
+""" How long the repo's modules take to import in a fresh interpreter,
+    from `python -X importtime`, against a budget.
+
+    Short-lived worker processes pay for every import before they do any
+    work, so heavy dependencies (scipy's subpackages, pandas, matplotlib
+    and pytest) are only imported inside the functions which use them,
+    and this fails if any module imports one eagerly, or takes longer
+    than its budget.
+
+    Run with `python -m performance.import_time` from the repo root.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported on first use (numba imports the top of scipy itself,
+# for LAPACK, but not its subpackages, which take seconds)
+LAZY = ('scipy.linalg', 'scipy.optimize', 'scipy.stats', 'pandas', 'matplotlib', 'pytest')
+
+# The library modules, and how long each may take to import, in
+# seconds: about twice what they take on one core, which is mostly numba
+# (and numpy, which it imports), or for the compression lesson, pandas
+BUDGET = 0.6
+NUMPY_ONLY = 0.2
+PANDAS = 1.3
+GUVECTORIZE = 1.2
+LESSONS = 'architecture.2018_03_maintainability_by_removing_if'
+LINEAR_SYSTEMS = 'architecture.2019_01_linear_systems_APIs_and_authentication.python'
+MOMENTS = 'numerical.2018_08_statistical_moments'
+TRIPLES = 'numerical.2019_02_pythagorean_triples'
+LU = 'performance.2017_12_LU_decomposition.python'
+COMPRESSION = 'performance.2019_01_data_compression'
+MODULES = {
+    f'{LESSONS}.by_language.python.three_hand_python': BUDGET,
+    f'{LESSONS}.by_language.python.tournament': BUDGET,
+    f'{LESSONS}.three_hand_naive': NUMPY_ONLY,
+    f'{LESSONS}.three_hand_objects': BUDGET,
+    f'{LINEAR_SYSTEMS}.authentication': BUDGET,
+    f'{LINEAR_SYSTEMS}.elimination': BUDGET,
+    f'{LINEAR_SYSTEMS}.load_test': BUDGET,
+    f'{LINEAR_SYSTEMS}.row_operations': BUDGET,
+    f'{LINEAR_SYSTEMS}.service': BUDGET,
+    f'{MOMENTS}.moments': NUMPY_ONLY,
+    f'{MOMENTS}.west': NUMPY_ONLY,
+    f'{MOMENTS}.python.log_sum_exp': BUDGET,
+    f'{MOMENTS}.python.streaming': BUDGET,
+    f'{MOMENTS}.python.streaming_pca': BUDGET,
+    'numerical.2018_10_eigenvalues.python.eigen': BUDGET,
+    'numerical.2018_10_eigenvalues.python.top_k': BUDGET,
+    f'{TRIPLES}.sharded': NUMPY_ONLY,
+    f'{TRIPLES}.triples': NUMPY_ONLY,
+    'performance.2017_06_performance_basics.python.counters': NUMPY_ONLY,
+    'performance.2017_06_performance_basics.python.mmm': BUDGET,
+    'performance.2017_07_minimisation.python.nelder_mead': BUDGET,
+    'performance.2017_07_minimisation.python.simplex': BUDGET,
+    f'{LU}.doolittle': NUMPY_ONLY,
+    f'{LU}.lu_c_fortran': BUDGET,
+    f'{LU}.lu_smorgasbord': BUDGET,
+    f'{LU}.lu_vectorized': GUVECTORIZE,
+    f'{LU}.profile_and_plot': GUVECTORIZE,
+    f'{COMPRESSION}.gen_data': PANDAS,
+    f'{COMPRESSION}.python.columnar': PANDAS,
+    f'{COMPRESSION}.python.dtypes': PANDAS,
+    f'{COMPRESSION}.python.encoders': PANDAS,
+    f'{COMPRESSION}.python.partitions': PANDAS,
+    f'{COMPRESSION}.python.pipeline': PANDAS,
+    f'{COMPRESSION}.python.sort_order': PANDAS,
+}
+
+# The lazy packages which a module may import eagerly anyway: the
+# compression lesson is about pandas frames, and numba imports
+# scipy.linalg's BLAS when it builds the ufuncs of `guvectorize` with
+# explicit signatures, which it does on import
+EAGER = {
+    f'{LU}.lu_vectorized': ('scipy.linalg',),
+    f'{LU}.profile_and_plot': ('scipy.linalg',),
+    **{module: ('pandas',) for module in MODULES if module.startswith(COMPRESSION)},
+}
+
+# Not imported by `library_modules`: the tests, and the scripts which
+# draw the readmes' images
+SKIP = re.compile(r'(^|\.)(test_\w+|__init__|__main__|images\..*|import_time)$')
+
+
+def library_modules():
+    """ The name of every module in the lessons, other than `SKIP`. """
+    modules = []
+    for package in ('architecture', 'numerical', 'performance'):
+        for directory, _, files in os.walk(os.path.join(ROOT, package)):
+            for file in files:
+                if file.endswith('.py'):
+                    path = os.path.relpath(os.path.join(directory, file[:-3]), ROOT)
+                    module = path.replace(os.sep, '.')
+                    if not SKIP.search(module):
+                        modules.append(module)
+    return sorted(modules)
+
+
+# eg. "import time:       151 |       2410 |   numpy.linalg"
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def import_times(module):
+    """ The total time, in seconds, for a fresh interpreter to import
+        `module`, and the cumulative time for each module it imports.
+
+        The lesson packages aren't valid identifiers, and
+        `importlib.import_module` isn't timed, so it's `__import__`.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'__import__({module!r})'],
+        cwd=ROOT, capture_output=True, text=True)
+    if process.returncode:
+        raise ImportError(f'Importing {module} failed:\n{process.stderr}')
+
+    total = 0.0
+    times = {}
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            seconds = int(match.group(2)) / 1e6
+            times[match.group(4)] = seconds
+            if not match.group(3):
+                total += seconds
+    return total, times
+
+
+def eager_imports(times, allowed=()):
+    """ The lazy packages imported, of those in `times`, other than
+        `allowed`.
+    """
+    return [package for package in LAZY if package not in allowed
+            and any(name == package or name.startswith(package + '.') for name in times)]
+
+
+def heaviest(module, times, n=3):
+    """ The `n` top-level packages, other than `module`'s own, which
+        took longest to import.
+    """
+    packages = {name: seconds for name, seconds in times.items()
+                if '.' not in name and name != module.split('.')[0]}
+    return sorted(packages.items(), key=lambda item: -item[1])[:n]
+
+
+def measure(module, repeats=3):
+    """ The fastest of `repeats` `import_times` (the first may be
+        compiling bytecode).
+    """
+    return min((import_times(module) for _ in range(repeats)), key=lambda result: result[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('modules', nargs='*', default=list(MODULES), help='modules to import (default: all)')
+    parser.add_argument('--budget', type=float, help='seconds allowed for each module (default: its budget)')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module in args.modules:
+        total, times = measure(module, args.repeats)
+        budget = args.budget or MODULES.get(module, BUDGET)
+        packages = ', '.join(f'{name} {seconds * 1e3:.0f}ms' for name, seconds in heaviest(module, times))
+        eager = eager_imports(times, EAGER.get(module, ()))
+
+        problems = []
+        if total > budget:
+            problems.append(f'over budget of {budget * 1e3:.0f}ms')
+        if eager:
+            problems.append(f'imports {", ".join(eager)} eagerly')
+        failures += bool(problems)
+
+        print(f'{total * 1e3:6.0f}ms  {module}')
+        print(f'{"":10}{packages}')
+        for problem in problems:
+            print(f'{"":10}FAIL: {problem}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
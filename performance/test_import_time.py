@@ -0,0 +1,26 @@
+import pytest
+
+from .import_time import EAGER, MODULES, eager_imports, import_times, library_modules
+
+
+@pytest.mark.parametrize('module', list(MODULES))
+def test_no_eager_imports(module):
+    total, times = import_times(module)
+    assert module in times
+    assert total >= times[module]
+    assert eager_imports(times, EAGER.get(module, ())) == []
+
+
+def test_every_module_has_a_budget():
+    assert sorted(MODULES) == library_modules()
+
+
+def test_eager_imports():
+    # the tests import pandas and pytest, but streaming no longer imports scipy.stats
+    _, times = import_times('numerical.2018_08_statistical_moments.python.test_streaming')
+    assert eager_imports(times) == ['pandas', 'pytest']
+    assert eager_imports(times, ('pandas',)) == ['pytest']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])